@@ -0,0 +1,155 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+
+# Kabul kontrolü konfigürasyonu
+MAX_IN_FLIGHT_PER_BACKEND = int(os.getenv('MAX_IN_FLIGHT_PER_BACKEND', 4))
+MAX_QUEUE = int(os.getenv('MAX_QUEUE', 32))
+MAX_QUEUE_TIME = float(os.getenv('MAX_QUEUE_TIME', 10))
+SERVICE_TIME_EWMA_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    """Kapasite ve bekleme kuyruğu dolu; istemci Retry-After sonra denemeli"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Sunucu şu anda yoğun, lütfen {retry_after} sn sonra tekrar deneyin")
+        self.retry_after = retry_after
+
+
+class _AdmissionBase:
+    """Sayaçlar, servis süresi EWMA'sı ve Retry-After tahmini"""
+
+    def __init__(self, capacity, max_queue=MAX_QUEUE, max_queue_time=MAX_QUEUE_TIME):
+        # capacity: sabit sayı ya da o anki kapasiteyi döndüren fonksiyon
+        self._capacity = capacity if callable(capacity) else (lambda: capacity)
+        self.max_queue = max_queue
+        self.max_queue_time = max_queue_time
+        self.in_flight = 0
+        self.service_time = None  # Bir üretimin ortalama süresi (sn)
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._counters = {'admitted': 0, 'queued': 0, 'rejected': 0, 'timeouts': 0}
+
+    def capacity(self):
+        return max(1, self._capacity())
+
+    def retry_after(self):
+        """Kuyruktakiler + bu istek, gözlenen servis hızıyla kaç saniyede erir"""
+        service_time = self.service_time or self.max_queue_time
+        service_rate = self.capacity() / service_time  # saniyede biten üretim
+        return max(1, math.ceil((len(self._waiters) + 1) / service_rate))
+
+    def _reject(self, counter):
+        self._counters[counter] += 1
+        return Overloaded(self.retry_after())
+
+    def _record(self, started):
+        elapsed = time.monotonic() - started
+        if self.service_time is None:
+            self.service_time = elapsed
+        else:
+            self.service_time += SERVICE_TIME_EWMA_ALPHA * (elapsed - self.service_time)
+
+    def _next_waiter(self):
+        """Boşalan slotu sıradaki bekleyene devret (FIFO); devredilmediyse None"""
+        if self.in_flight > self.capacity():
+            return None
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if self._grant(waiter):
+                return waiter
+        return None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = self.in_flight
+            stats['queued_now'] = len(self._waiters)
+        stats['capacity'] = self.capacity()
+        stats['max_queue'] = self.max_queue
+        stats['service_time_ms'] = round(self.service_time * 1000, 1) if self.service_time else None
+        return stats
+
+
+class AdmissionController(_AdmissionBase):
+    """Sınırlı eşzamanlılık + sınırlı bekleme kuyruğu (thread'ler için)"""
+
+    def admit(self):
+        """Slot al; kuyruk doluysa ya da süre dolarsa Overloaded fırlatır"""
+        with self._lock:
+            if self.in_flight < self.capacity():
+                self.in_flight += 1
+                self._counters['admitted'] += 1
+                return time.monotonic()
+            if len(self._waiters) >= self.max_queue:
+                raise self._reject('rejected')
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            self._counters['queued'] += 1
+
+        waiter.wait(self.max_queue_time)
+
+        with self._lock:
+            # Zaman aşımıyla release aynı anda olursa slot yine bizimdir
+            if not waiter.is_set():
+                self._waiters.remove(waiter)
+                raise self._reject('timeouts')
+            self._counters['admitted'] += 1
+        return time.monotonic()
+
+    def _grant(self, waiter):
+        waiter.set()
+        return True
+
+    def release(self, ticket, completed=True):
+        with self._lock:
+            if completed:
+                self._record(ticket)
+            if self._next_waiter() is None:
+                self.in_flight -= 1
+
+
+class AsyncAdmissionController(_AdmissionBase):
+    """AdmissionController'ın asyncio karşılığı"""
+
+    async def admit(self):
+        with self._lock:
+            if self.in_flight < self.capacity():
+                self.in_flight += 1
+                self._counters['admitted'] += 1
+                return time.monotonic()
+            if len(self._waiters) >= self.max_queue:
+                raise self._reject('rejected')
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self._counters['queued'] += 1
+
+        try:
+            await asyncio.wait_for(waiter, self.max_queue_time)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise self._reject('timeouts')
+
+        with self._lock:
+            self._counters['admitted'] += 1
+        return time.monotonic()
+
+    def _grant(self, waiter):
+        # Zaman aşımıyla iptal edilmiş bekleyen atlanır
+        if waiter.done():
+            return False
+        waiter.set_result(None)
+        return True
+
+    def release(self, ticket, completed=True):
+        with self._lock:
+            if completed:
+                self._record(ticket)
+            if self._next_waiter() is None:
+                self.in_flight -= 1
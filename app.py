@@ -1,5 +1,10 @@
+import math
+import re
 import streamlit as st
 import time
+import uuid
+
+from intents import IntentResponder
 
 # Set page config
 st.set_page_config(
@@ -13,53 +18,111 @@ st.title("🤖 Ollama Chatbot - Demo Versiyonu")
 # Demo notice
 st.warning("🚧 Bu demo versiyondur. Gerçek Ollama API'si için sunucu kurulumu gereklidir.")
 
-# Mock responses
+# Mock responses (hello, test, nasılsın, teşekkür... intents.json'da)
 MOCK_RESPONSES = {
-    "hello": "Merhaba! Ben bir AI asistanıyım. Size nasıl yardımcı olabilirim?",
-    "test": "Test başarılı! Sistem çalışıyor.",
     "default": "Bu bir demo versiyondur. Gerçek Ollama API'si bağlandığında daha gelişmiş yanıtlar alacaksınız."
 }
 
+
+@st.cache_resource
+def intent_responder():
+    """Niyet otomatı süreç başına bir kez derlenir (dosya değişince kendini yeniler)"""
+    return IntentResponder()
+
+
+WELCOME_MESSAGE = "Merhaba! Bu demo versiyonudur. Basit test yanıtları verebilirim."
+# Her rerun'da sadece son PAGE_SIZE mesaj çizilir; eskiler istek üzerine sayfa sayfa açılır
+PAGE_SIZE = 20
+
+
+# Akıtılan yanıt en fazla bu kadar sürer; uzun yanıtlarda kelimeler gruplanarak gönderilir
+STREAM_MAX_SECONDS = 1.0
+
+
+def new_message(role, content):
+    """Ham içerik "content"te saklanır; "id" çizilmiş markdown önbelleğinin anahtarıdır"""
+    return {"role": role, "content": content, "id": uuid.uuid4().hex}
+
+
+def to_markdown(content):
+    """Tek satır sonları da satır sonu olarak görünsün (sadece gösterim; içerik değişmez)"""
+    return content.strip().replace("\n", "  \n")
+
+
+def rendered(message):
+    """Mesajın markdown'u mesaj başına bir kez üretilir; id'siz eski mesajlar içerikle anahtarlanır"""
+    cache = st.session_state.rendered
+    key = (message.get("id"), message["content"])
+    markdown = cache.get(key)
+    if markdown is None:
+        markdown = cache[key] = to_markdown(message["content"])
+    return markdown
+
+
+def stream_words(text, delay=0.03, max_seconds=STREAM_MAX_SECONDS):
+    """Yanıtı kelime kelime akıt (st.write_stream için); toplam bekleme max_seconds'ı aşmaz"""
+    words = re.findall(r"\S+\s*", text)
+    step = max(1, math.ceil(len(words) * delay / max_seconds))
+    for i in range(0, len(words), step):
+        yield "".join(words[i:i + step])
+        time.sleep(delay)
+
+
+def reset_chat():
+    st.session_state.messages = [new_message("assistant", WELCOME_MESSAGE)]
+    st.session_state.rendered = {}
+    st.session_state.visible = PAGE_SIZE
+
+
 # Session state to store chat history
 if "messages" not in st.session_state:
-    st.session_state.messages = [
-        {"role": "assistant", "content": "Merhaba! Bu demo versiyonudur. Basit test yanıtları verebilirim."}
-    ]
+    reset_chat()
+st.session_state.setdefault("rendered", {})
+
+
+@st.fragment
+def chat_history():
+    """Geçmişin son `visible` mesajını çiz; "eski mesajlar" sadece bu parçayı yeniden çalıştırır"""
+    messages = st.session_state.messages
+    hidden = max(0, len(messages) - st.session_state.visible)
+    if hidden:
+        if st.button(f"⬆️ Daha eski mesajları göster ({hidden})", key="load_older"):
+            st.session_state.visible += PAGE_SIZE
+            st.rerun(scope="fragment")
+    for message in messages[hidden:]:
+        with st.chat_message(message["role"]):
+            st.markdown(rendered(message))
+
 
 # Display chat history
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+chat_history()
 
 # User input
 if prompt := st.chat_input("Mesajınızı yazın... (test, hello gibi)"):
-    # Add user message
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    # Add user message; yeni turda pencere tekrar son sayfaya daralır
+    st.session_state.messages.append(new_message("user", prompt))
+    st.session_state.visible = PAGE_SIZE
     with st.chat_message("user"):
-        st.markdown(prompt)
+        st.markdown(rendered(st.session_state.messages[-1]))
     
     # Generate mock response
     with st.chat_message("assistant"):
         with st.spinner("AI düşünüyor..."):
-            time.sleep(1)  # Simulate thinking
-            
-            user_message = prompt.lower()
-            
-            if "hello" in user_message or "merhaba" in user_message:
-                response = MOCK_RESPONSES["hello"]
-            elif "test" in user_message:
-                response = MOCK_RESPONSES["test"]
-            elif any(word in user_message for word in ["nasılsın", "how are you", "naber"]):
-                response = "Ben bir AI'yım, her zaman iyiyim! Siz nasılsınız?"
-            elif any(word in user_message for word in ["teşekkür", "thanks", "thank you"]):
-                response = "Rica ederim! Başka bir konuda yardım edebilirim."
-            else:
+            # Hazır yanıtlı niyetler beklemeden, diğerleri "model" gecikmesiyle yanıtlanır
+            match = intent_responder().respond(prompt)
+            if match is None:
+                time.sleep(1)  # Simulate thinking
                 response = f"'{prompt}' hakkında: {MOCK_RESPONSES['default']}"
-            
-            st.markdown(response)
-            
-            # Add AI response to session state
-            st.session_state.messages.append({"role": "assistant", "content": response})
+
+        if match is not None:
+            # Hazır yanıt anında çizilir; kelime kelime akıtma sadece "model" yanıtı için
+            response = match.response
+            st.markdown(to_markdown(response))
+        else:
+            response = st.write_stream(stream_words(response))
+
+        # Add AI response to session state
+        st.session_state.messages.append(new_message("assistant", response))
 
 # Sidebar info
 with st.sidebar:
@@ -83,9 +146,7 @@ with st.sidebar:
     st.success("Streamlit Cloud: ✅ Çalışıyor")
     
     if st.button("🔄 Chat Geçmişini Temizle"):
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Merhaba! Bu demo versiyonudur. Basit test yanıtları verebilirim."}
-        ]
+        reset_chat()
         st.rerun()
 
 # Footer
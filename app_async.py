@@ -0,0 +1,557 @@
+from quart import Quart, request, jsonify, Response, g
+import asyncio
+import httpx
+import json
+import os
+import time
+import uuid
+import weakref
+
+from app_minimal import (HOME_PAGE, MODEL_KEEP_ALIVE, MODEL_NAME, OLLAMA_API, batch_concurrency,
+                         batch_summary, cached_response, generate_payload, intent_reply, intent_responder, log,
+                         near_cache, parse_batch, parse_chat, response_cache, sse_event, store_response)
+from admission import MAX_IN_FLIGHT_PER_BACKEND, AsyncAdmissionController, Overloaded
+from backend_pool import BackendPool
+from compression import AsgiCompressionMiddleware
+from health_poller import AsyncHealthPoller
+from history import SUMMARY_MAX_TOKENS, AsyncHistoryManager
+import metrics
+from ollama_client import OLLAMA_HOSTS, AsyncOllamaClient, OllamaError
+from response_cache import cache_key, is_cacheable
+from sessions import SessionStore
+from single_flight import AsyncSingleFlight, GenerationCancelled, detach_once
+from traffic_record import TrafficRecorder
+
+# Async (ASGI) mod: Ollama çağrıları await edilir, böylece uzun süren
+# üretimler worker tutmaz ve tek süreç yüzlerce sohbeti aynı anda taşır.
+#   uvicorn app_async:app --host 0.0.0.0 --port 5000
+app = Quart(__name__)
+app.asgi_app = AsgiCompressionMiddleware(app.asgi_app)
+
+backends = None
+flights = None
+admission = None
+poller = None
+sessions = SessionStore(lock_factory=asyncio.Lock)
+recorder = TrafficRecorder()
+
+
+@app.before_serving
+async def startup():
+    global backends, flights, admission, poller
+    # httpx istemcileri sunucunun event loop'unda oluşturulmalı
+    backends = BackendPool(OLLAMA_HOSTS, AsyncOllamaClient, max_in_flight=MAX_IN_FLIGHT_PER_BACKEND)
+    flights = AsyncSingleFlight()
+    admission = AsyncAdmissionController(MAX_IN_FLIGHT_PER_BACKEND * len(backends.backends))
+    poller = AsyncHealthPoller(backends, model=MODEL_NAME, keep_alive=MODEL_KEEP_ALIVE)
+    poller.start()
+
+
+@app.after_serving
+async def shutdown():
+    await poller.stop()
+    for backend in backends.backends:
+        await backend.client.aclose()
+
+
+@app.before_request
+async def track_request_start():
+    g.request_started = time.monotonic()
+    g.request_id = log.begin_request(request.headers.get("X-Request-ID"))
+    metrics.HTTP_IN_FLIGHT.inc()
+
+
+@app.after_request
+async def track_request_end(response):
+    """İstek sayısı ve yanıt başlığına kadar geçen süre"""
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+    if "request_started" in g:
+        elapsed = time.monotonic() - g.request_started
+        metrics.HTTP_LATENCY.observe(elapsed, endpoint=endpoint, method=request.method)
+        log.info("http", method=request.method, path=request.path, status=response.status_code,
+                 ms=round(elapsed * 1000, 1))
+    if "request_id" in g:
+        response.headers["X-Request-ID"] = g.request_id
+    return response
+
+
+@app.teardown_request
+async def track_request_teardown(error=None):
+    if "request_started" in g:
+        metrics.HTTP_IN_FLIGHT.dec()
+
+
+@app.after_request
+async def add_cors_headers(response):
+    """React frontend için CORS (flask_cors karşılığı)"""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
+
+
+async def summarize_history(prompt):
+    """Oturum özetini kabul kuyruğuna girmeden en az yüklü backend'de üret"""
+    async with backends.alease() as backend:
+        response = await backend.client.generate(generate_payload(prompt, {
+            "temperature": 0,
+            "num_predict": SUMMARY_MAX_TOKENS
+        }))
+        if response.status_code != 200:
+            raise OllamaError(f"Ollama API hatası: {response.status_code}", response.status_code)
+        return response.json().get("response", "")
+
+
+history = AsyncHistoryManager(summarize_history)
+
+
+async def run_generation(flight, user_message, options, cacheable, session=None):
+    """Ollama üretimini stream modunda çalıştır, token'ları bekleyen isteklere dağıt"""
+    tried = []
+    while True:
+        try:
+            result = await generate_on_backend(flight, user_message, options, cacheable, tried, session)
+            break
+        except httpx.TransportError:
+            # Henüz token gönderilmediyse başka bir backend'de tekrar dene
+            if flight.tokens or len(tried) >= len(backends.backends):
+                raise
+
+    context = result.pop("context")
+    if session is not None:
+        session.backend = tried[-1]
+        sessions.record(session, user_message, result["response"], context)
+        history.maybe_summarize(session)
+    return result
+
+
+async def generate_on_backend(flight, user_message, options, cacheable, tried, session=None):
+    """Üretimi en az yüklü backend'de çalıştır; seçilen backend `tried` listesine eklenir"""
+    prompt, context, prefer = user_message, None, None
+    if session is not None:
+        # Context bütçeyi aştıysa özet + son turlardan kısa bir prompt kurulur
+        prompt, context = history.prepare(session, user_message, options)
+        prefer = session.backend
+
+    async with backends.alease(exclude=tried, prefer=prefer) as backend:
+        tried.append(backend)
+        metrics.GENERATIONS_IN_FLIGHT.inc(backend=backend.host)
+        recording = recorder.start(MODEL_NAME, prompt, options, context)
+        try:
+            started = time.monotonic()
+            first_chunk = True
+
+            payload = generate_payload(prompt, options, stream=True, context=context)
+            async with backend.client.stream_generate(payload) as response:
+
+                if response.status_code != 200:
+                    raise OllamaError(f"Ollama API hatası: {response.status_code}", response.status_code)
+
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    if first_chunk:
+                        backends.record_latency(backend, time.monotonic() - started)
+                        metrics.TIME_TO_FIRST_TOKEN.observe(time.monotonic() - started,
+                                                            model=MODEL_NAME, backend=backend.host)
+                        first_chunk = False
+                    chunk = json.loads(line)
+
+                    if chunk.get("error"):
+                        raise OllamaError(chunk["error"])
+
+                    token = chunk.get("response", "")
+                    if token:
+                        flight.publish(token)
+                        recording.token(token)
+
+                    if chunk.get("done"):
+                        ai_response = "".join(flight.tokens)
+                        if cacheable:
+                            store_response(user_message, options, ai_response)
+                        stats = {k: v for k, v in chunk.items() if k not in ("response", "context")}
+                        metrics.observe_ollama_stats(MODEL_NAME, stats)
+                        metrics.GENERATION_LATENCY.observe(time.monotonic() - started,
+                                                           model=MODEL_NAME, backend=backend.host)
+                        metrics.GENERATIONS.inc(model=MODEL_NAME, backend=backend.host, outcome="ok")
+                        recording.finish(stats)
+                        return {"response": ai_response, "stats": stats, "context": chunk.get("context")}
+
+            raise OllamaError("Ollama yanıtı yarıda kesildi")
+        except asyncio.CancelledError:
+            # Task iptali httpx akışını kapatır; Ollama bağlantı kopunca üretimi bırakır
+            if flight.cancelled:
+                metrics.observe_aborted(MODEL_NAME, backend.host, len(flight.tokens), options)
+                recording.finish(error=GenerationCancelled())
+            raise
+        except Exception as e:
+            metrics.GENERATIONS.inc(model=MODEL_NAME, backend=backend.host, outcome="error")
+            recording.finish(error=e)
+            raise
+        finally:
+            metrics.GENERATIONS_IN_FLIGHT.dec(backend=backend.host)
+
+
+async def start_generation(user_message, options, cacheable, session=None):
+    """Aynı anahtarlı süren üretime bağlan; yoksa kabul kontrolünden geçip yenisini başlat.
+    Çağıran işi bitince flight.detach() etmelidir; takipçisi kalmayan üretim durdurulur"""
+    if session is None:
+        key = cache_key(MODEL_NAME, user_message, options)
+        flight = flights.find(key)
+        if flight is not None:
+            return flight
+    else:
+        # Oturum turları kendi context'ine bağlı, başka isteklerle birleştirilmez
+        key = f"session:{session.id}:{uuid.uuid4().hex}"
+
+    ticket = await admission.admit()  # Kapasite ve kuyruk doluysa Overloaded
+
+    async def work(flight):
+        try:
+            if session is None:
+                return await run_generation(flight, user_message, options, cacheable)
+            # Aynı oturumun turları sırayla çalışır, her biri öncekinin context'ini kullanır
+            async with session.lock:
+                return await run_generation(flight, user_message, options, cacheable, session)
+        finally:
+            # İptal edilen üretimin kısa süresi Retry-After tahminini bozmasın
+            admission.release(ticket, completed=not flight.cancelled)
+
+    flight, leader = flights.join(key, work)
+    if not leader:
+        admission.release(ticket, completed=False)
+    return flight
+
+
+def overloaded_response(error):
+    """Hızlı başarısızlık: 429 + Retry-After"""
+    log.warning("chat.overloaded", retry_after=error.retry_after)
+    return jsonify({"error": str(error), "retry_after": error.retry_after}), 429, {
+        "Retry-After": str(error.retry_after)
+    }
+
+
+@app.route("/chat", methods=["POST"])
+async def chat():
+    """Ana chat endpoint - Ollama ile konuşma"""
+    try:
+        data = await request.get_json(silent=True)
+        user_message, options, error = parse_chat(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        log.info("chat.request", chars=len(user_message), message=log.body(user_message))
+
+        # "session_id" gönderildiyse (null = yeni oturum) sohbet sunucuda sürdürülür
+        session = sessions.get_or_create(data["session_id"]) if "session_id" in data else None
+
+        # Selam, teşekkür gibi basit mesajlar model beklemeden yanıtlanır
+        if session is None:
+            reply = intent_reply(user_message)
+            if reply is not None:
+                return jsonify(reply)
+
+        cacheable = session is None and is_cacheable(options, data.get("cache"))
+        if cacheable:
+            hit = cached_response(user_message, options)
+            if hit is not None:
+                log.info("chat.cache_hit", similarity=hit.get("similarity"))
+                return jsonify(hit)
+
+        flight = await start_generation(user_message, options, cacheable, session)
+        try:
+            result = await flight.wait()
+        except asyncio.CancelledError:
+            # İstemci koptu, Quart bu task'ı iptal etti; başka takipçi yoksa üretim de durur
+            log.info("chat.client_disconnected", tokens=len(flight.tokens))
+            raise
+        finally:
+            flight.detach()
+        ai_response = result["response"] or "Yanıt alınamadı"
+
+        log.info("chat.response", chars=len(ai_response), response=log.body(ai_response))
+        if session is not None:
+            return jsonify({"response": ai_response, "session_id": session.id})
+        return jsonify({"response": ai_response})
+
+    except Overloaded as e:
+        return overloaded_response(e)
+    except OllamaError as e:
+        log.error("chat.ollama_error", error=str(e))
+        return jsonify({"error": str(e)}), 500
+    except httpx.HTTPError as e:
+        log.error("chat.connection_error", error=str(e))
+        return jsonify({"error": f"Ollama bağlantı hatası: {str(e)}"}), 500
+    except Exception as e:
+        log.error("chat.error", error=str(e))
+        return jsonify({"error": f"Sunucu hatası: {str(e)}"}), 500
+
+
+@app.route("/chat/stream", methods=["POST"])
+async def chat_stream():
+    """Streaming chat endpoint - Ollama NDJSON akışını SSE olarak iletir"""
+    data = await request.get_json(silent=True)
+    user_message, options, error = parse_chat(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    log.info("chat.request", stream=True, chars=len(user_message), message=log.body(user_message))
+
+    session = sessions.get_or_create(data["session_id"]) if "session_id" in data else None
+    cacheable = session is None and is_cacheable(options, data.get("cache"))
+    hit = intent_reply(user_message) if session is None else None
+    if hit is None and cacheable:
+        hit = cached_response(user_message, options)
+
+    # Kabul kontrolü akış başlamadan yapılır ki reddedilen istek gerçek 429 alsın
+    flight = None
+    if hit is None:
+        try:
+            flight = await start_generation(user_message, options, cacheable, session)
+        except Overloaded as e:
+            return overloaded_response(e)
+
+    release = detach_once(flight) if flight is not None else None
+
+    async def generate():
+        if hit is not None:
+            if "intent" not in hit:
+                log.info("chat.cache_hit", stream=True, similarity=hit.get("similarity"))
+            yield sse_event("token", {"token": hit.pop("response")})
+            yield sse_event("done", dict(hit, done=True))
+            return
+
+        try:
+            # İstemci koparsa Quart üreteci iptal eder; finally takibi bırakır
+            async for token in flight.follow():
+                yield sse_event("token", {"token": token})
+            stats = flight.result["stats"]
+            if session is not None:
+                stats = dict(stats, session_id=session.id)
+            yield sse_event("done", stats)
+            ai_response = flight.result["response"]
+            log.info("chat.response", stream=True, chars=len(ai_response), response=log.body(ai_response))
+
+        except OllamaError as e:
+            log.error("chat.ollama_error", stream=True, error=str(e))
+            yield sse_event("error", {"error": str(e)})
+        except httpx.HTTPError as e:
+            log.error("chat.connection_error", stream=True, error=str(e))
+            yield sse_event("error", {"error": f"Ollama bağlantı hatası: {str(e)}"})
+        except Exception as e:
+            log.error("chat.error", stream=True, error=str(e))
+            yield sse_event("error", {"error": f"Sunucu hatası: {str(e)}"})
+        finally:
+            release()
+
+    response = Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    response.timeout = None  # Uzun üretimlerde akışı kesme
+    if release is not None:
+        # Quart gövde üretecini hiç başlatmadan iptal ederse (istemci başlıklardan önce koptu)
+        # finally çalışmaz; yanıt nesnesi atılınca takip yine bırakılır
+        weakref.finalize(response, release)
+    return response
+
+
+async def run_batch_item(index, user_message, options, cache_opt_in, limit):
+    """Tek batch öğesi; hata öğenin sonucuna yazılır, batch'in kalanı sürer"""
+    async with limit:
+        started = time.monotonic()
+        item = {"index": index}
+        try:
+            if not user_message:
+                raise ValueError("Mesaj boş olamaz")
+            cacheable = is_cacheable(options, cache_opt_in)
+            hit = cached_response(user_message, options) if cacheable else None
+            if hit is not None:
+                item.update(hit)
+            else:
+                flight = await start_generation(user_message, options, cacheable)
+                try:
+                    result = await flight.wait()
+                finally:
+                    flight.detach()
+                item["response"] = result["response"]
+                item["stats"] = result["stats"]
+        except Overloaded as e:
+            item["error"] = str(e)
+            item["retry_after"] = e.retry_after
+        except Exception as e:
+            item["error"] = str(e)
+        item["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+        return item
+
+
+@app.route("/chat/batch", methods=["POST"])
+async def chat_batch():
+    """Birden çok prompt'u sınırlı eşzamanlılıkla çalıştır; sıralı JSON ya da tamamlandıkça SSE"""
+    data = await request.get_json(silent=True)
+    items, error = parse_batch(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    concurrency = batch_concurrency(data)
+    cache_opt_in = data.get("cache")
+    log.info("chat.batch", items=len(items), concurrency=concurrency)
+
+    # Aynı anda en fazla `concurrency` üretim; kalanlar semaforda bekler
+    started = time.monotonic()
+    limit = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.ensure_future(run_batch_item(index, message, options, cache_opt_in, limit))
+             for index, (message, options) in enumerate(items)]
+
+    if not data.get("stream"):
+        results = await asyncio.gather(*tasks)
+        return jsonify(dict(batch_summary(results, started), results=results))
+
+    async def generate():
+        results = []
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                results.append(await next_result)
+                yield sse_event("result", results[-1])
+            yield sse_event("done", batch_summary(results, started))
+        finally:
+            # İstemci koptuysa henüz başlamamış öğeleri çalıştırma
+            for task in tasks:
+                task.cancel()
+
+    response = Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    response.timeout = None
+    return response
+
+
+@app.route("/", methods=["GET"])
+async def home():
+    """Ana sayfa - Web arayüzü (önceden çizilmiş ve sıkıştırılmış, koşullu isteklerde 304)"""
+    status, headers, body = HOME_PAGE.respond(request.headers.get("Accept-Encoding"),
+                                              request.headers.get("If-None-Match"))
+    return Response(body, status=status, headers=headers)
+
+
+@app.route("/api", methods=["GET"])
+async def api_info():
+    """API bilgileri"""
+    return jsonify({
+        "message": "Ollama Chatbot API çalışıyor 🚀 (async)",
+        "model": MODEL_NAME,
+        "ollama_host": OLLAMA_API,
+        "ollama_hosts": OLLAMA_HOSTS,
+        "endpoints": {
+            "/": "Web arayüzü",
+            "/chat": "POST - Chat endpoint",
+            "/chat/stream": "POST - Token token streaming chat (SSE)",
+            "/chat/batch": 'POST - Çoklu prompt (sıralı JSON ya da "stream": true ile SSE)',
+            "/cache/stats": "Yanıt önbelleği sayaçları",
+            "/intents/stats": "Hazır yanıt (niyet) hızlı yolu sayaçları",
+            "/log/stats": "Yapılandırılmış log kuyruğu ve düşürülen kayıt sayaçları",
+            "/flights/stats": "Birleştirilen eşzamanlı istek sayaçları",
+            "/backends": "Ollama backend'lerinin yük ve sağlık durumu",
+            "/admission/stats": "Kabul kontrolü ve bekleme kuyruğu sayaçları",
+            "/sessions": "Sohbet oturumu sayaçları",
+            "/sessions/<id>": "GET - Oturum geçmişi, DELETE - Oturumu sil",
+            "/metrics": "Prometheus metrikleri",
+            "/health": "Sağlık kontrolü",
+            "/models": "Mevcut modeller"
+        }
+    })
+
+
+@app.route("/health", methods=["GET"])
+async def health():
+    """Sağlık kontrolü - arka plan yoklamasının son sonucundan, Ollama'ya istek atmadan"""
+    report = poller.health()
+    report["model"] = MODEL_NAME
+    return jsonify(report), 200 if report["status"] == "healthy" else 503
+
+
+@app.route("/metrics", methods=["GET"])
+async def prometheus_metrics():
+    """Prometheus metrikleri (istek sayıları, gecikmeler, TTFT, Ollama token/sn)"""
+    metrics.update_resource_gauges(backends, admission)
+    metrics.update_log_gauges(log)
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route("/cache/stats", methods=["GET"])
+async def cache_stats():
+    """Yanıt önbelleği isabet/ıska sayaçları"""
+    stats = response_cache.stats()
+    stats["near_duplicate"] = near_cache.stats()
+    return jsonify(stats)
+
+
+@app.route("/intents/stats", methods=["GET"])
+async def intent_stats():
+    """Niyet hızlı yolu isabet sayaçları"""
+    return jsonify(intent_responder.stats())
+
+
+@app.route("/log/stats", methods=["GET"])
+async def log_stats():
+    """Log kuyruğu doluluğu, yazılan/düşürülen kayıtlar"""
+    return jsonify(log.stats())
+
+
+@app.route("/flights/stats", methods=["GET"])
+async def flight_stats():
+    """Single-flight birleştirme sayaçları"""
+    return jsonify(flights.stats())
+
+
+@app.route("/backends", methods=["GET"])
+async def backend_stats():
+    """Backend başına bekleyen istek, gecikme ve hata durumu"""
+    return jsonify(backends.stats())
+
+
+@app.route("/admission/stats", methods=["GET"])
+async def admission_stats():
+    """Kabul edilen, kuyruğa alınan ve reddedilen istek sayaçları"""
+    return jsonify(admission.stats())
+
+
+@app.route("/sessions", methods=["GET"])
+async def session_stats():
+    """Aktif oturum sayısı, bellek kullanımı ve geçmiş sıkıştırma sayaçları"""
+    return jsonify(dict(sessions.stats(), history=history.stats()))
+
+
+@app.route("/sessions/<session_id>", methods=["GET", "DELETE"])
+async def session_detail(session_id):
+    """Oturum geçmişini göster ya da oturumu sil"""
+    if request.method == "DELETE":
+        if sessions.delete(session_id):
+            return jsonify({"deleted": session_id})
+        return jsonify({"error": "Oturum bulunamadı"}), 404
+
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Oturum bulunamadı"}), 404
+    return jsonify(session.snapshot())
+
+
+@app.route("/models", methods=["GET"])
+async def models():
+    """Mevcut modelleri listele (arka planda yenilenen liste)"""
+    models = poller.models()
+    if models is None:
+        return jsonify({"error": "Modeller henüz alınamadı", "last_error": poller.health()["last_error"]}), 503
+    return jsonify(models)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    print("🚀 Ollama Chatbot (async) başlatılıyor...")
+    print(f"📡 Ollama Host: {', '.join(OLLAMA_HOSTS)}")
+    print(f"🤖 Model: {MODEL_NAME}")
+    print(f"🌐 Web arayüzü: http://localhost:5000")
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv('PORT', 5000)))
@@ -1,15 +1,69 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, request, jsonify, Response, g, stream_with_context
 from flask_cors import CORS
+from werkzeug.wsgi import ClosingIterator
 import requests
 import json
 import os
+import select
+import socket
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from admission import MAX_IN_FLIGHT_PER_BACKEND, AdmissionController, Overloaded
+from backend_pool import BackendPool
+from chat_ui import CHAT_LOG_JS
+from compression import CompressionMiddleware, PrecompressedPage
+from health_poller import HealthPoller
+from history import SUMMARY_MAX_TOKENS, HistoryManager
+from intents import IntentResponder
+import metrics
+from ollama_client import OLLAMA_HOSTS, OllamaClient, OllamaError, interrupt
+from near_duplicate import NearDuplicateIndex
+from response_cache import ResponseCache, cache_key, is_cacheable
+from sessions import SESSION_ID_MAX_LENGTH, SessionStore, valid_session_id
+from single_flight import GenerationCancelled, SingleFlight, detach_once
+from structured_log import log
+from traffic_record import TrafficRecorder
 
 app = Flask(__name__)
 CORS(app)  # React frontend için CORS enable
+# Yanıtlar Accept-Encoding'e göre gzip/brotli; stream'ler parça parça flush edilir
+app.wsgi_app = CompressionMiddleware(app.wsgi_app)
 
 # Ollama API konfigürasyonu
-OLLAMA_API = os.getenv('OLLAMA_HOST', 'http://localhost:11434') + '/api/generate'
+OLLAMA_API = OLLAMA_HOSTS[0] + '/api/generate'
 MODEL_NAME = os.getenv('MODEL_NAME', 'llama3')
+# Modelin Ollama belleğinde kalma süresi; her istekte yenilenir (-1 = süresiz)
+MODEL_KEEP_ALIVE = os.getenv('MODEL_KEEP_ALIVE', '24h')
+
+# /chat/batch: istek başına en fazla prompt ve aynı anda çalışan üretim sayısı
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 100))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', MAX_IN_FLIGHT_PER_BACKEND * len(OLLAMA_HOSTS)))
+# /chat yanıt beklerken istemci bağlantısının kapanıp kapanmadığını yoklama aralığı (sn)
+DISCONNECT_CHECK_INTERVAL = float(os.getenv('DISCONNECT_CHECK_INTERVAL', 0.5))
+
+# Her Ollama VM'i için ayrı keep-alive bağlantı havuzu; /chat en az yüklü olana gider
+backends = BackendPool(OLLAMA_HOSTS, OllamaClient, max_in_flight=MAX_IN_FLIGHT_PER_BACKEND)
+# Tanımlı backend başına sınırlı eşzamanlı üretim; fazlası kısa bir kuyrukta bekler.
+# Kapasite sağlıklı backend sayısına bağlı değil: birkaç hatalı istek herkese 429 döndürtmesin
+admission = AdmissionController(MAX_IN_FLIGHT_PER_BACKEND * len(backends.backends))
+# /health ve /models her istekte Ollama'yı yoklamaz; durum arka planda yenilenir.
+# Model her backend'de başlangıçta ve Ollama yeniden başladığında önceden yüklenir.
+poller = HealthPoller(backends, model=MODEL_NAME, keep_alive=MODEL_KEEP_ALIVE)
+
+# Selam/teşekkür gibi basit mesajlar için düzenlenebilir niyet dosyasından hazır yanıtlar
+intent_responder = IntentResponder()
+# Deterministik istekler için yanıt önbelleği (bellek + isteğe bağlı disk)
+response_cache = ResponseCache()
+# Yazımı farklı ama aynı anlamdaki prompt'lar için MinHash/LSH katmanı
+near_cache = NearDuplicateIndex()
+# Aynı anda gelen aynı istekler tek Ollama üretimini paylaşır
+flights = SingleFlight()
+# Sunucu tarafı sohbet geçmişi; her tur sadece yeni token'ları değerlendirir
+sessions = SessionStore()
+# TRAFFIC_RECORD_PATH verilirse üretimler anonim olarak replay için kaydedilir
+recorder = TrafficRecorder()
 
 # Basit HTML arayüzü (React alternatifi için)
 HTML_INTERFACE = '''
@@ -116,37 +170,89 @@ HTML_INTERFACE = '''
     </div>
 
     <script>
+        // Sunucu tarafı oturum; ilk yanıtla birlikte gelir
+        let sessionId = null;
+        
+        {{ chat_log_js | safe }}
+        
         async function sendMessage() {
             const input = document.getElementById('messageInput');
-            const chatArea = document.getElementById('chatArea');
             const loading = document.getElementById('loading');
             const message = input.value.trim();
             
             if (!message) return;
             
             // Kullanıcı mesajını ekle
-            chatArea.innerHTML += `<div class="message user">${message}</div>`;
+            chatLog.add('user', message);
+            chatLog.scrollToBottom();
             input.value = '';
             loading.style.display = 'block';
-            chatArea.scrollTop = chatArea.scrollHeight;
+            
+            // Bot yanıtı ilk token'la oluşturulur, sonra token token büyür
+            let reply = null;
             
             try {
-                const response = await fetch('/chat', {
+                const response = await fetch('/chat/stream', {
                     method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ message: message })
+                    headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+                    body: JSON.stringify({ message: message, session_id: sessionId })
                 });
                 
-                const data = await response.json();
+                if (!response.ok || !response.body) {
+                    const data = await response.json();
+                    throw new Error(data.error || `HTTP ${response.status}`);
+                }
                 
-                // Bot yanıtını ekle
-                chatArea.innerHTML += `<div class="message bot">${data.response || 'Üzgünüm, bir hata oluştu.'}</div>`;
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                let done = false;
+                
+                while (!done) {
+                    const chunk = await reader.read();
+                    if (chunk.done) break;
+                    buffer += decoder.decode(chunk.value, { stream: true });
+                    
+                    // SSE olayları boş satırla ayrılır
+                    let sep;
+                    while ((sep = buffer.indexOf('\\n\\n')) !== -1) {
+                        const event = parseEvent(buffer.slice(0, sep));
+                        buffer = buffer.slice(sep + 2);
+                        
+                        if (event.type === 'token') {
+                            if (reply === null) {
+                                loading.style.display = 'none';
+                                reply = chatLog.add('bot', '');
+                            }
+                            chatLog.appendToken(reply, event.data.token);
+                        } else if (event.type === 'error') {
+                            throw new Error(event.data.error);
+                        } else if (event.type === 'done') {
+                            if (event.data.session_id) sessionId = event.data.session_id;
+                            done = true;
+                        }
+                    }
+                }
+                
+                if (reply === null) {
+                    chatLog.add('bot', 'Üzgünüm, bir hata oluştu.');
+                }
             } catch (error) {
-                chatArea.innerHTML += `<div class="message bot">Bağlantı hatası: ${error.message}</div>`;
+                chatLog.add('bot', `Bağlantı hatası: ${error.message}`);
             }
             
             loading.style.display = 'none';
-            chatArea.scrollTop = chatArea.scrollHeight;
+            chatLog.flush();
+        }
+        
+        function parseEvent(raw) {
+            let type = 'token';
+            let data = '';
+            for (const line of raw.split('\\n')) {
+                if (line.startsWith('event:')) type = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            return { type: type, data: data ? JSON.parse(data) : {} };
         }
         
         function checkEnter(event) {
@@ -154,51 +260,514 @@ HTML_INTERFACE = '''
                 sendMessage();
             }
         }
+        
+        chatLog.init(document.getElementById('chatArea'));
     </script>
 </body>
 </html>
 '''
 
+# Arayüzün çıktısı süreç boyunca değişmez: bir kez çizilir, gzip/brotli varyantları ve ETag'i hazırlanır
+HOME_PAGE = PrecompressedPage(app.jinja_env.from_string(HTML_INTERFACE).render(model_name=MODEL_NAME,
+                                                                              chat_log_js=CHAT_LOG_JS))
+
+@app.before_request
+def start_poller():
+    """Yoklama thread'i import'ta değil ilk istekte başlar (gunicorn fork'u ve app_async importu için)"""
+    poller.start()
+
+@app.before_request
+def track_request_start():
+    g.request_started = time.monotonic()
+    g.request_id = log.begin_request(request.headers.get("X-Request-ID"))
+    metrics.HTTP_IN_FLIGHT.inc()
+
+@app.after_request
+def track_request_end(response):
+    """İstek sayısı ve yanıt başlığına kadar geçen süre"""
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+    if "request_started" in g:
+        elapsed = time.monotonic() - g.request_started
+        metrics.HTTP_LATENCY.observe(elapsed, endpoint=endpoint, method=request.method)
+        log.info("http", method=request.method, path=request.path, status=response.status_code,
+                 ms=round(elapsed * 1000, 1))
+    if "request_id" in g:
+        response.headers["X-Request-ID"] = g.request_id
+    return response
+
+@app.teardown_request
+def track_request_teardown(error=None):
+    # stream_with_context teardown'ı akış sonunda bir kez daha çağırır; istek bir kez düşülür
+    if g.pop("request_counted", None) is None and "request_started" in g:
+        g.request_counted = True
+        metrics.HTTP_IN_FLIGHT.dec()
+
+def parse_chat(data):
+    """/chat ve /chat/stream gövdesinden (mesaj, options); geçersizse (None, None, hata mesajı).
+    session_id varsa null (yeni oturum) ya da geçerli bir id olmalı"""
+    if not isinstance(data, dict):
+        return None, None, "İstek gövdesi bir JSON nesnesi olmalı"
+    user_message = data.get("message", "")
+    if not isinstance(user_message, str):
+        return None, None, "message metin olmalı"
+    if not user_message:
+        return None, None, "Mesaj boş olamaz"
+    options = data.get("options") or {}
+    if not isinstance(options, dict):
+        return None, None, "options bir nesne olmalı"
+    session_id = data.get("session_id")
+    if session_id is not None and not valid_session_id(session_id):
+        return None, None, (f"session_id en fazla {SESSION_ID_MAX_LENGTH} karakterlik, "
+                            "harf, rakam, '-' ve '_' içeren bir metin olmalı")
+    return user_message, options, None
+
 @app.route("/chat", methods=["POST"])
 def chat():
     """Ana chat endpoint - Ollama ile konuşma"""
     try:
-        data = request.json
-        user_message = data.get("message", "")
-        
-        if not user_message:
-            return jsonify({"error": "Mesaj boş olamaz"}), 400
+        data = request.get_json(silent=True)
+        user_message, options, error = parse_chat(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        log.info("chat.request", chars=len(user_message), message=log.body(user_message))
+
+        # "session_id" gönderildiyse (null = yeni oturum) sohbet sunucuda sürdürülür
+        session = sessions.get_or_create(data["session_id"]) if "session_id" in data else None
 
-        print(f"🤖 Kullanıcı: {user_message}")
+        # Selam, teşekkür gibi basit mesajlar model beklemeden yanıtlanır
+        if session is None:
+            reply = intent_reply(user_message)
+            if reply is not None:
+                return jsonify(reply)
+
+        # Önbellek kontrolü (sadece temperature 0 veya "cache": true; oturumsuz istekler)
+        cacheable = session is None and is_cacheable(options, data.get("cache"))
+        if cacheable:
+            hit = cached_response(user_message, options)
+            if hit is not None:
+                log.info("chat.cache_hit", similarity=hit.get("similarity"))
+                return jsonify(hit)
         
-        # Ollama API'ye isteği gönder
-        response = requests.post(OLLAMA_API, json={
-            "model": MODEL_NAME,
-            "prompt": user_message,
-            "stream": False  # Stream kapalı - basit response
-        }, timeout=60)
-
-        if response.status_code == 200:
-            response_data = response.json()
-            ai_response = response_data.get("response", "Yanıt alınamadı")
-            
-            print(f"🤖 AI: {ai_response[:100]}...")
-            return jsonify({"response": ai_response})
-        else:
-            print(f"❌ Ollama API hatası: {response.status_code}")
-            return jsonify({"error": f"Ollama API hatası: {response.status_code}"}), 500
+        # Ollama API'ye isteği gönder (aynı anda gelen aynı sorular tek üretimi paylaşır)
+        flight = start_generation(user_message, options, cacheable, session)
+        result = wait_for_client(flight)
+        if result is None:
+            # Yanıtı okuyacak kimse yok; başka takipçi yoksa üretim durduruldu
+            log.info("chat.client_disconnected", tokens=len(flight.tokens))
+            return "", 499
+        ai_response = result["response"] or "Yanıt alınamadı"
 
+        log.info("chat.response", chars=len(ai_response), response=log.body(ai_response))
+        if session is not None:
+            return jsonify({"response": ai_response, "session_id": session.id})
+        return jsonify({"response": ai_response})
+
+    except Overloaded as e:
+        return overloaded_response(e)
+    except OllamaError as e:
+        log.error("chat.ollama_error", error=str(e))
+        return jsonify({"error": str(e)}), 500
     except requests.exceptions.RequestException as e:
-        print(f"❌ Bağlantı hatası: {str(e)}")
+        log.error("chat.connection_error", error=str(e))
         return jsonify({"error": f"Ollama bağlantı hatası: {str(e)}"}), 500
     except Exception as e:
-        print(f"❌ Genel hata: {str(e)}")
+        log.error("chat.error", error=str(e))
         return jsonify({"error": f"Sunucu hatası: {str(e)}"}), 500
 
+def generate_payload(user_message, options=None, stream=False, context=None):
+    """Ollama /api/generate istek gövdesi"""
+    payload = {
+        "model": MODEL_NAME,
+        "prompt": user_message,
+        "stream": stream,
+        "keep_alive": MODEL_KEEP_ALIVE  # Ollama'nın 5 dk varsayılanı modeli boşta bellekten atar
+    }
+    if options:
+        payload["options"] = options
+    if context:
+        # Önceki turların token'ları; Ollama önekini yeniden prefill etmez
+        payload["context"] = context
+    return payload
+
+def client_disconnected():
+    """İstemci bağlantıyı kapattı mı; soket okunabilir ama veri yoksa karşı taraf kapatmıştır"""
+    sock = request.environ.get("werkzeug.socket") or request.environ.get("gunicorn.socket")
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b""
+    except ValueError:
+        # TLS soketi MSG_PEEK desteklemez; kopma bu yolla anlaşılamaz
+        return False
+    except OSError:
+        return True
+
+def wait_for_client(flight):
+    """Üretim sonucunu bekle; istemci koparsa None. Her iki durumda da takip bırakılır"""
+    try:
+        while not flight.wait_done(DISCONNECT_CHECK_INTERVAL):
+            if client_disconnected():
+                return None
+        return flight.wait()
+    finally:
+        flight.detach()
+
+def intent_reply(user_message):
+    """Yüksek güvenli niyet eşleşmesinde hazır yanıt; yoksa None (Ollama'ya gidilir)"""
+    match = intent_responder.respond(user_message)
+    if match is None:
+        return None
+    log.info("chat.intent", intent=match.name, confidence=round(match.confidence, 3))
+    metrics.INTENT_RESPONSES.inc(intent=match.name)
+    return match.as_dict()
+
+def cached_response(user_message, options):
+    """Önce birebir, sonra near-duplicate önbellek; bulunamazsa None"""
+    cached = response_cache.get(cache_key(MODEL_NAME, user_message, options))
+    if cached is not None:
+        return {"response": cached["response"], "cached": True}
+
+    match = near_cache.lookup(cache_key(MODEL_NAME, "", options), user_message)
+    if match is not None:
+        value, score = match
+        return {"response": value["response"], "cached": True, "similarity": round(score, 3)}
+    return None
+
+def store_response(user_message, options, ai_response):
+    """Tamamlanan yanıtı her iki önbellek katmanına yaz"""
+    value = {"response": ai_response}
+    response_cache.set(cache_key(MODEL_NAME, user_message, options), value)
+    near_cache.add(cache_key(MODEL_NAME, "", options), user_message, value)
+
+def summarize_history(prompt):
+    """Oturum özetini kabul kuyruğuna girmeden en az yüklü backend'de üret"""
+    with backends.lease() as backend:
+        response = backend.client.generate(generate_payload(prompt, {
+            "temperature": 0,
+            "num_predict": SUMMARY_MAX_TOKENS
+        }))
+        if response.status_code != 200:
+            raise OllamaError(f"Ollama API hatası: {response.status_code}", response.status_code)
+        return response.json().get("response", "")
+
+# Uzayan oturumlarda prompt'u token bütçesinde tut; eski turlar arka planda özetlenir
+history = HistoryManager(summarize_history)
+
+def run_generation(flight, user_message, options, cacheable, session=None):
+    """Ollama üretimini stream modunda çalıştır, token'ları bekleyen isteklere dağıt"""
+    tried = []
+    while True:
+        try:
+            result = generate_on_backend(flight, user_message, options, cacheable, tried, session)
+            break
+        except requests.exceptions.ConnectionError:
+            # Henüz token gönderilmediyse başka bir backend'de tekrar dene
+            if flight.tokens or len(tried) >= len(backends.backends):
+                raise
+
+    context = result.pop("context")
+    if session is not None:
+        session.backend = tried[-1]
+        sessions.record(session, user_message, result["response"], context)
+        history.maybe_summarize(session)
+    return result
+
+def generate_on_backend(flight, user_message, options, cacheable, tried, session=None):
+    """Üretimi en az yüklü backend'de çalıştır; seçilen backend `tried` listesine eklenir"""
+    prompt, context, prefer = user_message, None, None
+    if session is not None:
+        # Context bütçeyi aştıysa özet + son turlardan kısa bir prompt kurulur
+        prompt, context = history.prepare(session, user_message, options)
+        prefer = session.backend
+
+    with backends.lease(exclude=tried, prefer=prefer) as backend:
+        tried.append(backend)
+        metrics.GENERATIONS_IN_FLIGHT.inc(backend=backend.host)
+        recording = recorder.start(MODEL_NAME, prompt, options, context)
+        try:
+            started = time.monotonic()
+            first_chunk = True
+
+            # stream=True: Ollama her token için bir JSON satırı yollar.
+            # Son takipçi ayrılırsa soket kapatılır; Ollama bağlantı kopunca üretimi bırakır
+            payload = generate_payload(prompt, options, stream=True, context=context)
+            with backend.client.generate(payload, stream=True) as response, \
+                    flight.cancel_hook(lambda: interrupt(response)):
+
+                if response.status_code != 200:
+                    raise OllamaError(f"Ollama API hatası: {response.status_code}", response.status_code)
+
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    if flight.cancelled:
+                        raise GenerationCancelled()
+                    if first_chunk:
+                        backends.record_latency(backend, time.monotonic() - started)
+                        metrics.TIME_TO_FIRST_TOKEN.observe(time.monotonic() - started,
+                                                            model=MODEL_NAME, backend=backend.host)
+                        first_chunk = False
+                    chunk = json.loads(line)
+
+                    if chunk.get("error"):
+                        raise OllamaError(chunk["error"])
+
+                    token = chunk.get("response", "")
+                    if token:
+                        flight.publish(token)
+                        recording.token(token)
+
+                    if chunk.get("done"):
+                        ai_response = "".join(flight.tokens)
+                        if cacheable:
+                            store_response(user_message, options, ai_response)
+                        # Son satır Ollama'nın zamanlama istatistiklerini içerir
+                        stats = {k: v for k, v in chunk.items() if k not in ("response", "context")}
+                        metrics.observe_ollama_stats(MODEL_NAME, stats)
+                        metrics.GENERATION_LATENCY.observe(time.monotonic() - started,
+                                                           model=MODEL_NAME, backend=backend.host)
+                        metrics.GENERATIONS.inc(model=MODEL_NAME, backend=backend.host, outcome="ok")
+                        recording.finish(stats)
+                        return {"response": ai_response, "stats": stats, "context": chunk.get("context")}
+
+            raise OllamaError("Ollama yanıtı yarıda kesildi")
+        except Exception as e:
+            if flight.cancelled:
+                # Kesilen soketin okuma hatası değil, bilinçli iptal
+                metrics.observe_aborted(MODEL_NAME, backend.host, len(flight.tokens), options)
+                cancelled = GenerationCancelled()
+                recording.finish(error=cancelled)
+                raise cancelled from e
+            metrics.GENERATIONS.inc(model=MODEL_NAME, backend=backend.host, outcome="error")
+            recording.finish(error=e)
+            raise
+        finally:
+            metrics.GENERATIONS_IN_FLIGHT.dec(backend=backend.host)
+
+def start_generation(user_message, options, cacheable, session=None):
+    """Aynı anahtarlı süren üretime bağlan; yoksa kabul kontrolünden geçip yenisini başlat.
+    Çağıran işi bitince flight.detach() etmelidir; takipçisi kalmayan üretim durdurulur"""
+    if session is None:
+        key = cache_key(MODEL_NAME, user_message, options)
+        flight = flights.find(key)
+        if flight is not None:
+            return flight
+    else:
+        # Oturum turları kendi context'ine bağlı, başka isteklerle birleştirilmez
+        key = f"session:{session.id}:{uuid.uuid4().hex}"
+
+    ticket = admission.admit()  # Kapasite ve kuyruk doluysa Overloaded
+
+    def work(flight):
+        try:
+            if session is None:
+                return run_generation(flight, user_message, options, cacheable)
+            # Aynı oturumun turları sırayla çalışır, her biri öncekinin context'ini kullanır
+            with session.lock:
+                return run_generation(flight, user_message, options, cacheable, session)
+        finally:
+            # İptal edilen üretimin kısa süresi Retry-After tahminini bozmasın
+            admission.release(ticket, completed=not flight.cancelled)
+
+    flight, leader = flights.join(key, work)
+    if not leader:
+        # Beklerken başka bir istek aynı üretimi başlatmış, slotu geri ver
+        admission.release(ticket, completed=False)
+    return flight
+
+def overloaded_response(error):
+    """Hızlı başarısızlık: 429 + Retry-After"""
+    log.warning("chat.overloaded", retry_after=error.retry_after)
+    return jsonify({"error": str(error), "retry_after": error.retry_after}), 429, {
+        "Retry-After": str(error.retry_after)
+    }
+
+def sse_event(event, payload):
+    """Tek bir Server-Sent Events çerçevesi üret"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """Streaming chat endpoint - Ollama NDJSON akışını SSE olarak iletir"""
+    data = request.get_json(silent=True)
+    user_message, options, error = parse_chat(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    log.info("chat.request", stream=True, chars=len(user_message), message=log.body(user_message))
+
+    session = sessions.get_or_create(data["session_id"]) if "session_id" in data else None
+    cacheable = session is None and is_cacheable(options, data.get("cache"))
+    hit = intent_reply(user_message) if session is None else None
+    if hit is None and cacheable:
+        hit = cached_response(user_message, options)
+
+    # Kabul kontrolü akış başlamadan yapılır ki reddedilen istek gerçek 429 alsın
+    flight = None
+    if hit is None:
+        try:
+            flight = start_generation(user_message, options, cacheable, session)
+        except Overloaded as e:
+            return overloaded_response(e)
+
+    def generate():
+        if hit is not None:
+            if "intent" not in hit:
+                log.info("chat.cache_hit", stream=True, similarity=hit.get("similarity"))
+            yield sse_event("token", {"token": hit.pop("response")})
+            yield sse_event("done", dict(hit, done=True))
+            return
+
+        try:
+            for token in flight.follow():
+                yield sse_event("token", {"token": token})
+            stats = flight.result["stats"]
+            if session is not None:
+                stats = dict(stats, session_id=session.id)
+            yield sse_event("done", stats)
+            ai_response = flight.result["response"]
+            log.info("chat.response", stream=True, chars=len(ai_response), response=log.body(ai_response))
+
+        except OllamaError as e:
+            log.error("chat.ollama_error", stream=True, error=str(e))
+            yield sse_event("error", {"error": str(e)})
+        except requests.exceptions.RequestException as e:
+            log.error("chat.connection_error", stream=True, error=str(e))
+            yield sse_event("error", {"error": f"Ollama bağlantı hatası: {str(e)}"})
+        except Exception as e:
+            log.error("chat.error", stream=True, error=str(e))
+            yield sse_event("error", {"error": f"Sunucu hatası: {str(e)}"})
+
+    body = stream_with_context(generate())
+    if flight is not None:
+        # Takip üretecin finally'sinde değil yanıtın close()'unda bırakılır: istemci koparsa sunucu
+        # yanıtı kapatır, üreteç hiç başlamamış olsa bile (finally çalışmazdı) üretim iptal edilir
+        body = ClosingIterator(body, detach_once(flight))
+    return Response(body, mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # Proxy'lerin akışı tamponlamasını engelle
+    })
+
+def parse_batch(data):
+    """/chat/batch gövdesinden [(mesaj, options)]; geçersizse (None, hata mesajı)"""
+    if not isinstance(data, dict):
+        return None, "İstek gövdesi bir JSON nesnesi olmalı"
+    prompts = data.get("prompts")
+    if not isinstance(prompts, list) or not prompts:
+        return None, "prompts boş olmayan bir liste olmalı"
+    if len(prompts) > BATCH_MAX_ITEMS:
+        return None, f"Bir batch'te en fazla {BATCH_MAX_ITEMS} prompt olabilir"
+
+    concurrency = data.get("concurrency")
+    if concurrency is not None and (not isinstance(concurrency, int) or isinstance(concurrency, bool)
+                                    or concurrency < 1):
+        return None, "concurrency pozitif bir tam sayı olmalı"
+    default_options = data.get("options") or {}
+    if not isinstance(default_options, dict):
+        return None, "options bir nesne olmalı"
+    items = []
+    for prompt in prompts:
+        # Öğe düz metin ya da kendi options'ı olan {"message": ..., "options": {...}} olabilir
+        if isinstance(prompt, str):
+            prompt = {"message": prompt}
+        if not isinstance(prompt, dict):
+            return None, 'Her prompt metin ya da {"message": ...} nesnesi olmalı'
+        options = prompt.get("options") or {}
+        if not isinstance(options, dict):
+            return None, "Prompt options'ı bir nesne olmalı"
+        items.append((prompt.get("message", ""), dict(default_options, **options)))
+    return items, None
+
+def batch_concurrency(data):
+    """İstenen eşzamanlılık (parse_batch doğruladı), BATCH_CONCURRENCY ile sınırlı"""
+    requested = data.get("concurrency") or BATCH_CONCURRENCY
+    return max(1, min(int(requested), BATCH_CONCURRENCY))
+
+def batch_summary(results, started):
+    failed = sum(1 for r in results if "error" in r)
+    return {
+        "count": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+    }
+
+def run_batch_item(index, user_message, options, cache_opt_in):
+    """Tek batch öğesi; hata öğenin sonucuna yazılır, batch'in kalanı sürer"""
+    started = time.monotonic()
+    item = {"index": index}
+    try:
+        if not user_message:
+            raise ValueError("Mesaj boş olamaz")
+        cacheable = is_cacheable(options, cache_opt_in)
+        hit = cached_response(user_message, options) if cacheable else None
+        if hit is not None:
+            item.update(hit)
+        else:
+            flight = start_generation(user_message, options, cacheable)
+            try:
+                result = flight.wait()
+            finally:
+                flight.detach()
+            item["response"] = result["response"]
+            item["stats"] = result["stats"]
+    except Overloaded as e:
+        item["error"] = str(e)
+        item["retry_after"] = e.retry_after
+    except Exception as e:
+        item["error"] = str(e)
+    item["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return item
+
+@app.route("/chat/batch", methods=["POST"])
+def chat_batch():
+    """Birden çok prompt'u sınırlı eşzamanlılıkla çalıştır; sıralı JSON ya da tamamlandıkça SSE"""
+    data = request.get_json(silent=True)
+    items, error = parse_batch(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    concurrency = batch_concurrency(data)
+    cache_opt_in = data.get("cache")
+    log.info("chat.batch", items=len(items), concurrency=concurrency)
+
+    # Aynı anda en fazla `concurrency` üretim; kalanlar executor kuyruğunda bekler
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=min(concurrency, len(items)))
+    futures = [executor.submit(run_batch_item, index, message, options, cache_opt_in)
+               for index, (message, options) in enumerate(items)]
+    executor.shutdown(wait=False)
+
+    if not data.get("stream"):
+        results = [future.result() for future in futures]
+        return jsonify(dict(batch_summary(results, started), results=results))
+
+    def generate():
+        results = []
+        try:
+            for future in as_completed(futures):
+                results.append(future.result())
+                yield sse_event("result", results[-1])
+            yield sse_event("done", batch_summary(results, started))
+        finally:
+            # İstemci koptuysa henüz başlamamış öğeleri çalıştırma
+            for future in futures:
+                future.cancel()
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
 @app.route("/", methods=["GET"])
 def home():
-    """Ana sayfa - Web arayüzü"""
-    return render_template_string(HTML_INTERFACE, model_name=MODEL_NAME)
+    """Ana sayfa - Web arayüzü (önceden çizilmiş ve sıkıştırılmış, koşullu isteklerde 304)"""
+    status, headers, body = HOME_PAGE.respond(request.headers.get("Accept-Encoding"),
+                                              request.headers.get("If-None-Match"))
+    return Response(body, status=status, headers=headers)
 
 @app.route("/api", methods=["GET"])
 def api_info():
@@ -207,9 +776,21 @@ def api_info():
         "message": "Ollama Chatbot API çalışıyor 🚀",
         "model": MODEL_NAME,
         "ollama_host": OLLAMA_API,
+        "ollama_hosts": OLLAMA_HOSTS,
         "endpoints": {
             "/": "Web arayüzü",
             "/chat": "POST - Chat endpoint",
+            "/chat/stream": "POST - Token token streaming chat (SSE)",
+            "/chat/batch": 'POST - Çoklu prompt (sıralı JSON ya da "stream": true ile SSE)',
+            "/cache/stats": "Yanıt önbelleği sayaçları",
+            "/intents/stats": "Hazır yanıt (niyet) hızlı yolu sayaçları",
+            "/log/stats": "Yapılandırılmış log kuyruğu ve düşürülen kayıt sayaçları",
+            "/flights/stats": "Birleştirilen eşzamanlı istek sayaçları",
+            "/backends": "Ollama backend'lerinin yük ve sağlık durumu",
+            "/admission/stats": "Kabul kontrolü ve bekleme kuyruğu sayaçları",
+            "/sessions": "Sohbet oturumu sayaçları",
+            "/sessions/<id>": "GET - Oturum geçmişi, DELETE - Oturumu sil",
+            "/metrics": "Prometheus metrikleri",
             "/health": "Sağlık kontrolü",
             "/models": "Mevcut modeller"
         }
@@ -217,58 +798,88 @@ def api_info():
 
 @app.route("/health", methods=["GET"])
 def health():
-    """Sağlık kontrolü"""
-    try:
-        # Ollama'nın çalışıp çalışmadığını kontrol et
-        test_response = requests.get(
-            OLLAMA_API.replace('/api/generate', '/api/tags'), 
-            timeout=5
-        )
-        
-        if test_response.status_code == 200:
-            return jsonify({
-                "status": "healthy", 
-                "ollama": "connected",
-                "model": MODEL_NAME
-            })
-        else:
-            return jsonify({
-                "status": "unhealthy", 
-                "ollama": "disconnected"
-            }), 503
-            
-    except Exception as e:
-        return jsonify({
-            "status": "unhealthy", 
-            "error": str(e)
-        }), 503
+    """Sağlık kontrolü - arka plan yoklamasının son sonucundan, Ollama'ya istek atmadan"""
+    report = poller.health()
+    report["model"] = MODEL_NAME
+    return jsonify(report), 200 if report["status"] == "healthy" else 503
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus metrikleri (istek sayıları, gecikmeler, TTFT, Ollama token/sn)"""
+    metrics.update_resource_gauges(backends, admission)
+    metrics.update_log_gauges(log)
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """Yanıt önbelleği isabet/ıska sayaçları"""
+    stats = response_cache.stats()
+    stats["near_duplicate"] = near_cache.stats()
+    return jsonify(stats)
+
+@app.route("/intents/stats", methods=["GET"])
+def intent_stats():
+    """Niyet hızlı yolu isabet sayaçları"""
+    return jsonify(intent_responder.stats())
+
+@app.route("/log/stats", methods=["GET"])
+def log_stats():
+    """Log kuyruğu doluluğu, yazılan/düşürülen kayıtlar"""
+    return jsonify(log.stats())
+
+@app.route("/flights/stats", methods=["GET"])
+def flight_stats():
+    """Single-flight birleştirme sayaçları"""
+    return jsonify(flights.stats())
+
+@app.route("/backends", methods=["GET"])
+def backend_stats():
+    """Backend başına bekleyen istek, gecikme ve hata durumu"""
+    return jsonify(backends.stats())
+
+@app.route("/admission/stats", methods=["GET"])
+def admission_stats():
+    """Kabul edilen, kuyruğa alınan ve reddedilen istek sayaçları"""
+    return jsonify(admission.stats())
+
+@app.route("/sessions", methods=["GET"])
+def session_stats():
+    """Aktif oturum sayısı, bellek kullanımı ve geçmiş sıkıştırma sayaçları"""
+    return jsonify(dict(sessions.stats(), history=history.stats()))
+
+@app.route("/sessions/<session_id>", methods=["GET", "DELETE"])
+def session_detail(session_id):
+    """Oturum geçmişini göster ya da oturumu sil"""
+    if request.method == "DELETE":
+        if sessions.delete(session_id):
+            return jsonify({"deleted": session_id})
+        return jsonify({"error": "Oturum bulunamadı"}), 404
+
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Oturum bulunamadı"}), 404
+    return jsonify(session.snapshot())
 
 @app.route("/models", methods=["GET"])
 def models():
-    """Mevcut modelleri listele"""
-    try:
-        response = requests.get(
-            OLLAMA_API.replace('/api/generate', '/api/tags'), 
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return jsonify({"error": "Modeller listelenemedi"}), 500
-            
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    """Mevcut modelleri listele (arka planda yenilenen liste)"""
+    models = poller.models()
+    if models is None:
+        return jsonify({"error": "Modeller henüz alınamadı", "last_error": poller.health()["last_error"]}), 503
+    return jsonify(models)
 
 if __name__ == "__main__":
     print("🚀 Ollama Chatbot başlatılıyor...")
-    print(f"📡 Ollama Host: {OLLAMA_API}")
+    print(f"📡 Ollama Host: {', '.join(OLLAMA_HOSTS)}")
     print(f"🤖 Model: {MODEL_NAME}")
     print(f"🌐 Web arayüzü: http://localhost:5000")
     print(f"📋 API: http://localhost:5000/api")
     
     # Debug mode sadece geliştirme için
     debug_mode = os.getenv('FLASK_ENV', 'production') == 'development'
+
+    # Model ısıtmasını ilk isteği beklemeden başlat
+    poller.start()
     
     app.run(
         host="0.0.0.0", 
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import requests
+
+from ollama_client import OllamaError
+from structured_log import log
+
+# Backend havuzu konfigürasyonu
+BACKEND_MAX_FAILURES = int(os.getenv('BACKEND_MAX_FAILURES', 2))
+BACKEND_COOLDOWN = float(os.getenv('BACKEND_COOLDOWN', 30))
+LATENCY_EWMA_ALPHA = 0.3
+
+# Backend'i hatalı sayan taşıma hataları (bağlantı, zaman aşımı, yarıda kopan akış)
+_TRANSPORT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                     requests.exceptions.ChunkedEncodingError)
+try:
+    import httpx
+    _TRANSPORT_ERRORS += (httpx.TransportError,)
+except ImportError:
+    pass
+
+
+class NoBackendAvailable(OllamaError):
+    """Rotasyonda sağlıklı Ollama backend'i kalmadı"""
+
+
+def is_backend_failure(error):
+    """Hata backend'in mi? Bağlantı/zaman aşımı, 5xx ve akış içi Ollama hataları evet;
+    4xx (geçersiz istek, bilinmeyen model), iptal ve bizim hatalarımız hayır"""
+    if isinstance(error, OllamaError):
+        return error.status is None or error.status >= 500
+    return isinstance(error, _TRANSPORT_ERRORS)
+
+
+class Backend:
+    """Tek bir Ollama sunucusu ve yük/sağlık durumu"""
+
+    def __init__(self, host, client):
+        self.host = host
+        self.client = client
+        self.in_flight = 0
+        self.latency = None          # İlk token süresinin EWMA'sı (sn)
+        self.failures = 0            # Art arda hata sayısı
+        self.down_until = 0.0        # Bu zamana kadar rotasyon dışı
+        self.ready = True            # Model bellekte mi (HealthPoller ısıtırken False)
+        self.requests = 0
+        self.errors = 0
+
+    def healthy(self, now=None):
+        return (now or time.monotonic()) >= self.down_until
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            "host": self.host,
+            "healthy": self.healthy(now),
+            "ready": self.ready,
+            "in_flight": self.in_flight,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "failures": self.failures,
+            "requests": self.requests,
+            "errors": self.errors,
+            "retry_in": round(self.down_until - now, 1) if not self.healthy(now) else 0
+        }
+
+
+class BackendPool:
+    """Least-outstanding-requests yönlendirmeli Ollama backend havuzu"""
+
+    def __init__(self, hosts, client_factory, max_failures=BACKEND_MAX_FAILURES,
+                 cooldown=BACKEND_COOLDOWN, max_in_flight=None):
+        if not hosts:
+            raise ValueError("En az bir Ollama backend'i gerekli")
+        self.backends = [Backend(host, client_factory(host=host)) for host in hosts]
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.max_in_flight = max_in_flight   # Backend başına üretim sınırı (None = sınırsız)
+        self._lock = threading.Lock()
+
+    def pick(self, exclude=(), prefer=None):
+        """En az bekleyen isteği olan sağlıklı backend'i seç (sayaçlara dokunmaz)"""
+        now = time.monotonic()
+        pool = [b for b in self.backends if b not in exclude]
+        if not pool:
+            raise NoBackendAvailable("Denenecek Ollama backend'i kalmadı")
+        candidates = [b for b in pool if b.healthy(now)]
+        if not candidates:
+            # Hepsi düşmüşse en erken geri dönecek olanı dene
+            candidates = [min(pool, key=lambda b: b.down_until)]
+        # Sınırı dolmuş backend'e (oturum tercihi olsa da) boş slotu olan varken istek gönderme
+        if self.max_in_flight:
+            candidates = [b for b in candidates if b.in_flight < self.max_in_flight] or candidates
+        # Model yüklü backend varsa istekleri soğuk (model yükleyen) backend'lere gönderme
+        candidates = [b for b in candidates if b.ready] or candidates
+        best = min(candidates, key=lambda b: (
+            b.in_flight,
+            b.latency if b.latency is not None else 0.0
+        ))
+        # Oturumun KV cache'i sıcak olan backend'i, yük farkı küçükse tercih et
+        if prefer in candidates and prefer.in_flight <= best.in_flight + 1:
+            return prefer
+        return best
+
+    def healthy_count(self):
+        now = time.monotonic()
+        return sum(1 for b in self.backends if b.healthy(now))
+
+    def acquire(self, exclude=(), prefer=None):
+        with self._lock:
+            backend = self.pick(exclude, prefer)
+            backend.in_flight += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend, failed=False):
+        went_down = False
+        with self._lock:
+            backend.in_flight -= 1
+            if failed:
+                went_down = self._mark_failure(backend)
+            else:
+                backend.failures = 0
+        if went_down:
+            self._report_down(backend)
+
+    def _mark_failure(self, backend):
+        """Hata sayacını artır (kilit altında); backend bu hatayla rotasyondan çıktıysa True"""
+        backend.errors += 1
+        backend.failures += 1
+        if backend.failures < self.max_failures:
+            return False
+        was_healthy = backend.healthy()
+        backend.down_until = time.monotonic() + self.cooldown
+        return was_healthy
+
+    def _report_down(self, backend):
+        # Kilit dışında: yönlendirme kararları log kuyruğunu beklemez
+        log.warning("backend.down", host=backend.host, cooldown=self.cooldown)
+
+    def mark_up(self, backend):
+        """Başarılı sağlık kontrolü; soğumadaki backend'i erken geri almaz.
+        /api/tags'e yanıt verip üretimde hata veren backend soğuma bitmeden dönmesin; hata
+        serisini de sadece başarılı bir üretim sıfırlar (release)"""
+        with self._lock:
+            if backend.healthy():
+                backend.down_until = 0.0
+
+    def mark_down(self, backend):
+        with self._lock:
+            went_down = self._mark_failure(backend)
+        if went_down:
+            self._report_down(backend)
+
+    def record_latency(self, backend, seconds):
+        with self._lock:
+            if backend.latency is None:
+                backend.latency = seconds
+            else:
+                backend.latency += LATENCY_EWMA_ALPHA * (seconds - backend.latency)
+
+    @contextmanager
+    def lease(self, exclude=(), prefer=None):
+        """`with pool.lease() as backend:` - istek süresince in-flight sayılır"""
+        backend = self.acquire(exclude, prefer)
+        failed = False
+        try:
+            yield backend
+        except BaseException as e:
+            # Sadece backend kaynaklı hatalar sayılır; 4xx ya da iptal (GenerationCancelled,
+            # CancelledError) sağlıklı bir backend'i rotasyondan çıkarmamalı
+            failed = is_backend_failure(e)
+            raise
+        finally:
+            self.release(backend, failed)
+
+    @asynccontextmanager
+    async def alease(self, exclude=(), prefer=None):
+        """lease'in async karşılığı"""
+        backend = self.acquire(exclude, prefer)
+        failed = False
+        try:
+            yield backend
+        except BaseException as e:
+            failed = is_backend_failure(e)
+            raise
+        finally:
+            self.release(backend, failed)
+
+    def stats(self):
+        with self._lock:
+            return [b.snapshot() for b in self.backends]
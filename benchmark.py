@@ -0,0 +1,331 @@
+# Proxy yük testi: sahte Ollama'ya (fake_ollama.py) bağlı app_minimal.py'yi
+# artan eşzamanlılıkla /chat/stream üzerinden çalıştırır; throughput,
+# p50/p95/p99 gecikme ve ilk token süresini (TTFT) JSON rapor olarak yazar.
+# GPU ve ağ gerekmez; raporlar commit'ler arasında karşılaştırılabilir.
+#
+#   python benchmark.py --levels 1,4,16 --output bench.json
+#   python benchmark.py --baseline bench.json      # gerilemede çıkış kodu 1
+#   python benchmark.py --replay traffic.jsonl --speed 4 --output replay.json
+#
+# --replay: TRAFFIC_RECORD_PATH ile kaydedilmiş gerçek trafik, kayıttaki
+# varış aralıkları ve token hızlarıyla (--speed kat sıkıştırılarak) oynatılır.
+# Replay'de single-flight ve yanıt önbelleği kapatılır: her kayıt backend'de ayrı üretimdir.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+from colab_launcher import http_ok, wait_until
+from fake_ollama import FakeOllamaConfig, ReplayConfig, start_fake_ollama
+from traffic_record import load_recordings
+
+# Proxy dosyaları ve git bilgisi benchmark'ın çalıştırıldığı dizinden değil depo kökünden alınır
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APPS = {
+    "minimal": lambda port: [sys.executable, os.path.join(ROOT, "app_minimal.py")],
+    "async": lambda port: [sys.executable, "-m", "uvicorn", "app_async:app", "--port", str(port), "--log-level", "warning"]
+}
+
+# Replay'de anonimleştirme aynı biçimli prompt'ları aynı metne çevirir; bunlar birleştirilir ya da
+# önbellekten dönerse backend kayıttakinden az yük görür. Her kayıt gerçek bir üretim olmalı.
+REPLAY_ENV = {"SINGLE_FLIGHT": "0", "CACHE_MAX_ENTRIES": "0"}
+
+# Karşılaştırmada "yüksek daha iyi" olan metrikler; geri kalanlar süredir
+HIGHER_IS_BETTER = ("throughput_rps", "tokens_per_second")
+COMPARED = ("throughput_rps", "latency_p50", "latency_p95", "latency_p99", "ttft_p50", "ttft_p95")
+
+
+def percentile(values, pct):
+    """Doğrusal enterpolasyonlu yüzdelik; boş listede None"""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=ROOT).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, cwd=ROOT).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def stream_chat(http, base_url, message, timeout, options=None):
+    """Tek /chat/stream isteği; durum, gecikme, TTFT ve token sayısını döndürür"""
+    started = time.perf_counter()
+    result = {"status": None, "latency": None, "ttft": None, "tokens": 0, "error": None}
+    body = {"message": message, "cache": False}
+    if options:
+        body["options"] = options
+    try:
+        with http.post(base_url + "/chat/stream", json=body, stream=True, timeout=timeout) as response:
+            result["status"] = response.status_code
+            if response.status_code != 200:
+                result["error"] = f"HTTP {response.status_code}"
+                return result
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    if event == "token":
+                        if result["ttft"] is None:
+                            result["ttft"] = time.perf_counter() - started
+                        result["tokens"] += 1
+                    elif event == "error":
+                        result["error"] = json.loads(line[6:]).get("error")
+    except requests.exceptions.RequestException as e:
+        result["error"] = str(e)
+    result["latency"] = time.perf_counter() - started
+    return result
+
+
+def run_level(base_url, concurrency, total, timeout):
+    """Kapalı döngü: `concurrency` istemci toplam `total` istek gönderir"""
+    sessions = {}
+
+    def worker(index):
+        # Her thread kendi keep-alive bağlantısını kullanır
+        http = sessions.setdefault(threading.get_ident(), requests.Session())
+        return stream_chat(http, base_url, f"benchmark {uuid.uuid4().hex} soru {index}", timeout)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, range(total)))
+    elapsed = time.perf_counter() - started
+    for http in sessions.values():
+        http.close()
+    return summarize(results, elapsed, concurrency=concurrency)
+
+
+def run_replay(base_url, recordings, speed, timeout, workers):
+    """Açık döngü: istekler kayıttaki varış zamanlarında (speed kat sıkıştırılmış) gönderilir"""
+    sessions = {}
+
+    def worker(recording):
+        http = sessions.setdefault(threading.get_ident(), requests.Session())
+        return stream_chat(http, base_url, recording["prompt"], timeout, recording.get("options"))
+
+    origin = recordings[0]["at"]
+    futures = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for recording in recordings:
+            delay = (recording["at"] - origin) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(worker, recording))
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+    for http in sessions.values():
+        http.close()
+
+    # Kayıt anındaki (gerçek Ollama arkasında) değerler referans olarak rapora eklenir
+    recorded_ttft = [r["ttft"] / 1000 for r in recordings if r.get("ttft") is not None]
+    recorded_elapsed = [r["elapsed"] / 1000 for r in recordings if "error" not in r]
+    level = summarize(results, elapsed, concurrency="replay", speed=speed)
+    level.update(
+        recorded_latency_p50=ms(percentile(recorded_elapsed, 50)),
+        recorded_latency_p95=ms(percentile(recorded_elapsed, 95)),
+        recorded_ttft_p50=ms(percentile(recorded_ttft, 50)),
+        recorded_ttft_p95=ms(percentile(recorded_ttft, 95)))
+    return level
+
+
+def ms(value):
+    return round(value * 1000, 2) if value is not None else None
+
+
+def summarize(results, elapsed, **fields):
+    """İstek sonuçlarından rapor satırı"""
+    ok = [r for r in results if r["error"] is None]
+    latencies = [r["latency"] for r in ok]
+    ttfts = [r["ttft"] for r in ok if r["ttft"] is not None]
+    return dict(fields, **{
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": sum(1 for r in results if r["error"] is not None and r["status"] != 429),
+        "rejected_429": sum(1 for r in results if r["status"] == 429),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3),
+        "tokens_per_second": round(sum(r["tokens"] for r in ok) / elapsed, 1),
+        "latency_p50": ms(percentile(latencies, 50)),
+        "latency_p95": ms(percentile(latencies, 95)),
+        "latency_p99": ms(percentile(latencies, 99)),
+        "ttft_p50": ms(percentile(ttfts, 50)),
+        "ttft_p95": ms(percentile(ttfts, 95)),
+        "ttft_p99": ms(percentile(ttfts, 99)),
+        "sample_errors": sorted({r["error"] for r in results if r["error"]})[:5]
+    })
+
+
+def start_app(kind, port, ollama_url, extra_env, log_path):
+    """Proxy'yi alt süreç olarak başlat ve /health 200 dönene kadar bekle"""
+    env = dict(os.environ,
+               OLLAMA_HOSTS=ollama_url,
+               PORT=str(port),
+               HEALTH_POLL_INTERVAL="0.5",
+               NEAR_DUP_THRESHOLD="0",   # Benzersiz ama birbirine benzeyen prompt'lar önbelleğe düşmesin
+               CACHE_DB_PATH="",
+               FLASK_ENV="production")
+    env.update(extra_env)
+    log = open(log_path, "w")
+    process = subprocess.Popen(APPS[kind](port), env=env, stdout=log, stderr=subprocess.STDOUT, cwd=ROOT)
+    try:
+        wait_until(lambda: http_ok(f"http://127.0.0.1:{port}/health"), "Proxy", timeout=30, process=process)
+    except Exception:
+        process.terminate()
+        raise
+    return process
+
+
+def compare(report, baseline, tolerance):
+    """Aynı eşzamanlılık seviyelerini karşılaştır; toleransı aşan gerilemeleri döndür"""
+    previous = {level["concurrency"]: level for level in baseline["levels"]}
+    regressions = []
+    print(f"\n📐 Baseline: {baseline['meta'].get('commit') or '?'} ({baseline['meta'].get('timestamp')})")
+    for level in report["levels"]:
+        old = previous.get(level["concurrency"])
+        if old is None:
+            continue
+        cells = []
+        for key in COMPARED:
+            if not old.get(key) or level.get(key) is None:
+                continue
+            change = (level[key] - old[key]) / old[key]
+            worse = -change if key in HIGHER_IS_BETTER else change
+            mark = " ❌" if worse > tolerance else ""
+            if mark:
+                regressions.append(f"c={level['concurrency']} {key}: {old[key]} -> {level[key]} ({change:+.1%})")
+            cells.append(f"{key} {change:+.1%}{mark}")
+        print(f"   c={level['concurrency']:<4} " + " | ".join(cells))
+    return regressions
+
+
+def print_level(level):
+    print(f"   c={level['concurrency']:<4} {level['throughput_rps']:8.2f} istek/sn | "
+          f"gecikme p50/p95/p99: {level['latency_p50']}/{level['latency_p95']}/{level['latency_p99']} ms | "
+          f"TTFT p50/p95: {level['ttft_p50']}/{level['ttft_p95']} ms | "
+          f"hata: {level['errors']} | 429: {level['rejected_429']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sahte Ollama ile proxy yük testi")
+    parser.add_argument("--app", choices=sorted(APPS), default="minimal", help="minimal: Flask, async: uvicorn + app_async")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="Virgülle ayrılmış eşzamanlılık seviyeleri")
+    parser.add_argument("--requests", type=int, default=0, help="Seviye başına istek (0 = max(20, 4 x eşzamanlılık))")
+    parser.add_argument("--warmup", type=int, default=4, help="Ölçüm öncesi ısınma isteği")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--prompt-eval-delay", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--tokens", type=int, default=32)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--replay", help="Sentetik seviyeler yerine kaydedilmiş trafiği oynat (.jsonl / .jsonl.gz)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay hız çarpanı (varış aralıkları ve token hızı)")
+    parser.add_argument("--replay-workers", type=int, default=64, help="Replay'de aynı anda açık en fazla istek")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Proxy'ye ek ortam değişkeni")
+    parser.add_argument("--output", help="JSON rapor dosyası")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki JSON rapor")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Gerileme sayılan en küçük oran (0.10 = %%10)")
+    parser.add_argument("--app-log", default="benchmark_app.log")
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.levels.split(",") if c.strip()]
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    if args.replay:
+        recordings = load_recordings(args.replay)
+        if not recordings:
+            parser.error(f"{args.replay} içinde kayıt yok")
+        config = ReplayConfig(recordings, args.speed)
+        extra_env = dict(REPLAY_ENV, **extra_env)   # --env ile yine ezilebilir
+        fake_settings = {"replay": args.replay, "recordings": len(recordings), "speed": args.speed}
+    else:
+        config = FakeOllamaConfig(args.prompt_eval_delay, args.token_delay, args.tokens, args.error_rate, args.seed)
+        fake_settings = {
+            "prompt_eval_delay": args.prompt_eval_delay,
+            "token_delay": args.token_delay,
+            "tokens": args.tokens,
+            "error_rate": args.error_rate
+        }
+    fake, ollama_url = start_fake_ollama(config=config)
+    print(f"🧪 Sahte Ollama: {ollama_url}")
+
+    process = start_app(args.app, args.port, ollama_url, extra_env, args.app_log)
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"🚀 Proxy hazır: {base_url} ({args.app})")
+
+    report_levels = []
+    try:
+        with requests.Session() as http:
+            for i in range(args.warmup):
+                stream_chat(http, base_url, f"ısınma {uuid.uuid4().hex} {i}", args.timeout)
+        print("📊 Sonuçlar")
+        if args.replay:
+            level = run_replay(base_url, recordings, args.speed, args.timeout, args.replay_workers)
+            report_levels.append(level)
+            print_level(level)
+            print(f"   kayıttaki gecikme p50/p95: {level['recorded_latency_p50']}/{level['recorded_latency_p95']} ms | "
+                  f"TTFT p50/p95: {level['recorded_ttft_p50']}/{level['recorded_ttft_p95']} ms")
+        else:
+            for concurrency in levels:
+                total = args.requests or max(20, 4 * concurrency)
+                level = run_level(base_url, concurrency, total, args.timeout)
+                report_levels.append(level)
+                print_level(level)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        fake.shutdown()
+
+    commit, dirty = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "app": args.app,
+            "fake_ollama": fake_settings,
+            "env": extra_env
+        },
+        "levels": report_levels
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Rapor: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} gerileme (tolerans %{args.tolerance * 100:g}):")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ Gerileme yok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
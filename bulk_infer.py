@@ -0,0 +1,235 @@
+# Toplu (offline) çıkarım: JSONL prompt dosyasını Ollama'dan geçirip sonuçları
+# JSONL olarak yazar. HTTP /chat katmanı yok; app_minimal ile aynı istemci ve
+# backend havuzu kullanılır.
+#
+#   python bulk_infer.py prompts.jsonl results.jsonl --concurrency 8
+#
+# Girdi satırı: "metin" ya da {"id": ..., "prompt": "...", "options": {...}}
+# Çıktı satır sırası girdiyle aynıdır; bu yüzden çıktı dosyası aynı zamanda
+# checkpoint'tir: yarıda kalan çalıştırma, yazılmış satır sayısı kadar girdiyi
+# atlayarak devam eder.
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from backend_pool import BackendPool, is_backend_failure
+from ollama_client import OLLAMA_HOSTS, OllamaClient, OllamaError
+
+MODEL_NAME = os.getenv('MODEL_NAME', 'llama3')
+MODEL_KEEP_ALIVE = os.getenv('MODEL_KEEP_ALIVE', '24h')
+PROGRESS_INTERVAL = 5   # sn
+FSYNC_INTERVAL = 2      # sn; çökmede en fazla bu kadarlık iş tekrar edilir
+
+
+def read_records(path, skip=0):
+    """Boş olmayan girdi satırlarını (satır no, ham metin) olarak akıt; ilk `skip` kaydı atla"""
+    with open(path, encoding='utf-8') as f:
+        number = 0
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            number += 1
+            if number > skip:
+                yield number, line
+
+
+def count_records(path):
+    with open(path, encoding='utf-8') as f:
+        return sum(1 for line in f if line.strip())
+
+
+def resume_point(path):
+    """Çıktıdaki tamamlanmış satır sayısı; yarım yazılmış son satır kesilip atılır"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb+') as f:
+        data_end = f.seek(0, os.SEEK_END)
+        if data_end == 0:
+            return 0
+        # Son satır '\n' ile bitmiyorsa çökme anında yarım kalmıştır; sondan geriye tarayıp kes
+        end = data_end
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            last_newline = f.read(end - start).rfind(b'\n')
+            if last_newline != -1:
+                end = start + last_newline + 1
+                break
+            end = start
+        if end != data_end:
+            f.truncate(end)
+        f.seek(0)
+        return sum(1 for _ in f)
+
+
+def parse_record(raw, default_options):
+    """Girdi satırından (id, prompt, options)"""
+    record = json.loads(raw)
+    if isinstance(record, str):
+        return None, record, default_options
+    prompt = record.get("prompt") or record.get("message") or ""
+    return record.get("id"), prompt, dict(default_options, **(record.get("options") or {}))
+
+
+class BulkRunner:
+    """Kayıtları sınırlı eşzamanlılıkla çalıştırıp girdi sırasıyla yazar"""
+
+    def __init__(self, pool, model=MODEL_NAME, options=None, retries=2):
+        self.pool = pool
+        self.model = model
+        self.options = options or {}
+        self.retries = retries
+
+    def generate(self, prompt, options):
+        """Tek üretim; bağlantı hatası ya da 5xx'te başka backend'le, artan beklemeyle tekrar dener"""
+        tried = []
+        for attempt in range(self.retries + 1):
+            exclude = tried if len(tried) < len(self.pool.backends) else ()
+            try:
+                with self.pool.lease(exclude=exclude) as backend:
+                    tried.append(backend)
+                    response = backend.client.generate({
+                        "model": self.model,
+                        "prompt": prompt,
+                        "stream": False,
+                        "options": options,
+                        "keep_alive": MODEL_KEEP_ALIVE
+                    })
+                    if response.status_code != 200:
+                        raise OllamaError(f"Ollama API hatası: {response.status_code}", response.status_code)
+                    return response.json()
+            except (requests.exceptions.RequestException, OllamaError) as e:
+                # 4xx isteğin kendisinden (model yok, geçersiz options...): tekrar denenmez,
+                # lease backend'i hatalı saymaz, hata sadece bu satırın sonucuna yazılır
+                if not is_backend_failure(e) or attempt == self.retries:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def run_one(self, number, raw):
+        started = time.monotonic()
+        result = {"line": number}
+        try:
+            record_id, prompt, options = parse_record(raw, self.options)
+            if record_id is not None:
+                result["id"] = record_id
+            if not prompt:
+                raise ValueError("Boş prompt")
+            data = self.generate(prompt, options)
+            result["response"] = data.get("response", "")
+            result["eval_count"] = data.get("eval_count")
+        except Exception as e:
+            result["error"] = str(e)
+        result["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+        return result
+
+    def run(self, input_path, output_path, concurrency):
+        done = resume_point(output_path)
+        total = count_records(input_path)
+        if done:
+            print(f"↩️ Devam ediliyor: {done}/{total} kayıt zaten tamamlanmış")
+        if done >= total:
+            print("✅ Yapılacak kayıt yok")
+            return
+
+        # Sırayı korumak için en fazla `window` sonuç bellekte bekler (girdi boyutundan bağımsız)
+        window = concurrency * 2
+        pending = deque()
+        records = read_records(input_path, skip=done)
+        progress = Progress(total, done)
+        failed = 0
+        last_sync = time.monotonic()
+
+        with open(output_path, 'a', encoding='utf-8') as out, \
+                ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                while True:
+                    while len(pending) < window:
+                        record = next(records, None)
+                        if record is None:
+                            break
+                        pending.append(executor.submit(self.run_one, *record))
+                    if not pending:
+                        break
+
+                    result = pending.popleft().result()
+                    out.write(json.dumps(result, ensure_ascii=False) + '\n')
+                    out.flush()
+                    failed += "error" in result
+                    if time.monotonic() - last_sync >= FSYNC_INTERVAL:
+                        os.fsync(out.fileno())
+                        last_sync = time.monotonic()
+                    progress.advance(failed)
+            except KeyboardInterrupt:
+                for future in pending:
+                    future.cancel()
+                os.fsync(out.fileno())
+                print(f"\n⏸️ Durduruldu; tekrar çalıştırınca {progress.done + 1}. kayıttan devam eder")
+                raise SystemExit(130)
+
+        progress.finish(failed)
+
+
+class Progress:
+    """Belirli aralıklarla tamamlanan kayıt, hız ve tahmini kalan süre basar"""
+
+    def __init__(self, total, done):
+        self.total = total
+        self.done = done
+        self.start_done = done
+        self.started = time.monotonic()
+        self.last_print = self.started
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return (self.done - self.start_done) / elapsed if elapsed > 0 else 0.0
+
+    def advance(self, failed):
+        self.done += 1
+        now = time.monotonic()
+        if now - self.last_print >= PROGRESS_INTERVAL:
+            self.last_print = now
+            rate = self.rate()
+            eta = (self.total - self.done) / rate if rate > 0 else 0
+            print(f"📊 {self.done}/{self.total} ({self.done / self.total:.1%}) | "
+                  f"{rate:.2f} kayıt/sn | hata: {failed} | ETA: {format_duration(eta)}")
+
+    def finish(self, failed):
+        elapsed = time.monotonic() - self.started
+        print(f"✅ Bitti: {self.done - self.start_done} kayıt {format_duration(elapsed)} içinde "
+              f"({self.rate():.2f} kayıt/sn, hata: {failed})")
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSONL prompt dosyasını Ollama ile toplu çalıştır")
+    parser.add_argument("input", help="Girdi JSONL (satır başına bir prompt)")
+    parser.add_argument("output", help="Çıktı JSONL; varsa kaldığı yerden devam edilir")
+    parser.add_argument("--concurrency", type=int, default=4, help="Aynı anda çalışan üretim sayısı")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--options", type=json.loads, default={}, help='Ollama options, ör. \'{"temperature": 0}\'')
+    parser.add_argument("--retries", type=int, default=2, help="Bağlantı hatası ya da 5xx'te tekrar deneme sayısı")
+    args = parser.parse_args(argv)
+
+    print(f"🚀 Toplu çıkarım: {args.input} -> {args.output}")
+    print(f"📡 Ollama Host: {', '.join(OLLAMA_HOSTS)} | 🤖 Model: {args.model} | eşzamanlılık: {args.concurrency}")
+
+    pool = BackendPool(OLLAMA_HOSTS, lambda host: OllamaClient(host=host, pool_size=args.concurrency))
+    runner = BulkRunner(pool, model=args.model, options=args.options, retries=args.retries)
+    runner.run(args.input, args.output, max(1, args.concurrency))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
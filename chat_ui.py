@@ -0,0 +1,109 @@
+# Ana sayfa ile Colab arayüzünün paylaştığı istemci tarafı parçalar.
+# Jinja şablonlarına {{ chat_log_js | safe }} olarak gömülür.
+
+CHAT_LOG_JS = '''// Sohbet günlüğü: mesajlar DOM düğümü olarak eklenir (innerHTML += tüm
+        // geçmişi yeniden ayrıştırır). DOM'da en fazla MAX_RENDERED mesaj kalır,
+        // eskiler yukarı kaydırınca sayfa sayfa geri gelir; akan token'lar
+        // her animasyon karesinde tek seferde yazılır.
+        const chatLog = {
+            MAX_RENDERED: 60,
+            PAGE: 20,
+            area: null,
+            messages: [],      // { role, text, pending, node, textNode }
+            first: 0,          // DOM'daki ilk mesajın indeksi
+            dirty: new Set(),
+            frame: 0,
+
+            init(area) {
+                this.area = area;
+                // Sunucunun çizdiği karşılama mesajı
+                for (const node of area.querySelectorAll('.message')) {
+                    this.messages.push({ role: node.className.replace('message', '').trim(), text: node.textContent.trim(),
+                                         pending: '', node: node, textNode: null });
+                }
+                area.addEventListener('scroll', () => {
+                    if (this.first > 0 && area.scrollTop < 40) this.loadOlder();
+                }, { passive: true });
+            },
+
+            atBottom() {
+                return this.area.scrollHeight - this.area.scrollTop - this.area.clientHeight < 60;
+            },
+
+            render(message) {
+                const node = document.createElement('div');
+                node.className = 'message ' + message.role;
+                message.textNode = document.createTextNode(message.text);
+                node.appendChild(message.textNode);
+                message.node = node;
+                return node;
+            },
+
+            add(role, text) {
+                const follow = this.atBottom();
+                const message = { role: role, text: text || '', pending: '', node: null, textNode: null };
+                this.messages.push(message);
+                this.area.appendChild(this.render(message));
+                if (follow) {
+                    this.trim();
+                    this.scrollToBottom();
+                }
+                return message;
+            },
+
+            appendToken(message, token) {
+                message.pending += token;
+                this.dirty.add(message);
+                if (!this.frame) this.frame = requestAnimationFrame(() => this.flush());
+            },
+
+            flush() {
+                this.frame = 0;
+                const follow = this.atBottom();
+                for (const message of this.dirty) {
+                    message.text += message.pending;
+                    // Sadece yeni parça eklenir; balonun tamamı yeniden yazılmaz
+                    if (message.textNode) message.textNode.appendData(message.pending);
+                    message.pending = '';
+                }
+                this.dirty.clear();
+                if (follow) this.scrollToBottom();
+            },
+
+            update(message, text, role) {
+                this.flush();
+                message.text = text;
+                if (role) message.role = role;
+                if (message.node) {
+                    message.node.className = 'message ' + message.role;
+                    message.node.textContent = text;
+                    message.textNode = message.node.firstChild;
+                }
+                if (this.atBottom()) this.scrollToBottom();
+            },
+
+            trim() {
+                // Alttayken en eski düğümleri DOM'dan çıkar; veriler messages'ta kalır
+                const excess = this.messages.length - this.first - this.MAX_RENDERED;
+                for (let i = 0; i < excess; i++) {
+                    const message = this.messages[this.first++];
+                    message.node.remove();
+                    message.node = message.textNode = null;
+                }
+            },
+
+            loadOlder() {
+                const start = Math.max(0, this.first - this.PAGE);
+                const fragment = document.createDocumentFragment();
+                for (let i = start; i < this.first; i++) fragment.appendChild(this.render(this.messages[i]));
+                const before = this.area.scrollHeight;
+                this.area.insertBefore(fragment, this.area.firstChild);
+                // Okunan içerik yerinden kaymasın
+                this.area.scrollTop += this.area.scrollHeight - before;
+                this.first = start;
+            },
+
+            scrollToBottom() {
+                this.area.scrollTop = this.area.scrollHeight;
+            }
+        };'''
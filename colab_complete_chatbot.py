@@ -1,5 +1,6 @@
 # 🤖 Ollama Chatbot - Google Colab Edition
 # Bu hücreyi çalıştırarak gerçek AI chatbot'unuzu başlatın!
+# Önce SUPPORT_FILES'taki dosyaları Files panelinden notebook'la aynı klasöre (/content) yükleyin.
 
 print("🚀 Ollama Chatbot kurulumu başlıyor...")
 
@@ -11,21 +12,34 @@ print("🚀 Ollama Chatbot kurulumu başlıyor...")
 
 # 3. Python kodlarını hazırla
 import os
-import threading
 import time
-import subprocess
 import json
 from pyngrok import ngrok
 
+SUPPORT_FILES = ["colab_launcher.py", "colab_shared.py", "sessions.py", "compression.py", "chat_ui.py"]
+missing = [name for name in SUPPORT_FILES if not os.path.exists(name)]
+if missing:
+    raise SystemExit(f"❌ {', '.join(missing)} bulunamadı: dosyaları Colab'ın Files panelinden bu notebook'la "
+                     "aynı klasöre (/content) yükleyip hücreyi yeniden çalıştırın")
+from colab_launcher import launch
+
 # Flask uygulaması kodunu oluştur
 flask_app_code = '''
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, request, jsonify, Response
 import requests
 import json
 
+from chat_ui import CHAT_LOG_JS
+from colab_shared import ChatHistories
+from compression import PrecompressedPage
+
 app = Flask(__name__)
 
 OLLAMA_API = "http://localhost:11434/api/generate"
+MODEL_NAME = "llama3.2:1b"
+
+# Oturum geçmişi: prompt token bütçesinde tutulur, eski turlar arka planda özetlenir (colab_shared.py)
+histories = ChatHistories(OLLAMA_API, MODEL_NAME)
 
 # Modern HTML arayüzü
 HTML_TEMPLATE = """
@@ -162,21 +176,24 @@ HTML_TEMPLATE = """
     </div>
 
     <script>
+        let sessionId = null;  // Sunucu tarafı sohbet geçmişi
+        
+        {{ chat_log_js | safe }}
+        
         async function sendMessage() {
             const input = document.getElementById('messageInput');
-            const chatArea = document.getElementById('chatArea');
             const sendButton = document.getElementById('sendButton');
             const message = input.value.trim();
             
             if (!message) return;
             
             // Kullanıcı mesajını ekle
-            chatArea.innerHTML += `<div class="message user">${message}</div>`;
+            chatLog.add('user', message);
+            chatLog.scrollToBottom();
             input.value = '';
             
-            // Loading mesajı ekle
-            chatArea.innerHTML += `<div class="message bot loading" id="loadingMsg">🤔 AI düşünüyor...</div>`;
-            chatArea.scrollTop = chatArea.scrollHeight;
+            // Loading mesajı ekle; yanıt gelince aynı balon güncellenir
+            const reply = chatLog.add('bot loading', '🤔 AI düşünüyor...');
             
             // Button'u disable et
             sendButton.disabled = true;
@@ -186,26 +203,23 @@ HTML_TEMPLATE = """
                 const response = await fetch('/chat', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ message: message })
+                    body: JSON.stringify({ message: message, session_id: sessionId })
                 });
                 
                 const data = await response.json();
+                if (data.session_id) sessionId = data.session_id;
                 
-                // Loading mesajını kaldır
-                document.getElementById('loadingMsg').remove();
-                
-                // AI yanıtını ekle
-                chatArea.innerHTML += `<div class="message bot">${data.response || 'Bir hata oluştu.'}</div>`;
+                // AI yanıtını loading balonuna yaz
+                chatLog.update(reply, data.response || 'Bir hata oluştu.', 'bot');
                 
             } catch (error) {
-                document.getElementById('loadingMsg').innerHTML = '❌ Bağlantı hatası oluştu.';
+                chatLog.update(reply, '❌ Bağlantı hatası oluştu.', 'bot');
             }
             
             // Button'u aktif et
             sendButton.disabled = false;
             sendButton.textContent = 'Gönder';
             
-            chatArea.scrollTop = chatArea.scrollHeight;
             input.focus();
         }
         
@@ -217,6 +231,7 @@ HTML_TEMPLATE = """
         
         // Sayfa yüklendiğinde input'a odaklan
         document.addEventListener('DOMContentLoaded', function() {
+            chatLog.init(document.getElementById('chatArea'));
             document.getElementById('messageInput').focus();
         });
     </script>
@@ -224,9 +239,15 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Sayfa bir kez çizilip sıkıştırılır; tarayıcı ETag ile yeniden doğrular (tunnel'da 304 birkaç byte)
+# Sayfa bir kez çizilir; Accept-Encoding pazarlığı ve ETag'ler ana proxy'deki compression.py'den
+HOME_PAGE = PrecompressedPage(app.jinja_env.from_string(HTML_TEMPLATE).render(chat_log_js=CHAT_LOG_JS))
+
 @app.route("/")
 def home():
-    return render_template_string(HTML_TEMPLATE)
+    status, headers, body = HOME_PAGE.respond(request.headers.get("Accept-Encoding"),
+                                              request.headers.get("If-None-Match"))
+    return Response(body, status=status, headers=headers)
 
 @app.route("/chat", methods=["POST"])
 def chat():
@@ -237,16 +258,20 @@ def chat():
         if not user_message:
             return jsonify({"error": "Mesaj boş olamaz"}), 400
         
-        # Ollama API'ye istek gönder
-        response = requests.post(OLLAMA_API, json={
-            "model": "llama3.2:1b",
-            "prompt": user_message,
-            "stream": False
-        }, timeout=60)
+        session_id, history = histories.get(data.get("session_id"))
+        
+        # Önceki turların context'i geri gönderilir; Ollama geçmişi yeniden işlemez
+        prompt, context = history.prompt(user_message)
+        payload = {"model": MODEL_NAME, "prompt": prompt, "stream": False}
+        if context:
+            payload["context"] = context
+        response = requests.post(OLLAMA_API, json=payload, timeout=60)
         
         if response.status_code == 200:
-            ai_response = response.json().get("response", "Yanıt alınamadı")
-            return jsonify({"response": ai_response})
+            result = response.json()
+            ai_response = result.get("response", "Yanıt alınamadı")
+            history.add(user_message, ai_response, result.get("context"))
+            return jsonify({"response": ai_response, "session_id": session_id})
         else:
             return jsonify({"response": "AI şu anda meşgul, lütfen bir dakika bekleyip tekrar deneyin."})
             
@@ -269,47 +294,19 @@ with open('chatbot_app.py', 'w') as f:
 
 print("✅ Flask uygulaması hazırlandı!")
 
-# 4. Ollama'yı arka planda başlat
-def start_ollama():
-    os.system("ollama serve")
-
-print("🔧 Ollama servisi başlatılıyor...")
-ollama_thread = threading.Thread(target=start_ollama, daemon=True)
-ollama_thread.start()
-
-# Ollama'nın başlamasını bekle
-time.sleep(15)
-
-# 5. Küçük ve hızlı model indir
-print("📦 AI modeli indiriliyor... (Bu biraz zaman alabilir)")
-os.system("ollama pull llama3.2:1b")
-
-print("✅ AI modeli hazır!")
-
-# 6. Flask uygulamasını arka planda başlat
-def start_flask():
-    os.system("python chatbot_app.py")
-
-print("🌐 Web uygulaması başlatılıyor...")
-flask_thread = threading.Thread(target=start_flask, daemon=True)
-flask_thread.start()
-
-# Flask'ın başlamasını bekle
-time.sleep(10)
-
-# 7. Ngrok token'ını ayarla ve tunnel oluştur
+# 4. Ngrok token'ını ayarla
 print("🔗 Ngrok token ayarlanıyor...")
 ngrok.set_auth_token("32BjwByiVnrfoAikt8y5p7lEDwX_2eXRUQwSLE2zfZbZUBxP3")
 
-print("🔗 Public URL oluşturuluyor (Ngrok)...")
+# 5. Ollama + model indirme ve Flask aynı anda başlar; sabit bekleme yerine
+#    her servis gerçekten yanıt verdiğinde sonraki aşamaya geçilir
+print("🔧 Ollama, AI modeli ve web uygulaması başlatılıyor... (model indirme biraz sürebilir)")
 
 try:
     # Önceki tunnel'ları temizle
     ngrok.kill()
-    time.sleep(2)
     
-    # Yeni tunnel oluştur
-    public_url = ngrok.connect(5000)
+    public_url, launcher = launch("llama3.2:1b", "chatbot_app.py", port=5000, tunnel=ngrok.connect)
     
     print("\n" + "="*60)
     print("🎉 CHATBOT HAZIR! 🎉")
@@ -357,7 +354,8 @@ try:
         print("\n👋 Chatbot durduruldu!")
 
 except Exception as e:
-    print(f"\n❌ NGROK HATASI: {e}")
+    print(f"\n❌ BAŞLATMA HATASI: {e}")
+    print("📄 Servis çıktıları: ollama.log, web.log")
     print("\n🔧 HIZLI ÇÖZÜM:")
     print("Yeni Colab hücresinde şunu çalıştırın:")
     print("""
@@ -0,0 +1,194 @@
+# Colab / tek makine için başlatıcı: sabit sleep'ler yerine gerçek hazır olma
+# kontrolleri. Ollama ve web sunucusu aynı anda başlar, model indirme web
+# sunucusunun açılmasıyla örtüşür, sonunda aşama aşama süre dökümü basılır.
+#
+#   from colab_launcher import launch
+#   public_url, launcher = launch("llama3.2:1b", "app_colab.py", tunnel=ngrok.connect)
+#
+# Colab'da bu dosya notebook'la aynı klasöre (/content, Files paneli) yüklenmelidir.
+
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+OLLAMA_HOST = "http://localhost:11434"
+
+
+class StartupError(Exception):
+    """Bir servis süresi içinde hazır olmadı ya da erken kapandı"""
+
+
+def wait_until(probe, name, timeout=60, initial_delay=0.1, max_delay=2.0, process=None, stop=None):
+    """probe() True dönene kadar artan aralıklarla (backoff) dene; süre dolarsa ya da
+    stop (threading.Event) kurulursa StartupError"""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    last_error = None
+    while True:
+        if stop is not None and stop.is_set():
+            raise StartupError(f"{name} beklenirken başlatma durduruldu")
+        if process is not None and process.poll() is not None:
+            raise StartupError(f"{name} erken kapandı (çıkış kodu {process.returncode})")
+        try:
+            if probe():
+                return
+        except Exception as e:
+            last_error = e
+        if time.monotonic() + delay > deadline:
+            detail = f": {last_error}" if last_error else ""
+            raise StartupError(f"{name} {timeout:.0f} sn içinde hazır olmadı{detail}")
+        if stop is not None:
+            stop.wait(delay)
+        else:
+            time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+def http_ok(url, timeout=2):
+    """URL 2xx dönüyorsa True"""
+    return requests.get(url, timeout=timeout).ok
+
+
+class Launcher:
+    """Servisleri başlatır, hazır olmalarını bekler ve aşama sürelerini kaydeder"""
+
+    def __init__(self, ollama_host=OLLAMA_HOST):
+        self.ollama_host = ollama_host
+        self.started = time.monotonic()
+        self.timings = {}   # aşama adı -> (başlangıç ofseti, süre)
+        self.processes = []
+        self.logs = []
+        self.tasks = []     # stop()'un bitmesini beklediği arka plan işleri (Future)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def _check_stopping(self, name):
+        if self._stopping.is_set():
+            raise StartupError(f"{name}: başlatma durduruldu")
+
+    def timed(self, name, func, *args, **kwargs):
+        """func'ı çalıştır ve süresini `name` aşaması olarak kaydet; stop() sonrası aşama başlamaz"""
+        self._check_stopping(name)
+        start = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.timings[name] = (start - self.started, elapsed)
+            print(f"⏱️ {name}: {elapsed:.1f} sn")
+
+    def _start(self, args, **kwargs):
+        # Kilit altında: stop() süreçleri sonlandırırken yeni süreç eklenemez
+        with self._lock:
+            self._check_stopping(args[0])
+            process = subprocess.Popen(args, **kwargs)
+            self.processes.append(process)
+            return process
+
+    def spawn(self, args, log_path):
+        """Arka plan süreci başlat; çıktısı log dosyasına gider"""
+        log = open(log_path, "w")
+        try:
+            process = self._start(args, stdout=log, stderr=subprocess.STDOUT)
+        except BaseException:
+            log.close()
+            raise
+        self.logs.append(log)
+        return process
+
+    def start_ollama(self, timeout=60):
+        """`ollama serve`'ü başlat, /api/tags yanıt verene kadar bekle"""
+        if self._ollama_up():
+            print("✅ Ollama zaten çalışıyor")
+            return
+        process = self.spawn(["ollama", "serve"], "ollama.log")
+        wait_until(self._ollama_up, "Ollama", timeout, process=process, stop=self._stopping)
+        print("✅ Ollama hazır")
+
+    def _ollama_up(self):
+        try:
+            return http_ok(self.ollama_host + "/api/tags")
+        except requests.exceptions.ConnectionError:
+            return False
+
+    def pull_model(self, model):
+        """`ollama pull`; süreç stop() ile sonlandırılabilsin diye listede tutulur"""
+        print(f"📦 Model indiriliyor: {model}")
+        process = self._start(["ollama", "pull", model])
+        if process.wait() != 0:
+            raise StartupError(f"Model indirilemedi: {model} (çıkış kodu {process.returncode})")
+
+    def warm_model(self, model, keep_alive="24h", timeout=300):
+        """Boş prompt'lu generate modeli belleğe yükler; ilk sohbet yükleme süresini ödemez"""
+        response = requests.post(self.ollama_host + "/api/generate", json={
+            "model": model,
+            "keep_alive": keep_alive
+        }, timeout=timeout)
+        response.raise_for_status()
+        print(f"✅ Model bellekte: {model}")
+
+    def start_web(self, script, port, timeout=30):
+        """Web uygulamasını başlat, ana sayfa yanıt verene kadar bekle"""
+        process = self.spawn([sys.executable, script], "web.log")
+        wait_until(lambda: http_ok(f"http://localhost:{port}/"), "Web sunucusu", timeout, process=process,
+                   stop=self._stopping)
+        print(f"✅ Web sunucusu hazır: http://localhost:{port}")
+
+    def report(self):
+        """Aşama bazında başlangıç süresi dökümü"""
+        total = time.monotonic() - self.started
+        print("\n⏱️ Başlangıç süreleri")
+        for name, (offset, elapsed) in sorted(self.timings.items(), key=lambda item: item[1][0]):
+            print(f"   {name:<18} +{offset:5.1f} sn  {elapsed:6.1f} sn")
+        print(f"   {'toplam':<18}         {total:6.1f} sn")
+
+    def stop(self, timeout=10):
+        """Yeni aşama/süreç başlamasını engelle, süreçleri sonlandır ve arka plan işlerini bekle"""
+        self._stopping.set()
+        with self._lock:
+            processes = list(self.processes)
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        # Süreçleri kapanan işler (pull, hazır olma beklemeleri) hata ile hemen döner
+        wait(self.tasks, timeout)
+        for log in self.logs:
+            log.close()
+        self.logs = []
+
+
+def launch(model, script, port=5000, tunnel=None, ollama_host=OLLAMA_HOST):
+    """Ollama + model + web sunucusu + (isteğe bağlı) tunnel; (public_url, launcher) döndürür"""
+    launcher = Launcher(ollama_host)
+    public_url = None
+
+    def prepare_model():
+        launcher.timed("ollama serve", launcher.start_ollama)
+        launcher.timed("model indirme", launcher.pull_model, model)
+        launcher.timed("model ısıtma", launcher.warm_model, model)
+
+    # Web sunucusu Ollama'yı beklemez; tunnel onunla kurulurken model indirme/ısıtma sürer
+    pool = ThreadPoolExecutor(max_workers=2)
+    model_ready = pool.submit(prepare_model)
+    web_ready = pool.submit(launcher.timed, "web sunucusu", launcher.start_web, script, port)
+    launcher.tasks += [model_ready, web_ready]
+    try:
+        web_ready.result()
+        if tunnel is not None:
+            public_url = launcher.timed("tunnel", tunnel, port)
+            print(f"🔗 Public URL: {public_url} (model hazırlanıyor olabilir)")
+        model_ready.result()
+    except BaseException:
+        # Hata hemen bildirilir: süren model indirmesi beklenmez, başlatılan süreçler kapatılır
+        launcher.stop()
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    launcher.report()
+    return public_url, launcher
@@ -5,33 +5,39 @@
 # Aşağıdaki komutu terminalde çalıştırmalısınız:
 # curl -fsSL https://ollama.com/install.sh | sh
 
-# 2. Ollama'yı arka planda başlat
-import subprocess
+# 2. Ollama, model indirme ve Flask colab_launcher.py ile birlikte başlatılır
+#    (SUPPORT_FILES'taki dosyaları Files panelinden bu notebook'la aynı klasöre, /content, yükleyin)
+import os
 import time
-import threading
-
-def start_ollama():
-    subprocess.run(["ollama", "serve"], capture_output=False)
-
-# Ollama'yı arka planda başlat
-ollama_thread = threading.Thread(target=start_ollama, daemon=True)
-ollama_thread.start()
 
-# Birkaç saniye bekle
-time.sleep(10)
+SUPPORT_FILES = ["colab_launcher.py", "colab_shared.py", "sessions.py", "near_duplicate.py", "response_cache.py"]
 
-# 3. Model indir
-subprocess.run(["ollama", "pull", "llama3.2:1b"])  # Küçük model, hızlı indirme
+MODEL = "llama3.2:1b"  # Küçük model, hızlı indirme
 
-# 4. Flask uygulaması
+# 3. Flask uygulaması
 flask_code = '''
 from flask import Flask, request, jsonify, render_template_string
 import requests
 import json
 
+from colab_shared import ChatHistories
+from near_duplicate import NearDuplicateIndex
+from response_cache import cache_key, is_cacheable
+
 app = Flask(__name__)
 
 OLLAMA_API = "http://localhost:11434/api/generate"
+MODEL_NAME = "llama3.2:1b"
+GENERATION_OPTIONS = {"temperature": 0.7, "num_predict": 512}
+
+# Near-duplicate önbellek: "merhaba nasılsın" ile "Merhaba, nasilsin?" aynı yanıtı alır.
+# Ana proxy'deki near_duplicate/response_cache modülleri kullanılır; sadece deterministik yanıtlar saklanır
+near_cache = NearDuplicateIndex(max_entries=512)
+
+# Oturum geçmişi: prompt token bütçesinde tutulur, eski turlar arka planda özetlenir (colab_shared.py)
+SYSTEM_PROMPT = "Sen yardımsever bir AI asistanısın. Türkçe yanıt ver. "
+
+histories = ChatHistories(OLLAMA_API, MODEL_NAME, SYSTEM_PROMPT)
 
 # HTML arayüzü - Modern ve güzel tasarım
 HTML_INTERFACE = """
@@ -331,6 +337,7 @@ HTML_INTERFACE = """
 
     <script>
         let isLoading = false;
+        let sessionId = null;  // Sunucu tarafı sohbet geçmişi
         
         async function sendMessage() {
             if (isLoading) return;
@@ -381,7 +388,7 @@ HTML_INTERFACE = """
                         'Content-Type': 'application/json',
                         'Accept': 'application/json'
                     },
-                    body: JSON.stringify({ message: message })
+                    body: JSON.stringify({ message: message, session_id: sessionId })
                 });
                 
                 if (!response.ok) {
@@ -389,6 +396,7 @@ HTML_INTERFACE = """
                 }
                 
                 const data = await response.json();
+                if (data.session_id) sessionId = data.session_id;
                 
                 // Yazıyor göstergesini kaldır
                 typingDiv.remove();
@@ -469,22 +477,42 @@ def chat():
         
         if not user_message:
             return jsonify({"response": "Lütfen bir mesaj yazın."})
-        
-        # Ollama API'ye istek gönder
-        response = requests.post(OLLAMA_API, json={
-            "model": "llama3.2:1b",
-            "prompt": f"Sen yardımsever bir AI asistanısın. Türkçe yanıt ver. Kullanıcı sorusu: {user_message}",
+
+        session_id, history = histories.get(data.get("session_id"))
+
+        # Benzer bir soru daha önce yanıtlandıysa modeli hiç çalıştırma (sadece sohbetin ilk sorusu).
+        # temperature > 0 yanıtları örnekleme sonucudur: istemci "cache" ile açıkça istemedikçe saklanmaz
+        namespace = cache_key(MODEL_NAME, "", GENERATION_OPTIONS)
+        cacheable = (not history.turns and not history.summary
+                     and is_cacheable(GENERATION_OPTIONS, data.get("cache")))
+        if cacheable:
+            match = near_cache.lookup(namespace, user_message)
+            if match is not None:
+                cached = match[0]
+                history.add(user_message, cached)
+                return jsonify({"response": cached, "cached": True, "session_id": session_id})
+
+        # Ollama API'ye istek gönder; önceki turların context'i geri gönderilir,
+        # böylece geçmiş her turda yeniden prefill edilmez
+        prompt, context = history.prompt(user_message)
+        payload = {
+            "model": MODEL_NAME,
+            "prompt": prompt,
             "stream": False,
-            "options": {
-                "temperature": 0.7,
-                "num_predict": 512
-            }
-        }, timeout=45)
+            "options": GENERATION_OPTIONS
+        }
+        if context:
+            payload["context"] = context
+        response = requests.post(OLLAMA_API, json=payload, timeout=45)
         
         if response.status_code == 200:
-            ai_response = response.json().get("response", "").strip()
+            result = response.json()
+            ai_response = result.get("response", "").strip()
             if ai_response:
-                return jsonify({"response": ai_response})
+                if cacheable:
+                    near_cache.add(namespace, user_message, ai_response)
+                history.add(user_message, ai_response, result.get("context"))
+                return jsonify({"response": ai_response, "session_id": session_id})
             else:
                 return jsonify({"response": "AI şu anda yanıt veremiyor, lütfen tekrar deneyin."})
         else:
@@ -526,7 +554,7 @@ if __name__ == "__main__":
 with open('app_colab.py', 'w') as f:
     f.write(flask_code)
 
-# 5. Ngrok kurulumu ve Flask başlatma
+# 4. Ngrok kurulumu ve servisleri başlatma
 import subprocess
 import sys
 
@@ -534,26 +562,17 @@ import sys
 subprocess.run([sys.executable, "-m", "pip", "install", "pyngrok"], check=True)
 
 from pyngrok import ngrok
-import threading
-
-print("🚀 Flask uygulaması başlatılıyor...")
-
-# Flask'ı arka planda başlat
-def run_flask():
-    subprocess.run([sys.executable, "app_colab.py"])
-
-flask_thread = threading.Thread(target=run_flask, daemon=True)
-flask_thread.start()
-
-# Flask'ın başlamasını bekle
-print("⏳ Flask başlatılıyor...")
-time.sleep(8)
+missing = [name for name in SUPPORT_FILES if not os.path.exists(name)]
+if missing:
+    raise SystemExit(f"❌ {', '.join(missing)} bulunamadı: dosyaları Colab'ın Files panelinden bu notebook'la "
+                     "aynı klasöre (/content) yükleyip hücreyi yeniden çalıştırın")
+from colab_launcher import launch
 
-print("🌐 Ngrok tunnel oluşturuluyor...")
+print("🚀 Ollama ve Flask uygulaması başlatılıyor...")
 
-# Ngrok tunnel oluştur
+# Sabit bekleme yok: her servis hazır olduğu anda bir sonraki aşamaya geçilir
 try:
-    public_url = ngrok.connect(5000)
+    public_url, launcher = launch(MODEL, "app_colab.py", port=5000, tunnel=ngrok.connect)
     
     print("\n" + "="*60)
     print("� CHATBOT BAŞARIYLA HAZIR! �")
@@ -587,8 +606,9 @@ try:
         time.sleep(120)  # 2 dakikada bir
         
 except Exception as e:
-    print(f"❌ Ngrok hatası: {e}")
+    print(f"❌ Başlatma hatası: {e}")
     print("🔧 Çözüm önerileri:")
+    print("   0. Servis çıktıları için ollama.log ve web.log dosyalarına bakın")
     print("   1. Ngrok hesabı oluşturun: https://ngrok.com")
     print("   2. Auth token'ı ayarlayın: ngrok authtoken YOUR_TOKEN")
     print("   3. Bu kodu tekrar çalıştırın")
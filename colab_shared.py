@@ -0,0 +1,112 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+import requests
+
+from sessions import valid_session_id
+
+# Colab sohbet uygulamalarının ortak parçaları. colab_complete_chatbot.py ve
+# colab_ollama_chatbot.py'nin ürettiği uygulamalar bu dosyayı /content'ten import eder.
+
+# Oturum geçmişi: prompt token bütçesinde tutulur, eski turlar arka planda özetlenir
+HISTORY_TOKEN_BUDGET = 1536
+HISTORY_KEEP_TURNS = 2
+MAX_SESSIONS = 200
+
+
+def estimate_tokens(text):
+    return len(text) * 2 // 7 + 1  # Türkçe metinde ~3.5 karakter/token
+
+
+class ChatHistory:
+    """Tek bir sohbetin turları, özeti ve Ollama'nın son döndürdüğü context"""
+
+    def __init__(self, api_url, model, system_prompt=""):
+        self.api_url = api_url
+        self.model = model
+        self.system_prompt = system_prompt
+        self.turns = []  # (soru, yanıt)
+        self.summary = ""
+        self.context = None  # Ollama'nın son turda döndürdüğü token'lar
+        self.summarizing = False
+        self.lock = threading.Lock()
+
+    def prompt(self, user_message):
+        """(prompt, context): context bütçedeyse geçmiş yeniden prefill edilmez, değilse özet + son turlar"""
+        with self.lock:
+            summary, turns, context = self.summary, list(self.turns), self.context
+        if context is None and not turns and not summary:
+            return self.system_prompt + user_message, None
+        if context is not None and len(context) + estimate_tokens(user_message) <= HISTORY_TOKEN_BUDGET:
+            return user_message, context
+        remaining = HISTORY_TOKEN_BUDGET - estimate_tokens(user_message) - estimate_tokens(summary)
+        recent = []
+        for question, answer in reversed(turns):
+            cost = estimate_tokens(question) + estimate_tokens(answer)
+            if cost > remaining:
+                break
+            recent.insert(0, "Kullanıcı: " + question + "\nAsistan: " + answer)
+            remaining -= cost
+        parts = ["Önceki konuşmanın özeti: " + summary] if summary else []
+        parts += recent + ["Kullanıcı sorusu: " + user_message]
+        return self.system_prompt + "\n\n".join(parts), None
+
+    def add(self, question, answer, context=None):
+        with self.lock:
+            self.turns.append((question, answer))
+            if context is not None:
+                self.context = context
+            old = self.turns[:-HISTORY_KEEP_TURNS]
+            tokens = sum(estimate_tokens(q) + estimate_tokens(a) for q, a in self.turns)
+            if self.summarizing or not old or tokens < HISTORY_TOKEN_BUDGET // 2:
+                return
+            self.summarizing = True
+        # Özet isteğin yolunda değil, arka planda üretilir
+        threading.Thread(target=self._summarize, args=(old,), daemon=True).start()
+
+    def _summarize(self, old):
+        text = "\n".join("Kullanıcı: " + q + "\nAsistan: " + a for q, a in old)
+        if self.summary:
+            text = "Önceki özet: " + self.summary + "\n\n" + text
+        try:
+            response = requests.post(self.api_url, json={
+                "model": self.model,
+                "prompt": "Bu konuşmayı önemli bilgileri koruyarak kısa ve Türkçe özetle.\n\n" + text,
+                "stream": False,
+                "options": {"temperature": 0, "num_predict": 256}
+            }, timeout=120)
+            summary = response.json().get("response", "").strip()
+            if summary:
+                with self.lock:
+                    self.summary = summary
+                    self.turns = self.turns[len(old):]
+        except Exception as e:
+            print(f"History summary error: {str(e)}")
+        finally:
+            self.summarizing = False
+
+
+class ChatHistories:
+    """Oturum id'si -> ChatHistory; MAX_SESSIONS aşılınca en uzun süre kullanılmayan atılır"""
+
+    def __init__(self, api_url, model, system_prompt="", max_sessions=MAX_SESSIONS):
+        self.api_url = api_url
+        self.model = model
+        self.system_prompt = system_prompt
+        self.max_sessions = max_sessions
+        self._histories = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id=None):
+        """(session_id, geçmiş); id yoksa ya da geçersizse yeni oturum açılır"""
+        if not valid_session_id(session_id):
+            session_id = uuid.uuid4().hex
+        with self._lock:
+            history = self._histories.pop(session_id, None)
+            if history is None:
+                history = ChatHistory(self.api_url, self.model, self.system_prompt)
+            self._histories[session_id] = history
+            while len(self._histories) > self.max_sessions:
+                self._histories.popitem(last=False)
+            return session_id, history
@@ -0,0 +1,301 @@
+import gzip
+import hashlib
+import os
+import zlib
+
+# Sıkıştırma: Accept-Encoding pazarlığı ve süreç boyunca değişmeyen sayfaların
+# önceden sıkıştırılmış varyantları. brotli paketi yoksa sadece gzip kullanılır.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Ana sayfanın tarayıcıda yeniden doğrulanmadan kullanılabileceği süre (sn)
+PAGE_MAX_AGE = int(os.getenv('PAGE_MAX_AGE', 300))
+# Dinamik yanıtların sıkıştırılması (0 = kapalı) ve bundan küçük gövdeler için eşik (byte)
+COMPRESSION = os.getenv('COMPRESSION', '1') != '0'
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+# Sıkıştırılan içerik türleri; görsel vb. zaten sıkıştırılmış türlere dokunulmaz
+COMPRESSIBLE_TYPES = ('application/json', 'text/event-stream', 'text/plain', 'text/html', 'application/x-ndjson')
+
+# Tercih sırası: aynı q değerinde önce brotli
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding başlığından {kodlama: q}"""
+    weights = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    return weights
+
+
+def negotiate(header, available=SUPPORTED_ENCODINGS):
+    """İstemcinin kabul ettiği en iyi kodlama; yoksa None (sıkıştırmasız)"""
+    weights = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return data
+
+
+class PrecompressedPage:
+    """Bir kez çizilip gzip/brotli varyantları ve güçlü ETag'leri hazırlanmış sayfa"""
+
+    def __init__(self, body, content_type='text/html; charset=utf-8', max_age=PAGE_MAX_AGE):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.content_type = content_type
+        self.max_age = max_age
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        # Her temsilin kendi güçlü ETag'i olur (RFC 9110: farklı gövde, farklı etiket)
+        self.variants = {None: (body, f'"{digest}"')}
+        for encoding in SUPPORTED_ENCODINGS:
+            compressed = compress(body, encoding)
+            if len(compressed) < len(body):
+                self.variants[encoding] = (compressed, f'"{digest}-{encoding}"')
+
+    def sizes(self):
+        return {encoding or 'identity': len(body) for encoding, (body, _) in self.variants.items()}
+
+    def respond(self, accept_encoding, if_none_match):
+        """(status, başlıklar, gövde); If-None-Match eşleşirse gövdesiz 304"""
+        encoding = negotiate(accept_encoding, [e for e in self.variants if e])
+        body, etag = self.variants[encoding]
+        headers = {
+            'ETag': etag,
+            'Cache-Control': f'public, max-age={self.max_age}',
+            'Vary': 'Accept-Encoding'
+        }
+        if if_none_match and (if_none_match.strip() == '*' or etag in _etags(if_none_match)):
+            return 304, headers, b''
+        headers['Content-Type'] = self.content_type
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return 200, headers, body
+
+
+def _etags(header):
+    # Zayıf karşılaştırma (RFC 9110 If-None-Match): W/ öneki yok sayılır
+    return {tag.strip().removeprefix('W/') for tag in header.split(',')}
+
+
+class StreamCompressor:
+    """Parça parça sıkıştırıcı; flush=True ile her parça hemen çözülebilir şekilde gönderilir"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            # Dinamik içerikte yüksek kalite gecikme ekler; 4 hız/oran dengesi iyi
+            self._compressor = brotli.Compressor(quality=4)
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)   # 31 = gzip başlığı
+
+    def compress(self, data, flush=False):
+        if self.encoding == 'br':
+            out = self._compressor.process(data)
+            return out + self._compressor.flush() if flush else out
+        out = self._compressor.compress(data)
+        # Z_SYNC_FLUSH: token'lar sıkıştırıcının tamponunda beklemez
+        return out + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def compress_body(data, encoding):
+    """Dinamik yanıt gövdesini tek seferde, hızlı ayarlarla sıkıştır"""
+    compressor = StreamCompressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def _compression_plan(method, status, headers, accept_encoding):
+    """Yanıt başlıklarına göre (kodlama, akış mı); sıkıştırılmayacaksa None"""
+    if not COMPRESSION or method == 'HEAD' or status < 200 or status in (204, 304):
+        return None
+    lowered = {name.lower(): value for name, value in headers}
+    if 'content-encoding' in lowered:
+        return None
+    content_type = lowered.get('content-type', '').split(';')[0].strip().lower()
+    if content_type not in COMPRESSIBLE_TYPES:
+        return None
+    length = lowered.get('content-length')
+    if length is not None and int(length) < COMPRESS_MIN_SIZE:
+        return None
+    encoding = negotiate(accept_encoding)
+    if encoding is None:
+        return None
+    # Content-Length'i olmayan yanıtlar (SSE, NDJSON) akıştır; her parça hemen flush edilir
+    return encoding, length is None
+
+
+def _varies(headers):
+    """Sıkıştırılabilir yanıt: bu sefer sıkıştırılmasa da (küçük gövde, istemci istemedi)
+    temsili Accept-Encoding'e bağlıdır; ara önbellekler bunu Vary'den öğrenir"""
+    if not COMPRESSION:
+        return False
+    lowered = {name.lower(): value for name, value in headers}
+    if 'content-encoding' in lowered:
+        return False   # Kendi kodlamasını seçen yanıt (ör. PrecompressedPage) Vary'yi de kendi koyar
+    content_type = lowered.get('content-type', '').split(';')[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES
+
+
+def _vary_headers(headers):
+    """Vary'ye Accept-Encoding ekle; zaten varsa (ya da Vary: *) başlıklara dokunma"""
+    vary = [v for n, v in headers if n.lower() == 'vary']
+    tokens = {token.strip().lower() for value in vary for token in value.split(',')}
+    if 'accept-encoding' in tokens or '*' in tokens:
+        return list(headers)
+    result = [(n, v) for n, v in headers if n.lower() != 'vary']
+    result.append(('Vary', ', '.join(vary + ['Accept-Encoding'])))
+    return result
+
+
+def _compressed_headers(headers, encoding, length=None):
+    result = [(n, v) for n, v in _vary_headers(headers) if n.lower() != 'content-length']
+    result.append(('Content-Encoding', encoding))
+    if length is not None:
+        result.append(('Content-Length', str(length)))
+    return result
+
+
+class CompressionMiddleware:
+    """WSGI (Flask) yanıtlarını Accept-Encoding'e göre gzip/brotli ile sıkıştırır"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['args'] = (status, headers, exc_info)
+            return lambda data: None   # write() çağrısı kullanılmıyor
+
+        app_iter = self.app(environ, capture)
+        status, headers, exc_info = captured['args']
+        plan = _compression_plan(environ.get('REQUEST_METHOD'), int(status.split()[0]), headers,
+                                 environ.get('HTTP_ACCEPT_ENCODING'))
+        if plan is None:
+            if _varies(headers):
+                headers = _vary_headers(headers)
+            start_response(status, headers, exc_info)
+            return app_iter
+
+        encoding, streaming = plan
+        if streaming:
+            start_response(status, _compressed_headers(headers, encoding), exc_info)
+            return CompressedStream(app_iter, StreamCompressor(encoding))
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        body = compress_body(body, encoding)
+        start_response(status, _compressed_headers(headers, encoding, len(body)), exc_info)
+        return [body]
+
+
+class CompressedStream:
+    """Akış yanıtını parça parça sıkıştırır. Üreteç değil: sunucu yanıtı hiç iterasyon
+    yapmadan kapatsa da (istemci başlıklardan önce koptu) close() iç yanıtı kapatır"""
+
+    def __init__(self, app_iter, compressor):
+        self.app_iter = app_iter
+        self.compressor = compressor
+
+    def __iter__(self):
+        for chunk in self.app_iter:
+            if chunk:
+                yield self.compressor.compress(chunk, flush=True)
+        yield self.compressor.finish()
+
+    def close(self):
+        if hasattr(self.app_iter, 'close'):
+            self.app_iter.close()
+
+
+class AsgiCompressionMiddleware:
+    """CompressionMiddleware'in ASGI (Quart) karşılığı"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        accept_encoding = None
+        for name, value in scope.get('headers', []):
+            if name == b'accept-encoding':
+                accept_encoding = value.decode('latin-1')
+        state = {'plan': None, 'start': None, 'body': []}
+
+        async def wrapped_send(message):
+            if message['type'] == 'http.response.start':
+                headers = [(n.decode('latin-1'), v.decode('latin-1')) for n, v in message.get('headers', [])]
+                plan = _compression_plan(scope.get('method'), message['status'], headers, accept_encoding)
+                if plan is None:
+                    if _varies(headers):
+                        message = _start_message(message, _vary_headers(headers))
+                    return await send(message)
+                encoding, streaming = plan
+                state['plan'] = plan
+                state['compressor'] = StreamCompressor(encoding)
+                state['start'] = (message, headers)
+                if streaming:
+                    await send(_start_message(message, _compressed_headers(headers, encoding)))
+                return
+
+            if message['type'] != 'http.response.body' or state['plan'] is None:
+                return await send(message)
+
+            encoding, streaming = state['plan']
+            body = message.get('body', b'')
+            more = message.get('more_body', False)
+            if streaming:
+                compressor = state['compressor']
+                data = compressor.compress(body, flush=True) if body else b''
+                if not more:
+                    data += compressor.finish()
+                return await send({'type': 'http.response.body', 'body': data, 'more_body': more})
+
+            # Boyutu belli yanıt: tamamı toplanıp tek seferde sıkıştırılır
+            state['body'].append(body)
+            if more:
+                return
+            data = b''.join(state['body'])
+            data = compress_body(data, encoding)
+            start, headers = state['start']
+            await send(_start_message(start, _compressed_headers(headers, encoding, len(data))))
+            await send({'type': 'http.response.body', 'body': data, 'more_body': False})
+
+        await self.app(scope, receive, wrapped_send)
+
+
+def _start_message(message, headers):
+    return dict(message, headers=[(n.encode('latin-1'), v.encode('latin-1')) for n, v in headers])
@@ -0,0 +1,205 @@
+# GPU ve ağ olmadan proxy'yi ölçmek için sahte Ollama sunucusu.
+# /api/generate (stream ve stream'siz), /api/tags ve /api/ps uygular; prompt
+# işleme gecikmesi, token başına gecikme ve hata oranı ayarlanabilir.
+# --replay ile TRAFFIC_RECORD_PATH kaydındaki yanıtlar kaydedildikleri
+# hızda (ya da --speed kat hızlı) yeniden oynatılır.
+#
+#   python fake_ollama.py --port 11435 --prompt-eval-delay 0.05 --token-delay 0.02 --error-rate 0.01
+#   python fake_ollama.py --port 11435 --replay traffic.jsonl --speed 2
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from traffic_record import fingerprint, load_recordings, token_schedule
+
+FAKE_MODEL = "llama3:latest"
+_WORDS = ("merhaba ", "bu ", "sahte ", "bir ", "yanıt ", "ollama ", "token ", "akışı ")
+
+
+class FakeOllamaConfig:
+    def __init__(self, prompt_eval_delay=0.05, token_delay=0.02, tokens=32, error_rate=0.0, seed=None):
+        self.prompt_eval_delay = prompt_eval_delay  # İlk token'dan önceki bekleme (sn)
+        self.token_delay = token_delay              # Token başına bekleme (sn)
+        self.tokens = tokens                        # Yanıt başına token sayısı
+        self.error_rate = error_rate                # 0-1 arası; isteğin 500 ile düşme olasılığı
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def plan(self, body):
+        """(ilk token gecikmesi, [(token öncesi bekleme, token)]); hata verilecekse None"""
+        if self.should_fail():
+            return None
+        return self.prompt_eval_delay, [(self.token_delay, _WORDS[i % len(_WORDS)]) for i in range(self.tokens)]
+
+
+class ReplayConfig:
+    """Kaydedilmiş üretimleri kaydedildikleri zamanlamayla geri oynatır"""
+
+    def __init__(self, recordings, speed=1.0):
+        self.recordings = recordings
+        self.speed = speed
+        self._by_fingerprint = defaultdict(list)
+        for recording in recordings:
+            self._by_fingerprint[recording["fp"]].append(recording)
+        self._served = defaultdict(int)
+        self._next = 0
+        self.lock = threading.Lock()
+
+    def pick(self, prompt):
+        """Aynı anonim prompt'un kaydı sırayla; yoksa kayıtlar baştan sona dönülür"""
+        key = fingerprint(prompt)
+        with self.lock:
+            matches = self._by_fingerprint.get(key)
+            if matches:
+                recording = matches[self._served[key] % len(matches)]
+                self._served[key] += 1
+            else:
+                recording = self.recordings[self._next % len(self.recordings)]
+                self._next += 1
+        return recording
+
+    def plan(self, body):
+        recording = self.pick(body["prompt"])
+        if "error" in recording:
+            return None
+        first, steps = token_schedule(recording)
+        return first / self.speed, [(gap / self.speed, token) for gap, token in steps]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = FakeOllamaConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, payload):
+        data = (json.dumps(payload) + "\n").encode('utf-8')
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._json({"models": [{"name": FAKE_MODEL, "model": FAKE_MODEL}]})
+        elif self.path == "/api/ps":
+            self._json({"models": [{"name": FAKE_MODEL, "model": FAKE_MODEL}]})
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/api/generate":
+            return self._json({"error": "not found"}, 404)
+
+        if not body.get("prompt"):
+            # Boş prompt: sadece model yükleme (ısıtma)
+            return self._json({"model": body.get("model"), "response": "", "done": True, "done_reason": "load"})
+        plan = self.config.plan(body)
+        if plan is None:
+            return self._json({"error": "fake ollama: rastgele hata"}, 500)
+
+        prompt_eval_delay, steps = plan
+        started = time.monotonic()
+        time.sleep(prompt_eval_delay)
+        prompt_eval_ns = int((time.monotonic() - started) * 1e9)
+        context = list(body.get("context") or [])
+        prompt_tokens = max(1, len(body["prompt"]) // 4)
+
+        def final(eval_started):
+            return {
+                "model": body.get("model"),
+                "done": True,
+                "done_reason": "stop",
+                "context": context + list(range(prompt_tokens + len(steps))),
+                "total_duration": int((time.monotonic() - started) * 1e9),
+                "load_duration": 0,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": prompt_eval_ns,
+                "eval_count": len(steps),
+                "eval_duration": int((time.monotonic() - eval_started) * 1e9)
+            }
+
+        eval_started = time.monotonic()
+        if body.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for delay, token in steps:
+                time.sleep(delay)
+                self._chunk({"model": body.get("model"), "response": token, "done": False})
+            self._chunk(dict(final(eval_started), response=""))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            time.sleep(sum(delay for delay, _ in steps))
+            self._json(dict(final(eval_started), response="".join(token for _, token in steps)))
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # İstemcinin (proxy) bağlantıyı kapatması normal; traceback basma
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def make_server(port=0, config=None):
+    handler = type("Handler", (FakeOllamaHandler,), {"config": config or FakeOllamaConfig()})
+    server = FakeOllamaServer(("127.0.0.1", port), handler)
+    return server
+
+
+def start_fake_ollama(port=0, config=None):
+    """Sunucuyu arka plan thread'inde başlat; (server, "http://127.0.0.1:port") döndürür"""
+    server = make_server(port, config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sahte Ollama sunucusu")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--prompt-eval-delay", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=32)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--replay", help="TRAFFIC_RECORD_PATH ile kaydedilmiş trafik dosyası (.jsonl / .jsonl.gz)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay hız çarpanı (2 = iki kat hızlı)")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        recordings = load_recordings(args.replay)
+        config = ReplayConfig(recordings, args.speed)
+        description = f"replay {args.replay}: {len(recordings)} kayıt, x{args.speed:g}"
+    else:
+        config = FakeOllamaConfig(args.prompt_eval_delay, args.token_delay, args.tokens, args.error_rate, args.seed)
+        description = (f"prompt {args.prompt_eval_delay}s, token {args.token_delay}s x {args.tokens}, "
+                       f"hata %{args.error_rate * 100:g}")
+    server = make_server(args.port, config)
+    print(f"🧪 Sahte Ollama: http://127.0.0.1:{args.port} ({description})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import asyncio
+import os
+import threading
+import time
+
+# Arka plan sağlık yoklaması konfigürasyonu
+HEALTH_POLL_INTERVAL = float(os.getenv('HEALTH_POLL_INTERVAL', 5))
+HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', 5))
+# Model ağırlıklarının diskten yüklenmesi dakikalar sürebilir
+MODEL_WARMUP_TIMEOUT = float(os.getenv('MODEL_WARMUP_TIMEOUT', 300))
+# Bu kadar yoklama aralığı boyunca güncellenmeyen snapshot bayat sayılır
+HEALTH_STALE_AFTER = 3
+
+
+def model_tag(name):
+    """Ollama'nın /api/ps'te gösterdiği ad ("llama3" -> "llama3:latest")"""
+    return name if ':' in name else name + ':latest'
+
+
+def loaded_models(response):
+    """/api/ps yanıtındaki yüklü modeller; endpoint yoksa (eski Ollama) None"""
+    if response.status_code != 200:
+        return None
+    return {m.get("name") or m.get("model") for m in response.json().get("models", [])}
+
+
+class _PollerBase:
+    """Backend durumunu ve model listesini aralıklarla yenileyip bellekte tutar"""
+
+    def __init__(self, pool, model=None, keep_alive=None, interval=HEALTH_POLL_INTERVAL,
+                 timeout=HEALTH_PROBE_TIMEOUT, warmup_timeout=MODEL_WARMUP_TIMEOUT):
+        self.pool = pool
+        self.model = model            # Verilirse backend'ler bu modeli bellekte tutacak şekilde ısıtılır
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self.timeout = timeout
+        self.warmup_timeout = warmup_timeout
+        self._warming = set()
+        if model:
+            # Model bellekte olduğu doğrulanana kadar backend'ler soğuk sayılır
+            for backend in pool.backends:
+                backend.ready = False
+        self._status = [{"host": b.host, "ollama": "unknown"} for b in pool.backends]
+        self._models = None      # Son başarılı /api/tags gövdesi
+        self._models_updated = None
+        self._updated = None     # Son yoklamanın bittiği an (monotonic)
+        self._last_error = None
+        self._polls = 0
+        self._lock = threading.Lock()
+
+    def _probe_result(self, backend, response=None, error=None, loaded=None):
+        """Tek backend'in yoklama sonucu; havuzdaki sağlık durumunu da günceller"""
+        status = {"host": backend.host, "ollama": "disconnected"}
+        models = None
+        if error is not None:
+            status["error"] = str(error)
+        elif response.status_code != 200:
+            status["error"] = f"HTTP {response.status_code}"
+        else:
+            status["ollama"] = "connected"
+            try:
+                models = response.json()
+            except ValueError as e:
+                status["error"] = f"Geçersiz /api/tags yanıtı: {str(e)}"
+
+        # Başarısız yoklama backend'i düşürür; başarılı yoklama soğuma süresini kısaltmaz
+        if status["ollama"] == "connected":
+            self.pool.mark_up(backend)
+        else:
+            self.pool.mark_down(backend)
+
+        if self.model:
+            # Bağlantı koptuysa ya da model bellekten düştüyse (Ollama yeniden başladı) yeniden ısıt
+            if status["ollama"] != "connected" or loaded is False:
+                backend.ready = False
+            elif loaded:
+                backend.ready = True
+        return status, models
+
+    def _is_loaded(self, ps_response):
+        loaded = loaded_models(ps_response)
+        if loaded is None:
+            return None
+        return self.model in loaded or model_tag(self.model) in loaded
+
+    def _needs_warmup(self, backend):
+        """Isıtma başlatılacaksa backend'i ısınanlara ekleyip True döndür"""
+        with self._lock:
+            if not self.model or backend.ready or backend in self._warming or not backend.healthy():
+                return False
+            self._warming.add(backend)
+            return True
+
+    def _warmup_payload(self):
+        # Boş prompt modeli sadece belleğe yükler, token üretmez
+        payload = {"model": self.model}
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def _warmup_done(self, backend, started, error=None):
+        with self._lock:
+            self._warming.discard(backend)
+            if error is not None:
+                self._last_error = {"error": f"{backend.host}: model ısıtılamadı: {str(error)}", "at": time.time()}
+        if error is None:
+            backend.ready = True
+            print(f"✅ Model hazır: {self.model} @ {backend.host} ({time.monotonic() - started:.1f} sn)")
+        else:
+            print(f"⚠️ Model ısıtılamadı: {backend.host}: {str(error)}")
+
+    def _model_state(self, backend):
+        if not self.model or backend.ready:
+            return "ready"
+        return "loading" if backend in self._warming else "cold"
+
+    def _apply(self, results):
+        statuses = [status for status, _ in results]
+        models = next((m for _, m in results if m is not None), None)
+        errors = [f"{s['host']}: {s['error']}" for s in statuses if "error" in s]
+        with self._lock:
+            self._status = statuses
+            if models is not None:
+                self._models = models
+                self._models_updated = time.monotonic()
+            if errors:
+                self._last_error = {"error": "; ".join(errors), "at": time.time()}
+            self._updated = time.monotonic()
+            self._polls += 1
+
+    def age(self):
+        """Son yoklamadan bu yana geçen süre (sn); henüz yoklanmadıysa None"""
+        with self._lock:
+            updated = self._updated
+        return None if updated is None else time.monotonic() - updated
+
+    def health(self):
+        """Son snapshot'tan sağlık raporu; Ollama'ya istek atmaz"""
+        age = self.age()
+        with self._lock:
+            backends = [dict(s) for s in self._status]
+            for status, backend in zip(backends, self.pool.backends):
+                status["model_state"] = self._model_state(backend)
+            last_error = self._last_error
+            polls = self._polls
+
+        connected = any(s["ollama"] == "connected" for s in backends)
+        # Hazır: en az bir backend bağlı ve model bellekte
+        ready = any(s["ollama"] == "connected" and s["model_state"] == "ready" for s in backends)
+        if age is None:
+            status = "starting"
+        elif age > self.interval * HEALTH_STALE_AFTER:
+            status = "stale"
+        elif ready:
+            status = "healthy"
+        else:
+            status = "warming" if connected else "unhealthy"
+
+        return {
+            "status": status,
+            "ready": ready,
+            "ollama": "connected" if connected else "disconnected",
+            "backends": backends,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "poll_interval": self.interval,
+            "polls": polls,
+            "last_error": last_error
+        }
+
+    def models(self):
+        """Son başarılı model listesi (yoksa None) ve yaşı"""
+        with self._lock:
+            models = self._models
+            updated = self._models_updated
+            last_error = self._last_error
+        if models is None:
+            return None
+        return dict(models, age_seconds=round(time.monotonic() - updated, 3), last_error=last_error)
+
+
+class HealthPoller(_PollerBase):
+    """Yoklamayı daemon thread'de yapar (Flask/gunicorn modu)"""
+
+    def __init__(self, pool, **kwargs):
+        super().__init__(pool, **kwargs)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _probe(self, backend):
+        try:
+            response = backend.client.tags(timeout=self.timeout)
+            loaded = None
+            if self.model and response.status_code == 200:
+                loaded = self._is_loaded(backend.client.get('/api/ps', timeout=self.timeout))
+            return self._probe_result(backend, response, loaded=loaded)
+        except Exception as e:
+            return self._probe_result(backend, error=e)
+
+    def poll_once(self):
+        self._apply([self._probe(backend) for backend in self.pool.backends])
+        for backend in self.pool.backends:
+            if self._needs_warmup(backend):
+                # Yükleme dakikalar sürebilir; yoklama döngüsünü bekletmesin
+                threading.Thread(target=self._warmup, args=(backend,), daemon=True).start()
+
+    def _warmup(self, backend):
+        print(f"🔥 Model ısıtılıyor: {self.model} @ {backend.host}")
+        started = time.monotonic()
+        try:
+            response = backend.client.generate(self._warmup_payload(), timeout=self.warmup_timeout)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+        except Exception as e:
+            self._warmup_done(backend, started, e)
+        else:
+            self._warmup_done(backend, started)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"⚠️ Sağlık yoklaması başarısız: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="health-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+class AsyncHealthPoller(_PollerBase):
+    """HealthPoller'ın asyncio karşılığı; backend'ler paralel yoklanır"""
+
+    def __init__(self, pool, **kwargs):
+        super().__init__(pool, **kwargs)
+        self._task = None
+        self._warmups = set()
+
+    async def _probe(self, backend):
+        try:
+            response = await backend.client.tags(timeout=self.timeout)
+            loaded = None
+            if self.model and response.status_code == 200:
+                loaded = self._is_loaded(await backend.client.get('/api/ps', timeout=self.timeout))
+            return self._probe_result(backend, response, loaded=loaded)
+        except Exception as e:
+            return self._probe_result(backend, error=e)
+
+    async def poll_once(self):
+        self._apply(await asyncio.gather(*(self._probe(b) for b in self.pool.backends)))
+        for backend in self.pool.backends:
+            if self._needs_warmup(backend):
+                task = asyncio.get_running_loop().create_task(self._warmup(backend))
+                self._warmups.add(task)
+                task.add_done_callback(self._warmups.discard)
+
+    async def _warmup(self, backend):
+        print(f"🔥 Model ısıtılıyor: {self.model} @ {backend.host}")
+        started = time.monotonic()
+        try:
+            response = await backend.client.generate(self._warmup_payload(), timeout=self.warmup_timeout)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+        except Exception as e:
+            self._warmup_done(backend, started, e)
+        else:
+            self._warmup_done(backend, started)
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"⚠️ Sağlık yoklaması başarısız: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        for task in list(self._warmups):
+            task.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
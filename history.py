@@ -0,0 +1,168 @@
+import asyncio
+import math
+import os
+import threading
+
+from structured_log import log
+
+# Oturum geçmişi için prompt token bütçesi (num_ctx'in yanıta yer bırakan kısmı)
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', 1536))
+HISTORY_KEEP_TURNS = int(os.getenv('HISTORY_KEEP_TURNS', 2))
+SUMMARY_MAX_TOKENS = int(os.getenv('SUMMARY_MAX_TOKENS', 256))
+
+# Tokenizer olmadan kaba tahmin: Türkçe metinde token başına ~3.5 karakter
+_CHARS_PER_TOKEN = 3.5
+_ROLE_LABELS = {"user": "Kullanıcı", "assistant": "Asistan"}
+
+
+def estimate_tokens(text):
+    """Metnin yaklaşık token sayısı"""
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def format_turns(messages):
+    return "\n".join(f"{_ROLE_LABELS[m['role']]}: {m['content']}" for m in messages)
+
+
+def summary_prompt(summary, messages):
+    """Önceki özet + yeni turlardan güncel özeti isteyen prompt"""
+    parts = ["Aşağıdaki konuşmayı, sonraki yanıtlar için gereken bilgileri "
+             "(isimler, kararlar, açık sorular) koruyarak kısa ve Türkçe özetle."]
+    if summary:
+        parts.append(f"Önceki özet:\n{summary}")
+    parts.append(f"Konuşma:\n{format_turns(messages)}")
+    parts.append("Özet:")
+    return "\n\n".join(parts)
+
+
+class _HistoryBase:
+    """Oturum prompt'unu token bütçesinde tutar; eski turlar arka planda özetlenir"""
+
+    def __init__(self, summarize, budget=HISTORY_TOKEN_BUDGET, keep_turns=HISTORY_KEEP_TURNS):
+        self.summarize = summarize  # prompt -> özet metni (Ollama çağrısı)
+        self.budget = budget
+        self.keep_turns = keep_turns
+        self._lock = threading.Lock()
+        self._counters = {'reused': 0, 'compacted': 0, 'summaries': 0, 'summary_errors': 0}
+
+    def budget_for(self, options):
+        """İstek num_ctx belirtmişse bütçe onun %75'ini aşmaz"""
+        num_ctx = (options or {}).get("num_ctx")
+        if num_ctx:
+            return min(self.budget, int(num_ctx * 0.75))
+        return self.budget
+
+    def prepare(self, session, user_message, options=None):
+        """Bu tur için (prompt, context): context bütçedeyse aynen, değilse özet + son turlar"""
+        budget = self.budget_for(options)
+        message_tokens = estimate_tokens(user_message)
+        if session.context is None or len(session.context) + message_tokens <= budget:
+            if session.context is not None:
+                self._count('reused')
+            return user_message, session.context
+
+        # Context bütçeyi aştı: özet + sığan en yeni turlardan yeni bir prompt kur
+        summary = session.summary
+        remaining = budget - message_tokens - estimate_tokens(summary)
+        recent = []
+        for message in reversed(session.history[session.summarized:]):
+            cost = estimate_tokens(message["content"]) + 2
+            if cost > remaining:
+                break
+            recent.append(message)
+            remaining -= cost
+        recent.reverse()
+        if recent and recent[0]["role"] != "user":
+            recent = recent[1:]
+
+        parts = []
+        if summary:
+            parts.append(f"Önceki konuşmanın özeti:\n{summary}")
+        if recent:
+            parts.append(format_turns(recent))
+        parts.append(f"Kullanıcı: {user_message}\nAsistan:")
+
+        self._count('compacted')
+        log.info("history.compacted", session_id=session.id, context_tokens=len(session.context),
+                 prompt_tokens=budget - remaining)
+        return "\n\n".join(parts), None
+
+    def _pending(self, session):
+        """Özetlenecek (bitiş indeksi, mesajlar); geçmiş henüz bütçenin yarısına varmadıysa None"""
+        if session.summarizing:
+            return None
+        end = len(session.history) - 2 * self.keep_turns
+        messages = session.history[session.summarized:end]
+        if not messages:
+            return None
+        unsummarized = sum(estimate_tokens(m["content"]) for m in session.history[session.summarized:])
+        if unsummarized < self.budget // 2:
+            return None
+        session.summarizing = True
+        return end, messages
+
+    def _apply(self, session, end, summary):
+        session.summary = summary.strip()
+        session.summarized = end
+        self._count('summaries')
+
+    def _fail(self, error):
+        log.warning("history.summary_error", error=str(error))
+        self._count('summary_errors')
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['budget'] = self.budget
+        stats['keep_turns'] = self.keep_turns
+        return stats
+
+
+class HistoryManager(_HistoryBase):
+    """Özetleme isteğin yolunda değil, ayrı bir thread'de çalışır"""
+
+    def maybe_summarize(self, session):
+        with self._lock:
+            job = self._pending(session)
+        if job is not None:
+            threading.Thread(target=self._run, args=(session, *job), daemon=True).start()
+
+    def _run(self, session, end, messages):
+        try:
+            summary = self.summarize(summary_prompt(session.summary, messages))
+        except Exception as e:
+            self._fail(e)
+        else:
+            self._apply(session, end, summary)
+        finally:
+            session.summarizing = False
+
+
+class AsyncHistoryManager(_HistoryBase):
+    """HistoryManager'ın asyncio karşılığı; summarize bir coroutine fonksiyonudur"""
+
+    def __init__(self, summarize, **kwargs):
+        super().__init__(summarize, **kwargs)
+        self._tasks = set()
+
+    def maybe_summarize(self, session):
+        with self._lock:
+            job = self._pending(session)
+        if job is not None:
+            task = asyncio.get_running_loop().create_task(self._run(session, *job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, session, end, messages):
+        try:
+            summary = await self.summarize(summary_prompt(session.summary, messages))
+        except Exception as e:
+            self._fail(e)
+        else:
+            self._apply(session, end, summary)
+        finally:
+            session.summarizing = False
@@ -0,0 +1,183 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from near_duplicate import normalize_text
+
+# Hazır yanıtlı niyetler (selam, teşekkür...) için LLM'siz hızlı yol.
+# Niyetler düzenlenebilir bir JSON dosyasından okunur; dosya değişince yeniden yüklenir.
+INTENTS_PATH = os.getenv('INTENTS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intents.json'))
+# Dosyadaki "min_confidence" değerini ezer (boş = dosyadaki kullanılır)
+INTENT_MIN_CONFIDENCE = os.getenv('INTENT_MIN_CONFIDENCE', '')
+# Bundan uzun mesajlar hiçbir zaman "basit" sayılmaz
+INTENT_MAX_CHARS = 200
+INTENT_RELOAD_CHECK = 2   # sn; dosya değişikliği en fazla bu sıklıkla kontrol edilir
+
+
+class IntentMatch:
+    def __init__(self, name, response, confidence):
+        self.name = name
+        self.response = response
+        self.confidence = confidence
+
+    def as_dict(self):
+        return {"response": self.response, "intent": self.name, "confidence": round(self.confidence, 3)}
+
+
+class IntentMatcher:
+    """Kelime düzeyinde Aho-Corasick otomatı: tüm kalıplar mesajda tek geçişte bulunur.
+
+    Güven = niyetin kalıplarıyla örtülen kelime sayısı / mesajdaki (yok sayılanlar hariç)
+    kelime sayısı. "merhaba" 1.0, "merhaba bana bir python betiği yaz" 0.14 olur.
+    """
+
+    def __init__(self, intents, min_confidence=0.8, ignore=()):
+        self.min_confidence = min_confidence
+        self.ignore = {normalize_text(w) for w in ignore}
+        self.intents = {}
+        self._goto = [{}]      # düğüm -> {kelime: düğüm}
+        self._fail = [0]
+        self._output = [[]]    # düğüm -> [(niyet adı, kalıp uzunluğu)]
+        for intent in intents:
+            name = intent["name"]
+            self.intents[name] = intent
+            for pattern in intent.get("patterns", []):
+                words = normalize_text(pattern).split()
+                if words:
+                    self._add(words, name)
+        self._build()
+
+    def __len__(self):
+        return len(self.intents)
+
+    def _add(self, words, name):
+        node = 0
+        for word in words:
+            nxt = self._goto[node].get(word)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][word] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        self._output[node].append((name, len(words)))
+
+    def _build(self):
+        """Hata bağlantılarını BFS ile kur; her düğüm son ekindeki kalıpları da çıktılar"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(word, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def _scan(self, words):
+        """(niyet adı, başlangıç, bitiş) kalıp eşleşmeleri"""
+        node = 0
+        for i, word in enumerate(words):
+            while node and word not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(word, 0)
+            for name, length in self._output[node]:
+                yield name, i - length + 1, i + 1
+
+    def match(self, text):
+        """Güveni eşiği geçen en iyi niyet; yoksa None"""
+        if len(text) > INTENT_MAX_CHARS:
+            return None
+        words = normalize_text(text).split()
+        significant = [i for i, w in enumerate(words) if w not in self.ignore]
+        if not significant:
+            return None
+
+        covered = {}
+        for name, start, end in self._scan(words):
+            covered.setdefault(name, set()).update(range(start, end))
+        if not covered:
+            return None
+
+        best = None
+        for name, positions in covered.items():
+            confidence = sum(1 for i in significant if i in positions) / len(significant)
+            if best is None or confidence > best[1]:
+                best = (name, confidence)
+        name, confidence = best
+        intent = self.intents[name]
+        if confidence < intent.get("min_confidence", self.min_confidence):
+            return None
+        return IntentMatch(name, random.choice(intent["responses"]), confidence)
+
+
+def load_intents(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    min_confidence = float(INTENT_MIN_CONFIDENCE or data.get("min_confidence", 0.8))
+    return IntentMatcher(data.get("intents", []), min_confidence, data.get("ignore", ()))
+
+
+class IntentResponder:
+    """Niyet dosyasını yükler, değiştiğinde yeniden derler; yol boşsa kapalıdır"""
+
+    def __init__(self, path=INTENTS_PATH):
+        self.path = path
+        self.matcher = None
+        self._mtime = None
+        self._checked = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0}
+        self._reload()
+
+    def _reload(self):
+        if not self.path:
+            return
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        # Hatalı dosya da kaydedilir; düzeltilip yeniden kaydedilene kadar tekrar okunmaz
+        self._mtime = mtime
+        try:
+            self.matcher = load_intents(self.path)
+            print(f"🧭 Niyetler yüklendi: {len(self.matcher)} niyet ({self.path})")
+        except (OSError, ValueError, KeyError) as e:
+            # Hatalı düzenlemede eski otomat kullanılmaya devam eder
+            print(f"⚠️ Niyet dosyası okunamadı: {str(e)}")
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked < INTENT_RELOAD_CHECK:
+            return
+        with self._lock:
+            if now - self._checked >= INTENT_RELOAD_CHECK:
+                self._checked = now
+                self._reload()
+
+    def respond(self, text):
+        """Yüksek güvenli niyet eşleşmesi (IntentMatch) ya da None"""
+        self._maybe_reload()
+        matcher = self.matcher
+        if matcher is None:
+            return None
+        match = matcher.match(text)
+        with self._lock:
+            self._counters['hits' if match else 'misses'] += 1
+        return match
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        total = counters['hits'] + counters['misses']
+        return dict(counters,
+                    enabled=self.matcher is not None,
+                    intents=len(self.matcher) if self.matcher else 0,
+                    hit_rate=round(counters['hits'] / total, 3) if total else 0.0)
@@ -0,0 +1,266 @@
+import bisect
+import threading
+
+# Prometheus metin formatında /metrics; ek bağımlılık gerektirmeyen küçük bir kayıt defteri
+
+# Saniye cinsinden gecikme kovaları (ilk token'dan uzun üretimlere kadar)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} etiketleri {self.labelnames} olmalı, verilen: {tuple(labels)}")
+        return tuple(labels[n] for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [kova sayaçları..., +Inf], toplam
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def _samples(self, key, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrikleri tutar ve Prometheus text exposition formatında döker"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+REGISTRY = Registry()
+
+# Proxy tarafı
+HTTP_REQUESTS = REGISTRY.counter(
+    'chatbot_http_requests_total', 'Endpoint ve durum koduna göre HTTP istekleri',
+    ('endpoint', 'method', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'chatbot_http_request_duration_seconds', 'Yanıt başlığına kadar geçen süre (stream gövdesi hariç)',
+    ('endpoint', 'method'))
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    'chatbot_http_requests_in_flight', 'İşlenmekte olan HTTP istekleri')
+
+INTENT_RESPONSES = REGISTRY.counter(
+    'chatbot_intent_responses_total', "Ollama'ya gitmeden hazır yanıtlanan mesajlar", ('intent',))
+
+# Upstream (Ollama) tarafı
+GENERATIONS = REGISTRY.counter(
+    'chatbot_generations_total', 'Sonuçlanan Ollama üretimleri', ('model', 'backend', 'outcome'))
+GENERATIONS_IN_FLIGHT = REGISTRY.gauge(
+    'chatbot_generations_in_flight', "Ollama'da süren üretimler", ('backend',))
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    'chatbot_time_to_first_token_seconds', "Ollama'ya istekten ilk token'a kadar geçen süre",
+    ('model', 'backend'))
+GENERATION_LATENCY = REGISTRY.histogram(
+    'chatbot_generation_duration_seconds', 'Proxy tarafından ölçülen toplam üretim süresi',
+    ('model', 'backend'))
+# İstemcisi kalmadığı için yarıda kesilen üretimlerin boşa harcanmayan (tahmini) işi
+ABORTED_TOKENS_SAVED = REGISTRY.counter(
+    'chatbot_aborted_tokens_saved_total', 'İptal edilen üretimlerde üretilmeyen tahmini token', ('model',))
+ABORTED_SECONDS_SAVED = REGISTRY.counter(
+    'chatbot_aborted_seconds_saved_total', "İptal edilen üretimlerin Ollama'da harcamadığı tahmini süre",
+    ('model',))
+
+# Ollama'nın kendi raporladığı zamanlamalar (tokens/s = rate(tokens) / rate(seconds))
+EVAL_TOKENS = REGISTRY.counter(
+    'ollama_eval_tokens_total', 'Üretilen token sayısı (eval_count)', ('model',))
+EVAL_SECONDS = REGISTRY.counter(
+    'ollama_eval_duration_seconds_total', 'Token üretimine harcanan süre (eval_duration)', ('model',))
+PROMPT_EVAL_TOKENS = REGISTRY.counter(
+    'ollama_prompt_eval_tokens_total', 'İşlenen prompt token sayısı (prompt_eval_count)', ('model',))
+PROMPT_EVAL_SECONDS = REGISTRY.counter(
+    'ollama_prompt_eval_duration_seconds_total', 'Prompt işleme süresi (prompt_eval_duration)', ('model',))
+LOAD_SECONDS = REGISTRY.counter(
+    'ollama_load_duration_seconds_total', 'Model yükleme süresi (load_duration)', ('model',))
+EVAL_RATE = REGISTRY.histogram(
+    'ollama_eval_tokens_per_second', 'Üretim başına token/sn (eval_count / eval_duration)',
+    ('model',), TOKENS_PER_SECOND_BUCKETS)
+PROMPT_EVAL_RATE = REGISTRY.histogram(
+    'ollama_prompt_eval_tokens_per_second', 'Üretim başına prompt token/sn', ('model',),
+    TOKENS_PER_SECOND_BUCKETS + (1000, 2000, 5000))
+
+# Kaynak durumu (her scrape'te güncellenir)
+BACKEND_HEALTHY = REGISTRY.gauge('chatbot_backend_healthy', 'Backend rotasyonda mı (1/0)', ('backend',))
+BACKEND_IN_FLIGHT = REGISTRY.gauge('chatbot_backend_in_flight', 'Backend başına süren istekler', ('backend',))
+ADMISSION_IN_FLIGHT = REGISTRY.gauge('chatbot_admission_in_flight', 'Kabul edilmiş süren üretimler')
+ADMISSION_QUEUED = REGISTRY.gauge('chatbot_admission_queued', 'Slot bekleyen istekler')
+LOG_QUEUED = REGISTRY.gauge('chatbot_log_queued', 'Yazılmayı bekleyen log kayıtları')
+LOG_DROPPED = REGISTRY.counter('chatbot_log_dropped_total', 'Kuyruk dolu ya da yazılamadığı için düşürülen log kayıtları')
+# Logger'ın kümülatif düşürme sayacının son aktarılan değeri (counter'a sadece fark eklenir)
+_LOG_DROPPED_SEEN = 0
+_LOG_DROPPED_LOCK = threading.Lock()
+
+# Model başına tamamlanan üretimlerin hareketli ortalaması: (eval_count, token/sn)
+_TYPICAL = {}
+_TYPICAL_LOCK = threading.Lock()
+_TYPICAL_WEIGHT = 0.1
+
+
+def observe_ollama_stats(model, stats):
+    """Ollama'nın son stream satırındaki zamanlamaları (nanosaniye) metriklere yaz"""
+    eval_count = stats.get("eval_count") or 0
+    eval_ns = stats.get("eval_duration") or 0
+    prompt_count = stats.get("prompt_eval_count") or 0
+    prompt_ns = stats.get("prompt_eval_duration") or 0
+
+    EVAL_TOKENS.inc(eval_count, model=model)
+    EVAL_SECONDS.inc(eval_ns / 1e9, model=model)
+    PROMPT_EVAL_TOKENS.inc(prompt_count, model=model)
+    PROMPT_EVAL_SECONDS.inc(prompt_ns / 1e9, model=model)
+    LOAD_SECONDS.inc((stats.get("load_duration") or 0) / 1e9, model=model)
+    if eval_count and eval_ns:
+        EVAL_RATE.observe(eval_count / (eval_ns / 1e9), model=model)
+        _update_typical(model, eval_count, eval_count / (eval_ns / 1e9))
+    if prompt_count and prompt_ns:
+        PROMPT_EVAL_RATE.observe(prompt_count / (prompt_ns / 1e9), model=model)
+
+
+def _update_typical(model, eval_count, rate):
+    with _TYPICAL_LOCK:
+        previous = _TYPICAL.get(model)
+        if previous is None:
+            _TYPICAL[model] = (eval_count, rate)
+        else:
+            w = _TYPICAL_WEIGHT
+            _TYPICAL[model] = (previous[0] + w * (eval_count - previous[0]), previous[1] + w * (rate - previous[1]))
+
+
+def observe_aborted(model, backend, generated, options=None):
+    """İptal edilen üretimi say; kalan token'ları num_predict ya da ortalama yanıt uzunluğundan tahmin et"""
+    GENERATIONS.inc(model=model, backend=backend, outcome="aborted")
+    with _TYPICAL_LOCK:
+        typical_count, rate = _TYPICAL.get(model, (0, 0))
+    expected = (options or {}).get("num_predict") or 0
+    if expected <= 0:
+        expected = typical_count
+    saved = max(expected - generated, 0)
+    ABORTED_TOKENS_SAVED.inc(round(saved), model=model)
+    if saved and rate:
+        ABORTED_SECONDS_SAVED.inc(saved / rate, model=model)
+
+
+def update_resource_gauges(backends, admission):
+    """Backend havuzu ve kabul kontrolü anlık durumunu gauge'lara aktar"""
+    for backend in backends.stats():
+        BACKEND_HEALTHY.set(int(backend["healthy"]), backend=backend["host"])
+        BACKEND_IN_FLIGHT.set(backend["in_flight"], backend=backend["host"])
+    stats = admission.stats()
+    ADMISSION_IN_FLIGHT.set(stats["in_flight"])
+    ADMISSION_QUEUED.set(stats["queued_now"])
+
+
+def update_log_gauges(logger):
+    """Log kuyruğu doluluğu ve düşürülen kayıtlar"""
+    global _LOG_DROPPED_SEEN
+    stats = logger.stats()
+    LOG_QUEUED.set(stats["queued"])
+    with _LOG_DROPPED_LOCK:
+        dropped = stats["dropped"] - _LOG_DROPPED_SEEN
+        _LOG_DROPPED_SEEN = stats["dropped"]
+    LOG_DROPPED.inc(max(0, dropped))
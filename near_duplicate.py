@@ -0,0 +1,162 @@
+import os
+import random
+import threading
+import zlib
+from collections import OrderedDict
+
+# Near-duplicate önbellek konfigürasyonu (0 = kapalı)
+NEAR_DUP_THRESHOLD = float(os.getenv('NEAR_DUP_THRESHOLD', 0.9))
+NEAR_DUP_MAX_ENTRIES = int(os.getenv('NEAR_DUP_MAX_ENTRIES', 1024))
+
+# Türkçe karakterleri ASCII karşılığına katla ("nasılsın" == "nasilsin")
+_TR_FOLD = str.maketrans({
+    'ı': 'i', 'İ': 'i', 'I': 'i',
+    'ş': 's', 'Ş': 's',
+    'ğ': 'g', 'Ğ': 'g',
+    'ç': 'c', 'Ç': 'c',
+    'ö': 'o', 'Ö': 'o',
+    'ü': 'u', 'Ü': 'u',
+    'â': 'a', 'î': 'i', 'û': 'u'
+})
+
+# Anlamı tersine çeviren kelimeler; bunlar farklıysa prompt'lar benzer sayılmaz
+_NEGATIONS = frozenset({
+    'degil', 'yok', 'hayir', 'asla', 'hic', 'olmaz', 'olmadan',
+    'not', 'no', 'never', 'dont', 'doesnt', 'isnt', 'without'
+})
+
+_PRIME = (1 << 61) - 1
+
+
+def normalize_text(text):
+    """Büyük/küçük harf, noktalama ve Türkçe aksanlardan bağımsız metin"""
+    text = text.translate(_TR_FOLD).lower()
+    text = ''.join(ch if ch.isalnum() else ' ' for ch in text)
+    return ' '.join(text.split())
+
+
+def shingles(text):
+    """Kelimeler ve ardışık kelime çiftleri; tek harflik ek farkı kelimeyi değiştirir"""
+    words = normalize_text(text).split()
+    result = set(words)
+    result.update(f'{a} {b}' for a, b in zip(words, words[1:]))
+    return result
+
+
+def guard_terms(text):
+    """Sayılar ve olumsuzluk kelimeleri: eşleşme için birebir aynı olmalı"""
+    return frozenset(word for word in normalize_text(text).split()
+                     if word in _NEGATIONS or any(ch.isdigit() for ch in word))
+
+
+class MinHasher:
+    """Sabit tohumlu (a*x + b) mod p permütasyonlarıyla MinHash imzası"""
+
+    def __init__(self, num_perm=64, seed=1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, text):
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles(text)]
+        if not hashes:
+            return None
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms)
+
+
+def similarity(sig_a, sig_b):
+    """İki imzadan tahmini Jaccard benzerliği"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class NearDuplicateIndex:
+    """LSH bantlarıyla benzer prompt'ları bulan, boyutu sınırlı önbellek"""
+
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD, max_entries=NEAR_DUP_MAX_ENTRIES,
+                 num_perm=64, bands=16):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._hasher = MinHasher(num_perm)
+
+        self._entries = OrderedDict()  # (namespace, normalize metin) -> (imza, koruma, değer)
+        self._buckets = {}             # (namespace, bant no, bant değeri) -> entry id'leri
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def _band_keys(self, namespace, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield (namespace, band, signature[start:start + self.rows])
+
+    def _remove(self, entry_id):
+        signature = self._entries.pop(entry_id)[0]
+        for band_key in self._band_keys(entry_id[0], signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def add(self, namespace, text, value):
+        if not self.enabled:
+            return
+        signature = self._hasher.signature(text)
+        if signature is None:
+            return
+        entry_id = (namespace, normalize_text(text))
+
+        with self._lock:
+            if entry_id in self._entries:
+                self._remove(entry_id)
+            self._entries[entry_id] = (signature, guard_terms(text), value)
+            for band_key in self._band_keys(namespace, signature):
+                self._buckets.setdefault(band_key, set()).add(entry_id)
+            self._counters['stores'] += 1
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def lookup(self, namespace, text):
+        """Eşik üstündeki en benzer kaydı (değer, benzerlik) olarak döndür; yoksa None"""
+        if not self.enabled:
+            return None
+        signature = self._hasher.signature(text)
+        if signature is None:
+            return None
+        guard = guard_terms(text)
+
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(namespace, signature):
+                candidates.update(self._buckets.get(band_key, ()))
+
+            best_id, best_score = None, 0.0
+            for entry_id in candidates:
+                entry_signature, entry_guard, _ = self._entries[entry_id]
+                if entry_guard != guard:
+                    continue
+                score = similarity(signature, entry_signature)
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None or best_score < self.threshold:
+                self._counters['misses'] += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self._counters['hits'] += 1
+            return self._entries[best_id][2], best_score
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+        stats['threshold'] = self.threshold
+        return stats
@@ -0,0 +1,151 @@
+import os
+import socket
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Bağlantı havuzu konfigürasyonu
+OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+# Birden fazla Ollama VM'i: virgülle ayrılmış liste (yoksa tek OLLAMA_HOST)
+OLLAMA_HOSTS = [h.strip() for h in os.getenv('OLLAMA_HOSTS', OLLAMA_HOST).split(',') if h.strip()]
+POOL_SIZE = int(os.getenv('OLLAMA_POOL_SIZE', 10))
+CONNECT_TIMEOUT = float(os.getenv('OLLAMA_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('OLLAMA_READ_TIMEOUT', 60))
+
+
+class OllamaError(Exception):
+    """Ollama'nın hata durumu ya da hata satırı döndürdüğü üretimler; status: HTTP kodu (varsa)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class OllamaClient:
+    """Keep-alive bağlantı havuzunu paylaşan, thread-safe Ollama istemcisi"""
+
+    def __init__(self, host=OLLAMA_HOST, pool_size=POOL_SIZE,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        self.host = host.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        # Tek adapter = tek sınırlı havuz; pool_block ile havuz dolunca
+        # yeni soket açmak yerine boş bağlantı beklenir
+        self._adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=0
+        )
+        # Session'lar thread başına, havuz (adapter) herkes için ortak
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            self._local.session = session
+        return session
+
+    def _timeout(self, read_timeout):
+        return (self.connect_timeout, read_timeout if read_timeout is not None else self.read_timeout)
+
+    def url(self, path):
+        return self.host + path
+
+    def post(self, path, payload, stream=False, timeout=None):
+        """Ollama'ya JSON POST at (ör. /api/generate)"""
+        return self._session().post(self.url(path), json=payload, stream=stream,
+                                    timeout=self._timeout(timeout))
+
+    def get(self, path, timeout=None):
+        """Ollama'dan GET (ör. /api/tags)"""
+        return self._session().get(self.url(path), timeout=self._timeout(timeout))
+
+    def generate(self, payload, stream=False, timeout=None):
+        return self.post('/api/generate', payload, stream=stream, timeout=timeout)
+
+    def tags(self, timeout=None):
+        return self.get('/api/tags', timeout=timeout)
+
+    def close(self):
+        self._adapter.close()
+
+
+def interrupt(response):
+    """Başka thread'de okunan stream yanıtının soketini kapat: bekleyen okuma hemen biter,
+    Ollama da bağlantı kapanınca üretimi durdurur"""
+    connection = getattr(response.raw, '_connection', None)
+    sock = getattr(connection, 'sock', None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Süreç genelinde paylaşılan istemciyi döndür"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient()
+    return _client
+
+
+class AsyncOllamaClient:
+    """ASGI modu için httpx tabanlı, await edilebilir Ollama istemcisi"""
+
+    def __init__(self, host=OLLAMA_HOST, pool_size=POOL_SIZE,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        import httpx  # Sadece async modda gerekli
+
+        self.host = host.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        # Havuz doluysa istek event loop'u bloklamadan boş bağlantı bekler
+        self._client = httpx.AsyncClient(
+            base_url=self.host,
+            limits=httpx.Limits(max_connections=pool_size,
+                                max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=read_timeout)
+        )
+
+    def _timeout(self, read_timeout):
+        import httpx
+
+        if read_timeout is None:
+            return httpx.USE_CLIENT_DEFAULT
+        return httpx.Timeout(read_timeout, connect=self.connect_timeout, pool=read_timeout)
+
+    async def post(self, path, payload, timeout=None):
+        return await self._client.post(path, json=payload, timeout=self._timeout(timeout))
+
+    async def get(self, path, timeout=None):
+        return await self._client.get(path, timeout=self._timeout(timeout))
+
+    def stream(self, path, payload, timeout=None):
+        """`async with` ile kullanılan streaming POST"""
+        return self._client.stream('POST', path, json=payload, timeout=self._timeout(timeout))
+
+    async def generate(self, payload, timeout=None):
+        return await self.post('/api/generate', payload, timeout=timeout)
+
+    def stream_generate(self, payload, timeout=None):
+        return self.stream('/api/generate', payload, timeout=timeout)
+
+    async def tags(self, timeout=None):
+        return await self.get('/api/tags', timeout=timeout)
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -44,7 +44,8 @@ cd local-llm
 
 # Flask uygulamasını başlat
 echo "🌐 Flask uygulaması başlatılıyor..."
-nohup python3 app_minimal.py > /tmp/flask.log 2>&1 &
+# İstek logları döndürülen JSON dosyasına; stdout'ta sadece başlangıç mesajları kalır
+LOG_PATH=/tmp/chatbot.log nohup python3 app_minimal.py > /tmp/flask.log 2>&1 &
 
 echo "✅ Kurulum tamamlandı!"
 echo "📍 VM IP adresi alınıyor..."
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Yanıt önbelleği konfigürasyonu
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 256))
+CACHE_TTL = float(os.getenv('CACHE_TTL', 3600))
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', '')  # Boş = disk katmanı kapalı
+CACHE_DB_MAX_ENTRIES = int(os.getenv('CACHE_DB_MAX_ENTRIES', 10000))
+
+
+def normalize_prompt(prompt):
+    """Anahtar için prompt'u sadeleştir (baştaki/sondaki ve tekrarlı boşluklar)"""
+    return ' '.join(prompt.split())
+
+
+def cache_key(model, prompt, options=None):
+    """(model, normalize prompt, üretim seçenekleri) için sabit anahtar"""
+    raw = json.dumps([model, normalize_prompt(prompt), options or {}],
+                     sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def is_cacheable(options=None, opt_in=None):
+    """Sadece deterministik istekler önbelleğe alınır: temperature 0 veya açık onay.
+    opt_in istekteki "cache" alanıdır: True/False açık tercih, None (gönderilmemiş) = temperature'a göre"""
+    if opt_in is not None:
+        return bool(opt_in)
+    return (options or {}).get('temperature') == 0
+
+
+class ResponseCache:
+    """Bellekte LRU + isteğe bağlı SQLite disk katmanı, TTL ve boyut sınırlı"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL,
+                 db_path=CACHE_DB_PATH, db_max_entries=CACHE_DB_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_max_entries = db_max_entries
+
+        self._memory = OrderedDict()  # key -> (oluşturulma zamanı, değer)
+        self._lock = threading.Lock()
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+            self._db.commit()
+
+    def _expired(self, created, now):
+        return self.ttl > 0 and now - created > self.ttl
+
+    def get(self, key):
+        """Önce bellek, sonra disk; bulunamazsa None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+                self._counters['expired'] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, created FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = json.loads(row[0]), row[1]
+                    if not self._expired(created, now):
+                        self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+                        self._db.commit()
+                        # Diskten gelen kaydı sıcak katmana terfi ettir
+                        self._put_memory(key, created, value)
+                        self._counters['disk_hits'] += 1
+                        return value
+                    self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    self._db.commit()
+                    self._counters['expired'] += 1
+
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, now, value)
+            self._counters['stores'] += 1
+
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)',
+                    (key, json.dumps(value, ensure_ascii=False), now, now)
+                )
+                # En uzun süredir erişilmeyen kayıtları at
+                cursor = self._db.execute(
+                    'DELETE FROM responses WHERE key IN ('
+                    'SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+                    (self.db_max_entries,)
+                )
+                self._counters['evictions'] += max(cursor.rowcount, 0)
+                self._db.commit()
+
+    def _put_memory(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            if self._db is not None:
+                stats['disk_entries'] = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,129 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Sohbet oturumu konfigürasyonu
+SESSION_MAX_COUNT = int(os.getenv('SESSION_MAX_COUNT', 1000))
+SESSION_MAX_BYTES = int(os.getenv('SESSION_MAX_BYTES', 64 * 1024 * 1024))
+SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL', 1800))
+SESSION_ID_MAX_LENGTH = 128
+
+_SESSION_ID = re.compile(r'[A-Za-z0-9_-]+')
+
+# Python list'indeki bir int'in yaklaşık bellek maliyeti (pointer + int nesnesi)
+_BYTES_PER_CONTEXT_TOKEN = 36
+
+
+def valid_session_id(session_id):
+    """İstemciden gelen oturum id'si: boş olmayan, sınırlı uzunlukta harf/rakam/-/_ metni"""
+    return (isinstance(session_id, str) and len(session_id) <= SESSION_ID_MAX_LENGTH
+            and _SESSION_ID.fullmatch(session_id) is not None)
+
+
+class Session:
+    """Tek bir sohbet: mesaj geçmişi + Ollama'nın döndürdüğü context token dizisi"""
+
+    def __init__(self, session_id, lock):
+        self.id = session_id
+        self.history = []        # [{"role": ..., "content": ...}]
+        self.context = None      # Son /api/generate yanıtındaki "context"
+        self.backend = None      # KV cache'in sıcak olduğu backend (affinity)
+        self.summary = ""        # history[:summarized] turlarının arka planda üretilen özeti
+        self.summarized = 0
+        self.summarizing = False
+        self.lock = lock         # Aynı oturumdaki turlar sırayla çalışır
+        self.last_used = time.monotonic()
+
+    def size(self):
+        text = sum(len(m["content"]) for m in self.history)
+        return text + len(self.context or ()) * _BYTES_PER_CONTEXT_TOKEN
+
+    def snapshot(self):
+        return {
+            "session_id": self.id,
+            "turns": len(self.history) // 2,
+            "context_tokens": len(self.context or ()),
+            "summarized_turns": self.summarized // 2,
+            "summary": self.summary,
+            "history": self.history
+        }
+
+
+class SessionStore:
+    """Bellek sınırlı, LRU ile boştaki oturumları atan oturum deposu"""
+
+    def __init__(self, lock_factory=threading.Lock, max_count=SESSION_MAX_COUNT,
+                 max_bytes=SESSION_MAX_BYTES, idle_ttl=SESSION_IDLE_TTL):
+        self.lock_factory = lock_factory
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'created': 0, 'evicted': 0, 'expired': 0}
+
+    def get_or_create(self, session_id=None):
+        """Varolan oturumu döndür; id yoksa ya da atılmışsa yeni oturum aç"""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = Session(session_id or uuid.uuid4().hex, self.lock_factory())
+                self._sessions[session.id] = session
+                self._counters['created'] += 1
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session.id)
+            return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def record(self, session, user_message, ai_response, context):
+        """Tamamlanan turu geçmişe ekle ve context'i güncelle"""
+        with self._lock:
+            before = session.size()
+            session.history.append({"role": "user", "content": user_message})
+            session.history.append({"role": "assistant", "content": ai_response})
+            if context is not None:
+                session.context = context
+            session.last_used = time.monotonic()
+            if self._sessions.get(session.id) is session:
+                self._bytes += session.size() - before
+                self._sessions.move_to_end(session.id)
+            self._evict()
+
+    def delete(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._bytes -= session.size()
+            return session is not None
+
+    def _drop_oldest(self, counter):
+        _, session = self._sessions.popitem(last=False)
+        self._bytes -= session.size()
+        self._counters[counter] += 1
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions and next(iter(self._sessions.values())).last_used < cutoff:
+            self._drop_oldest('expired')
+
+    def _evict(self):
+        # En uzun süredir kullanılmayan oturumlar önce gider
+        while self._sessions and (len(self._sessions) > self.max_count or self._bytes > self.max_bytes):
+            self._drop_oldest('evicted')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['active'] = len(self._sessions)
+            stats['bytes'] = self._bytes
+        stats['max_count'] = self.max_count
+        stats['max_bytes'] = self.max_bytes
+        return stats
@@ -0,0 +1,314 @@
+import asyncio
+import os
+import threading
+from contextlib import contextmanager
+
+# Aynı anahtarlı eşzamanlı istekleri tek üretimde birleştir (0 = kapalı)
+SINGLE_FLIGHT = os.getenv('SINGLE_FLIGHT', '1') != '0'
+
+
+class GenerationCancelled(Exception):
+    """Bütün takipçileri (istemcileri) ayrıldığı için durdurulan üretim"""
+
+    def __init__(self, message="İstemci kalmadı, üretim durduruldu"):
+        super().__init__(message)
+
+
+def detach_once(flight):
+    """flight.detach'i en fazla bir kez çağıran fonksiyon; yanıtın birden çok kapanış yolu
+    (üreteç finally'si, close(), çöp toplama) aynı takipçiyi iki kez düşürmesin"""
+    pending = [flight]
+
+    def release():
+        try:
+            flight = pending.pop()
+        except IndexError:
+            return
+        flight.detach()
+    return release
+
+
+class Flight:
+    """Süren tek bir upstream üretimi; token'ları biriktirip bekleyenlere dağıtır"""
+
+    def __init__(self, key):
+        self.key = key
+        self.tokens = []
+        self.result = None
+        self.error = None
+        self.done = False
+        self.cancelled = False
+        self.followers = 0
+        self._cancel_hook = None
+        self._cond = threading.Condition()
+
+    def attach(self):
+        """Yeni takipçi; üretim iptal edildiyse False (yeni üretim başlatılmalı)"""
+        with self._cond:
+            if self.cancelled:
+                return False
+            self.followers += 1
+            return True
+
+    def detach(self):
+        """Takipçi ayrıldı; bitmemiş üretimin son takipçisiyse üretim iptal edilir"""
+        with self._cond:
+            self.followers -= 1
+            if self.followers > 0 or self.done or self.cancelled:
+                return
+            self.cancelled = True
+            # Kanca kilit altında çağrılır ki cancel_hook'tan çıkılmışken tetiklenmesin
+            if self._cancel_hook is not None:
+                self._cancel_hook()
+
+    @contextmanager
+    def cancel_hook(self, callback):
+        """Blok süresince iptalde callback çağrılır (ör. upstream soketini kapatmak)"""
+        with self._cond:
+            if self.cancelled:
+                raise GenerationCancelled()
+            self._cancel_hook = callback
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._cancel_hook = None
+
+    def publish(self, token):
+        with self._cond:
+            self.tokens.append(token)
+            self._cond.notify_all()
+
+    def finish(self, result=None, error=None):
+        with self._cond:
+            self.result = result
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    def follow(self):
+        """Token'ları baştan itibaren ver; geç katılan da yanıtın tamamını alır"""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.tokens) and not self.done:
+                    self._cond.wait()
+                new_tokens = self.tokens[index:]
+                index += len(new_tokens)
+                finished = self.done and index >= len(self.tokens)
+            yield from new_tokens
+            if finished:
+                break
+        if self.error is not None:
+            raise self.error
+
+    def wait(self):
+        """Üretim bitene kadar bekle ve sonucu döndür"""
+        with self._cond:
+            while not self.done:
+                self._cond.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def wait_done(self, timeout):
+        """En fazla timeout sn bekle; üretim bittiyse True"""
+        with self._cond:
+            if not self.done:
+                self._cond.wait(timeout)
+            return self.done
+
+
+class SingleFlight:
+    """Anahtar başına tek upstream üretimi; işi arka plan thread'inde çalıştırır"""
+
+    def __init__(self, enabled=SINGLE_FLIGHT):
+        self.enabled = enabled
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {'leaders': 0, 'followers': 0, 'cancelled': 0}
+
+    def find(self, key):
+        """Anahtar için süren üretim varsa ona takipçi olarak bağlan"""
+        with self._lock:
+            flight = self._flights.get(key) if self.enabled else None
+            if flight is None or not flight.attach():
+                return None
+            self._counters['followers'] += 1
+            return flight
+
+    def join(self, key, work):
+        """Süren üretime bağlan ya da work(flight) ile yenisini başlat; (flight, lider mi).
+
+        Dönen flight'a takipçi olarak bağlanılmıştır; işi biten çağıran detach() etmelidir.
+        """
+        with self._lock:
+            flight = self._flights.get(key) if self.enabled else None
+            if flight is not None and flight.attach():
+                self._counters['followers'] += 1
+                return flight, False
+            flight = Flight(key)
+            flight.attach()
+            if self.enabled:
+                self._flights[key] = flight
+            self._counters['leaders'] += 1
+
+        # İşi isteği açan thread'e bağlamıyoruz: o istemci koparsa diğerleri etkilenmesin
+        threading.Thread(target=self._run, args=(flight, work), daemon=True).start()
+        return flight, True
+
+    def _run(self, flight, work):
+        try:
+            result = work(flight)
+        except Exception as e:
+            self._forget(flight)
+            flight.finish(error=e)
+        else:
+            self._forget(flight)
+            flight.finish(result=result)
+
+    def _forget(self, flight):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            if flight.cancelled:
+                self._counters['cancelled'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._flights)
+        stats['enabled'] = self.enabled
+        return stats
+
+
+class AsyncFlight:
+    """Flight'ın asyncio karşılığı (ASGI modu için)"""
+
+    def __init__(self, key):
+        self.key = key
+        self.tokens = []
+        self.result = None
+        self.error = None
+        self.done = False
+        self.cancelled = False
+        self.followers = 0
+        self.task = None
+        self.started = False
+        self._changed = asyncio.Event()
+
+    def attach(self):
+        if self.cancelled:
+            return False
+        self.followers += 1
+        return True
+
+    def detach(self):
+        """Son takipçi ayrıldıysa üretim task'ı iptal edilir; httpx akışı kapanınca Ollama durur"""
+        self.followers -= 1
+        if self.followers > 0 or self.done or self.cancelled:
+            return
+        self.cancelled = True
+        # Henüz başlamamış task iptal edilirse work hiç çalışmaz, temizliği (kabul slotu) de yapılmaz;
+        # o durumda _run başlarken iptali kendisi tetikler
+        if self.task is not None and self.started:
+            self.task.cancel()
+
+    def _notify(self):
+        # Bekleyenleri uyandır, sonraki değişiklik için yeni event kur
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, token):
+        self.tokens.append(token)
+        self._notify()
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done = True
+        self._notify()
+
+    async def follow(self):
+        index = 0
+        while True:
+            if index >= len(self.tokens) and not self.done:
+                await self._changed.wait()
+                continue
+            new_tokens = self.tokens[index:]
+            index += len(new_tokens)
+            for token in new_tokens:
+                yield token
+            if self.done and index >= len(self.tokens):
+                break
+        if self.error is not None:
+            raise self.error
+
+    async def wait(self):
+        while not self.done:
+            await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class AsyncSingleFlight:
+    """SingleFlight'ın asyncio karşılığı; iş event loop'ta ayrı bir task olarak çalışır"""
+
+    def __init__(self, enabled=SINGLE_FLIGHT):
+        self.enabled = enabled
+        self._flights = {}
+        self._tasks = set()
+        self._counters = {'leaders': 0, 'followers': 0, 'cancelled': 0}
+
+    def find(self, key):
+        flight = self._flights.get(key) if self.enabled else None
+        if flight is None or not flight.attach():
+            return None
+        self._counters['followers'] += 1
+        return flight
+
+    def join(self, key, work):
+        flight = self._flights.get(key) if self.enabled else None
+        if flight is not None and flight.attach():
+            self._counters['followers'] += 1
+            return flight, False
+        flight = AsyncFlight(key)
+        flight.attach()
+        if self.enabled:
+            self._flights[key] = flight
+        self._counters['leaders'] += 1
+
+        task = asyncio.get_running_loop().create_task(self._run(flight, work))
+        flight.task = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return flight, True
+
+    async def _run(self, flight, work):
+        flight.started = True
+        if flight.cancelled:
+            asyncio.current_task().cancel()
+        try:
+            result = await work(flight)
+        except asyncio.CancelledError:
+            self._forget(flight)
+            flight.finish(error=GenerationCancelled())
+        except Exception as e:
+            self._forget(flight)
+            flight.finish(error=e)
+        else:
+            self._forget(flight)
+            flight.finish(result=result)
+
+    def _forget(self, flight):
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        if flight.cancelled:
+            self._counters['cancelled'] += 1
+
+    def stats(self):
+        stats = dict(self._counters)
+        stats['in_flight'] = len(self._flights)
+        stats['enabled'] = self.enabled
+        return stats
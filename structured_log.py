@@ -0,0 +1,188 @@
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# İstek yolunu bloklamayan yapılandırılmış (JSON satırı) log.
+# log.info() sadece kuyruğa ekler; diske/stdout'a arka plan thread'i yazar.
+# Kuyruk doluysa kayıt beklemek yerine düşürülür ve sayılır.
+LOG_PATH = os.getenv('LOG_PATH', '')                     # Boş = stdout
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUPS = int(os.getenv('LOG_BACKUPS', 3))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+# Mesaj/yanıt metni bu orandaki isteklerde loglanır; diğerlerinde sadece uzunluk
+LOG_BODY_SAMPLE = float(os.getenv('LOG_BODY_SAMPLE', 0.1))
+LOG_BODY_MAX_CHARS = int(os.getenv('LOG_BODY_MAX_CHARS', 100))
+
+_REQUEST_ID = contextvars.ContextVar('request_id', default=None)
+_SAMPLED = contextvars.ContextVar('log_body_sampled', default=False)
+# Dışarıdan gelen X-Request-ID sadece bu biçimdeyse kullanılır
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+_BATCH = 256
+
+
+class StructuredLogger:
+    """Kuyruk + yazıcı thread'i; boyuta göre döndürülen dosya ya da stdout"""
+
+    def __init__(self, path=LOG_PATH, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS,
+                 queue_size=LOG_QUEUE_SIZE, body_sample=LOG_BODY_SAMPLE, body_max_chars=LOG_BODY_MAX_CHARS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.body_sample = body_sample
+        self.body_max_chars = body_max_chars
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._file = None
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {'written': 0, 'dropped': 0, 'rotations': 0, 'write_errors': 0}
+
+    # --- İstek bağlamı ---
+
+    def begin_request(self, request_id=None):
+        """Yeni istek: ID (geçerliyse istemcininki) ve gövde örneklemesi kararı; ID'yi döndürür"""
+        if not request_id or not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex[:16]
+        _REQUEST_ID.set(request_id)
+        _SAMPLED.set(random.random() < self.body_sample)
+        return request_id
+
+    def body(self, text):
+        """Örneklenen isteklerde kısaltılmış metin, diğerlerinde None (alan yazılmaz)"""
+        if not _SAMPLED.get() or text is None:
+            return None
+        return text[:self.body_max_chars]
+
+    # --- Kayıt ---
+
+    def info(self, event, **fields):
+        self._emit('info', event, fields)
+
+    def warning(self, event, **fields):
+        self._emit('warning', event, fields)
+
+    def error(self, event, **fields):
+        self._emit('error', event, fields)
+
+    def _emit(self, level, event, fields):
+        # İstek thread'inde sadece tuple kurulur; JSON ve I/O yazıcıda yapılır
+        record = (time.time(), level, event, _REQUEST_ID.get(), fields)
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._counters['dropped'] += 1
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    # --- Yazıcı thread'i ---
+
+    def _run(self):
+        while True:
+            records = [self._queue.get()]
+            # Biriken kayıtları tek yazma + flush ile boşalt
+            while len(records) < _BATCH:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in records
+            lines = ''.join(_format(r) for r in records if r is not None)
+            if lines:
+                self._write(lines, sum(1 for r in records if r is not None))
+            if stop:
+                return
+
+    def _write(self, data, count):
+        try:
+            stream = self._stream()
+            stream.write(data)
+            stream.flush()
+            if self._file is not None:
+                self._size += len(data.encode('utf-8'))
+                if self.max_bytes and self._size >= self.max_bytes:
+                    self._rotate()
+            with self._lock:
+                self._counters['written'] += count
+        except (OSError, ValueError):
+            with self._lock:
+                self._counters['write_errors'] += 1
+                self._counters['dropped'] += count
+
+    def _stream(self):
+        if not self.path:
+            return sys.stdout
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._size = self._file.tell()
+        return self._file
+
+    def _rotate(self):
+        """app.log -> app.log.1 -> ... -> app.log.N (en eskisi silinir)"""
+        self._file.close()
+        self._file = None
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        with self._lock:
+            self._counters['rotations'] += 1
+
+    def close(self, timeout=2):
+        """Kuyruktakileri yazıp thread'i durdur (süreç kapanırken)"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return dict(counters, queued=self._queue.qsize(), capacity=self._queue.maxsize,
+                    path=self.path or 'stdout', body_sample=self.body_sample)
+
+
+# Uygulama ve yardımcı modüllerin (history, backend_pool) paylaştığı logger
+log = StructuredLogger()
+
+
+def _format(record):
+    ts, level, event, request_id, fields = record
+    entry = {
+        "ts": datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec='milliseconds'),
+        "level": level,
+        "event": event
+    }
+    if request_id is not None:
+        entry["request_id"] = request_id
+    for key, value in fields.items():
+        if value is not None:
+            entry[key] = value
+    return json.dumps(entry, ensure_ascii=False, default=str) + '\n'
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Modüller depo kökünde düz duruyor; testler paket kurulumu olmadan onları import eder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_ollama import FakeOllamaConfig, start_fake_ollama  # noqa: E402
+
+
+@pytest.fixture
+def fake_ollama():
+    """Hızlı, deterministik sahte Ollama; (config, url) döndürür"""
+    config = FakeOllamaConfig(prompt_eval_delay=0, token_delay=0, tokens=4, seed=1)
+    server, url = start_fake_ollama(config=config)
+    yield config, url
+    server.shutdown()
+    server.server_close()
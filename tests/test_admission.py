@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AsyncAdmissionController, Overloaded
+
+
+def test_admits_up_to_capacity_then_rejects_when_queue_full():
+    admission = AdmissionController(2, max_queue=0, max_queue_time=0.1)
+    admission.admit()
+    admission.admit()
+
+    with pytest.raises(Overloaded) as excinfo:
+        admission.admit()
+    assert excinfo.value.retry_after >= 1
+    assert admission.stats()["rejected"] == 1
+
+
+def test_queued_request_gets_the_released_slot():
+    admission = AdmissionController(1, max_queue=1, max_queue_time=5)
+    ticket = admission.admit()
+    admitted = threading.Event()
+
+    def waiter():
+        admission.admit()
+        admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    while admission.stats()["queued_now"] == 0:
+        time.sleep(0.001)
+    admission.release(ticket)
+    thread.join(5)
+
+    assert admitted.is_set()
+    # Slot bekleyene devredildi; toplam süren üretim sayısı değişmedi
+    assert admission.stats()["in_flight"] == 1
+
+
+def test_queue_timeout_raises_overloaded():
+    admission = AdmissionController(1, max_queue=1, max_queue_time=0.05)
+    admission.admit()
+
+    with pytest.raises(Overloaded):
+        admission.admit()
+    stats = admission.stats()
+    assert stats["timeouts"] == 1 and stats["queued_now"] == 0
+
+
+def test_cancelled_generation_does_not_update_service_time():
+    admission = AdmissionController(1)
+    admission.release(admission.admit(), completed=False)
+    assert admission.service_time is None
+
+    admission.release(admission.admit())
+    assert admission.service_time is not None
+    assert admission.stats()["in_flight"] == 0
+
+
+def test_capacity_follows_callable():
+    healthy = [2]
+    admission = AdmissionController(lambda: 4 * healthy[0])
+    assert admission.capacity() == 8
+    healthy[0] = 0
+    # Hiç sağlıklı backend yokken de en az bir istek denenebilir
+    assert admission.capacity() == 1
+
+
+def test_async_waiter_gets_slot_and_timeouts_are_skipped():
+    async def scenario():
+        admission = AsyncAdmissionController(1, max_queue=2, max_queue_time=0.05)
+        ticket = await admission.admit()
+        with pytest.raises(Overloaded):
+            await admission.admit()
+
+        admission.max_queue_time = 5
+        waiter = asyncio.ensure_future(admission.admit())
+        await asyncio.sleep(0)
+        admission.release(ticket)
+        await asyncio.wait_for(waiter, 1)
+        return admission.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["timeouts"] == 1
+    assert stats["in_flight"] == 1 and stats["queued_now"] == 0
@@ -0,0 +1,35 @@
+import pytest
+
+import app_minimal
+
+
+@pytest.fixture
+def client():
+    return app_minimal.app.test_client()
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream", "/chat/batch"])
+@pytest.mark.parametrize("body", ['["merhaba"]', '"merhaba"', "42", "json değil"])
+def test_non_object_body_is_rejected(client, path, body):
+    response = client.post(path, data=body.encode("utf-8"), content_type="application/json")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("body, error", [
+    ({"message": ""}, "Mesaj boş olamaz"),
+    ({"message": 5}, "message metin olmalı"),
+    ({"message": "merhaba", "options": [1]}, "options bir nesne olmalı"),
+])
+def test_parse_chat_validates_fields(body, error):
+    assert app_minimal.parse_chat(body) == (None, None, error)
+    assert app_minimal.parse_chat({"message": "merhaba"}) == ("merhaba", {}, None)
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+@pytest.mark.parametrize("session_id", ["", ["a"], {"id": 1}, 7, "x" * 500])
+def test_invalid_session_id_is_rejected(client, path, session_id):
+    response = client.post(path, json={"message": "merhaba", "session_id": session_id})
+    assert response.status_code == 400
+    assert "session_id" in response.get_json()["error"]
+    assert app_minimal.sessions.stats()["created"] == 0
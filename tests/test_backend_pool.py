@@ -0,0 +1,63 @@
+import pytest
+import requests
+
+from backend_pool import BackendPool, is_backend_failure
+from ollama_client import OllamaError
+from single_flight import GenerationCancelled
+
+
+def _pool(hosts=("a", "b"), **kwargs):
+    return BackendPool(list(hosts), lambda host: None, **kwargs)
+
+
+def test_routes_to_least_loaded_backend():
+    pool = _pool()
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    pool.release(first)
+    assert pool.acquire() is first
+
+
+@pytest.mark.parametrize("error, failure", [
+    (requests.exceptions.ConnectionError(), True),
+    (requests.exceptions.ReadTimeout(), True),
+    (OllamaError("Ollama API hatası: 503", 503), True),
+    (OllamaError("akış içi hata"), True),
+    (OllamaError("Ollama API hatası: 400", 400), False),
+    (OllamaError("Ollama API hatası: 404", 404), False),
+    (GenerationCancelled(), False),
+    (ValueError("bizim hatamız"), False),
+])
+def test_only_backend_errors_count_as_failures(error, failure):
+    assert is_backend_failure(error) is failure
+
+
+def test_client_errors_do_not_take_backend_out_of_rotation():
+    pool = _pool(hosts=("a",), max_failures=2)
+    backend = pool.backends[0]
+    for _ in range(5):
+        with pytest.raises(OllamaError):
+            with pool.lease():
+                raise OllamaError("Ollama API hatası: 400", 400)
+    assert backend.failures == 0 and backend.healthy()
+
+
+def test_server_errors_take_backend_out_of_rotation():
+    pool = _pool(hosts=("a", "b"), max_failures=2, cooldown=30)
+    a, b = pool.backends
+    for _ in range(2):
+        with pytest.raises(OllamaError):
+            with pool.lease(exclude=(b,)):
+                raise OllamaError("Ollama API hatası: 500", 500)
+    assert not a.healthy()
+    assert pool.healthy_count() == 1
+    assert pool.acquire() is b
+
+
+def test_preferred_backend_is_skipped_at_its_in_flight_limit():
+    pool = _pool(max_in_flight=2)
+    a, b = pool.backends
+    picked = [pool.acquire(prefer=a) for _ in range(4)]
+    assert picked == [a, a, b, b]
+    assert a.in_flight == 2 and b.in_flight == 2
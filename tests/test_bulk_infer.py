@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import bulk_infer
+from backend_pool import BackendPool
+from bulk_infer import BulkRunner, parse_record, resume_point
+from ollama_client import OllamaClient
+
+
+def _write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def _read_results(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_resume_point_truncates_partial_last_line(tmp_path):
+    output = tmp_path / "results.jsonl"
+    assert resume_point(str(output)) == 0
+
+    output.write_text('{"line": 1}\n{"line": 2}\n{"line": 3, "resp', encoding="utf-8")
+    assert resume_point(str(output)) == 2
+    assert output.read_text(encoding="utf-8") == '{"line": 1}\n{"line": 2}\n'
+
+    output.write_text('{"line": 1, "yar', encoding="utf-8")
+    assert resume_point(str(output)) == 0
+    assert output.read_text(encoding="utf-8") == ""
+
+
+def test_parse_record_accepts_text_and_objects():
+    assert parse_record('"merhaba"', {"temperature": 0}) == (None, "merhaba", {"temperature": 0})
+    record = '{"id": "a1", "prompt": "soru", "options": {"num_predict": 8}}'
+    assert parse_record(record, {"temperature": 0}) == ("a1", "soru", {"temperature": 0, "num_predict": 8})
+
+
+@pytest.fixture
+def runner(fake_ollama):
+    _, url = fake_ollama
+    return BulkRunner(BackendPool([url], OllamaClient), model="fake", retries=0)
+
+
+def test_run_writes_results_in_input_order(tmp_path, runner):
+    source, output = tmp_path / "prompts.jsonl", tmp_path / "results.jsonl"
+    _write_lines(source, [json.dumps(f"soru {i}") for i in range(6)] + ['{"id": "bos", "prompt": ""}'])
+
+    runner.run(str(source), str(output), concurrency=3)
+
+    results = _read_results(output)
+    assert [r["line"] for r in results] == list(range(1, 8))
+    assert all(r["response"] for r in results[:6])
+    assert results[6]["id"] == "bos" and "error" in results[6]
+
+
+def test_run_resumes_after_interrupted_output(tmp_path, runner, monkeypatch):
+    source, output = tmp_path / "prompts.jsonl", tmp_path / "results.jsonl"
+    _write_lines(source, [json.dumps(f"soru {i}") for i in range(5)])
+    output.write_text('{"line": 1, "response": "eski"}\n{"line": 2, "response": "eski"}\n{"line": 3, "re',
+                      encoding="utf-8")
+    prompts = []
+    generate = runner.generate
+    monkeypatch.setattr(runner, "generate", lambda prompt, options: prompts.append(prompt) or generate(prompt, options))
+
+    runner.run(str(source), str(output), concurrency=2)
+
+    results = _read_results(output)
+    assert [r["line"] for r in results] == [1, 2, 3, 4, 5]
+    assert results[0]["response"] == "eski"
+    # Yarım kalan 3. satır ve sonrası yeniden üretildi, tamamlananlar atlandı
+    assert sorted(prompts) == ["soru 2", "soru 3", "soru 4"]
+
+    prompts.clear()
+    runner.run(str(source), str(output), concurrency=2)
+    assert prompts == [] and len(_read_results(output)) == 5
+
+
+def test_server_errors_are_retried_client_errors_are_not(fake_ollama, monkeypatch):
+    config, url = fake_ollama
+    monkeypatch.setattr(bulk_infer.time, "sleep", lambda seconds: None)
+    pool = BackendPool([url], OllamaClient, max_failures=100)
+    runner = BulkRunner(pool, model="fake", retries=2)
+
+    config.error_rate = 1.0
+    result = runner.run_one(1, '"soru"')
+    assert "500" in result["error"]
+    assert pool.backends[0].requests == 3
+
+    # Bilinmeyen yol 404 döner: istek hatası, tekrar denenmez, backend hatalı sayılmaz
+    config.error_rate = 0.0
+    pool.backends[0].client.host = url + "/yok"
+    result = runner.run_one(2, '"soru"')
+    assert "404" in result["error"]
+    assert pool.backends[0].requests == 4
+    assert pool.backends[0].failures == 0
@@ -0,0 +1,47 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from colab_launcher import Launcher, StartupError, wait_until
+
+
+def test_stopped_launcher_starts_no_step_or_process(tmp_path):
+    launcher = Launcher("http://127.0.0.1:1")
+    launcher.stop()
+
+    with pytest.raises(StartupError):
+        launcher.timed("model indirme", lambda: None)
+    with pytest.raises(StartupError):
+        launcher.spawn([sys.executable, "-c", "pass"], str(tmp_path / "web.log"))
+    assert launcher.processes == [] and launcher.logs == []
+
+
+def test_stop_interrupts_preparation_and_waits_for_it():
+    launcher = Launcher("http://127.0.0.1:1")
+    steps = []
+
+    def prepare_model():
+        launcher.timed("ollama serve", wait_until, lambda: False, "Sahte Ollama", 30, stop=launcher._stopping)
+        launcher.timed("model indirme", steps.append, "pull")
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    launcher.tasks.append(pool.submit(prepare_model))
+    time.sleep(0.2)
+
+    started = time.monotonic()
+    launcher.stop()
+    assert time.monotonic() - started < 5
+    # Hazırlık thread'i bitti ve durdurma sonrası "ollama pull" aşamasına geçmedi
+    assert launcher.tasks[0].done() and isinstance(launcher.tasks[0].exception(), StartupError)
+    assert steps == []
+    pool.shutdown()
+
+
+def test_stop_terminates_spawned_processes(tmp_path):
+    launcher = Launcher("http://127.0.0.1:1")
+    process = launcher.spawn([sys.executable, "-c", "import time; time.sleep(30)"], str(tmp_path / "web.log"))
+    launcher.stop()
+    assert process.wait(5) is not None
+    assert launcher.logs == []
@@ -0,0 +1,28 @@
+from colab_shared import HISTORY_TOKEN_BUDGET, ChatHistories, ChatHistory
+
+
+def test_first_turn_gets_system_prompt_then_context_is_reused():
+    history = ChatHistory("http://127.0.0.1:1/api/generate", "fake", system_prompt="Türkçe yanıt ver. ")
+    assert history.prompt("merhaba") == ("Türkçe yanıt ver. merhaba", None)
+
+    history.add("merhaba", "selam", context=[1, 2, 3])
+    assert history.prompt("nasılsın") == ("nasılsın", [1, 2, 3])
+
+    # Context bütçeyi aşınca son turlar metin olarak gönderilir
+    history.context = [0] * HISTORY_TOKEN_BUDGET
+    prompt, context = history.prompt("nasılsın")
+    assert context is None
+    assert "Kullanıcı: merhaba\nAsistan: selam" in prompt and prompt.endswith("Kullanıcı sorusu: nasılsın")
+
+
+def test_histories_reuse_valid_ids_and_replace_invalid_ones():
+    histories = ChatHistories("http://127.0.0.1:1/api/generate", "fake", max_sessions=2)
+    session_id, history = histories.get()
+    assert histories.get(session_id) == (session_id, history)
+
+    for bad in ("", ["a"], "a" * 500, "../x"):
+        new_id, new_history = histories.get(bad)
+        assert new_id != bad and new_history is not history
+
+    # En uzun süre kullanılmayan oturum atıldı
+    assert histories.get(session_id)[1] is not history
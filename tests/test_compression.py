@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+import zlib
+
+from compression import (AsgiCompressionMiddleware, CompressedStream, CompressionMiddleware, PrecompressedPage,
+                         StreamCompressor, negotiate)
+
+
+def test_negotiate_respects_q_values():
+    assert negotiate("gzip, deflate", ("gzip",)) == "gzip"
+    assert negotiate("gzip;q=0", ("gzip",)) is None
+    assert negotiate("*", ("gzip",)) == "gzip"
+    assert negotiate("gzip;q=0.5, br", ("br", "gzip")) == "br"
+    assert negotiate(None, ("gzip",)) is None
+
+
+def test_precompressed_page_variants_and_304():
+    page = PrecompressedPage("<html>" + "merhaba " * 200 + "</html>")
+
+    status, headers, body = page.respond("gzip", None)
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body).startswith(b"<html>")
+
+    status, plain_headers, _ = page.respond("", None)
+    assert "Content-Encoding" not in plain_headers
+    # Farklı temsil, farklı güçlü ETag
+    assert plain_headers["ETag"] != headers["ETag"]
+
+    status, _, body = page.respond("gzip", f'W/{headers["ETag"]}')
+    assert status == 304 and body == b""
+
+
+def test_stream_compressor_flushes_every_chunk():
+    compressor = StreamCompressor("gzip")
+    decoder = zlib.decompressobj(31)
+    # Her parça kendi başına çözülebilmeli (SSE token'ları tamponda beklemez)
+    assert decoder.decompress(compressor.compress(b"data: a\n\n", flush=True)) == b"data: a\n\n"
+    assert decoder.decompress(compressor.compress(b"data: b\n\n", flush=True)) == b"data: b\n\n"
+    decoder.decompress(compressor.finish())
+    assert decoder.eof
+
+
+def _wsgi_app(content_type, chunks, closed, extra_headers=()):
+    class Body:
+        def __iter__(self):
+            return iter(chunks)
+
+        def close(self):
+            closed.append(True)
+
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", content_type), *extra_headers])
+        return Body()
+    return app
+
+
+def _call(app, accept_encoding="gzip"):
+    captured = {}
+
+    def start_response(status, headers, exc_info=None):
+        captured["headers"] = dict(headers)
+    body = app({"REQUEST_METHOD": "GET", "HTTP_ACCEPT_ENCODING": accept_encoding}, start_response)
+    return captured["headers"], body
+
+
+def test_middleware_compresses_streams_chunk_by_chunk():
+    closed = []
+    app = CompressionMiddleware(_wsgi_app("text/event-stream", [b"data: a\n\n", b"data: b\n\n"], closed))
+    headers, body = _call(app)
+
+    assert headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in headers
+    assert isinstance(body, CompressedStream)
+    assert gzip.decompress(b"".join(body)) == b"data: a\n\ndata: b\n\n"
+    body.close()
+    assert closed
+
+
+def test_closing_unstarted_stream_closes_inner_body():
+    closed = []
+    app = CompressionMiddleware(_wsgi_app("text/event-stream", [b"data: a\n\n"], closed))
+    _, body = _call(app)
+    body.close()
+    assert closed == [True]
+
+
+def test_middleware_skips_uncompressible_and_unaccepted():
+    closed = []
+    headers, _ = _call(CompressionMiddleware(_wsgi_app("image/png", [b"x" * 4096], closed)))
+    assert "Content-Encoding" not in headers
+
+    headers, _ = _call(CompressionMiddleware(_wsgi_app("application/json", [b"x" * 4096], closed)), "")
+    assert "Content-Encoding" not in headers
+
+
+def test_uncompressed_compressible_responses_still_vary():
+    closed = []
+    # İstemci sıkıştırma istemedi: gövde düz ama önbellek gzip'li varyantla karıştırmamalı
+    headers, _ = _call(CompressionMiddleware(_wsgi_app("application/json", [b"x" * 4096], closed)), "")
+    assert headers["Vary"] == "Accept-Encoding"
+
+    # Eşiğin altındaki gövde, mevcut Vary korunarak
+    app = _wsgi_app("application/json", [b"{}"], closed, [("Content-Length", "2"), ("Vary", "Origin")])
+    headers, _ = _call(CompressionMiddleware(app))
+    assert "Content-Encoding" not in headers
+    assert headers["Vary"] == "Origin, Accept-Encoding"
+
+    headers, _ = _call(CompressionMiddleware(_wsgi_app("image/png", [b"x" * 4096], closed)))
+    assert "Vary" not in headers
+
+
+def test_asgi_uncompressed_compressible_response_varies():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", b"2")]})
+        await send({"type": "http.response.body", "body": b"{}", "more_body": False})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(AsgiCompressionMiddleware(app)(scope, None, send))
+
+    headers = dict(sent[0]["headers"])
+    assert b"content-encoding" not in {name.lower() for name in headers}
+    assert headers[b"Vary"] == b"Accept-Encoding"
+    assert sent[1]["body"] == b"{}"
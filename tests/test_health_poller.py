@@ -0,0 +1,33 @@
+from backend_pool import BackendPool
+from health_poller import HealthPoller
+from ollama_client import OllamaClient
+
+
+def test_successful_probe_does_not_cut_the_cooldown_short(fake_ollama):
+    _, url = fake_ollama
+    pool = BackendPool([url], OllamaClient, max_failures=2, cooldown=30)
+    backend = pool.backends[0]
+    # Üretimler hata verdi: backend soğumaya alındı
+    pool.release(pool.acquire(), failed=True)
+    pool.release(pool.acquire(), failed=True)
+    assert not backend.healthy()
+
+    poller = HealthPoller(pool)
+    poller.poll_once()
+    assert poller.health()["backends"][0]["ollama"] == "connected"
+    assert not backend.healthy()
+
+    # Soğuma bitince backend rotasyona döner; hata serisini sadece başarılı üretim sıfırlar
+    backend.down_until = 0.0
+    poller.poll_once()
+    assert backend.healthy() and backend.failures == 2
+    pool.release(pool.acquire())
+    assert backend.failures == 0
+
+
+def test_failed_probe_takes_backend_down():
+    pool = BackendPool(["http://127.0.0.1:1"], OllamaClient, max_failures=1)
+    poller = HealthPoller(pool, timeout=0.5)
+    poller.poll_once()
+    assert not pool.backends[0].healthy()
+    assert poller.health()["status"] == "unhealthy"
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+import history as history_module
+
+from history import AsyncHistoryManager, HistoryManager, estimate_tokens
+from sessions import SessionStore
+
+
+def _session_with_turns(store, turns, context_tokens):
+    session = store.get_or_create()
+    for i in range(turns):
+        store.record(session, f"soru {i} " + "x" * 40, f"yanıt {i} " + "y" * 40, None)
+    session.context = list(range(context_tokens))
+    return session
+
+
+def test_prepare_reuses_context_within_budget():
+    history = HistoryManager(lambda prompt: "", budget=100)
+    session = _session_with_turns(SessionStore(), 1, 50)
+
+    prompt, context = history.prepare(session, "devam et")
+    assert prompt == "devam et" and context == session.context
+    assert history.stats()["reused"] == 1
+
+
+def test_prepare_compacts_to_summary_and_recent_turns():
+    history = HistoryManager(lambda prompt: "", budget=100, keep_turns=1)
+    session = _session_with_turns(SessionStore(), 5, 500)
+    session.summary = "Kullanıcı Python öğreniyor."
+
+    prompt, context = history.prepare(session, "devam et")
+    assert context is None
+    assert prompt.startswith("Önceki konuşmanın özeti:\nKullanıcı Python öğreniyor.")
+    assert "soru 4" in prompt and "soru 0" not in prompt
+    assert prompt.endswith("Kullanıcı: devam et\nAsistan:")
+    assert estimate_tokens(prompt) <= 100
+
+
+def test_num_ctx_lowers_the_budget():
+    history = HistoryManager(lambda prompt: "", budget=1000)
+    assert history.budget_for({"num_ctx": 512}) == 384
+    assert history.budget_for(None) == 1000
+
+
+def test_old_turns_are_summarized_in_background():
+    done = threading.Event()
+    prompts = []
+
+    def summarize(prompt):
+        prompts.append(prompt)
+        return " özet "
+
+    history = HistoryManager(summarize, budget=40, keep_turns=1)
+    session = _session_with_turns(SessionStore(), 3, 0)
+    original_apply = history._apply
+
+    def apply(*args):
+        original_apply(*args)
+        done.set()
+    history._apply = apply
+
+    history.maybe_summarize(session)
+    assert done.wait(5)
+    assert session.summary == "özet"
+    # Son tur (keep_turns) özete girmez
+    assert session.summarized == len(session.history) - 2
+    assert "soru 0" in prompts[0] and "soru 2" not in prompts[0]
+
+
+def test_async_summary_failure_is_counted(monkeypatch, capsys):
+    events = []
+    monkeypatch.setattr(history_module.log, "warning", lambda event, **fields: events.append((event, fields)))
+
+    async def summarize(prompt):
+        raise RuntimeError("ollama yok")
+
+    async def scenario():
+        history = AsyncHistoryManager(summarize, budget=40, keep_turns=1)
+        session = _session_with_turns(SessionStore(), 3, 0)
+        history.maybe_summarize(session)
+        await asyncio.gather(*history._tasks)
+        return history.stats(), session
+
+    stats, session = asyncio.run(scenario())
+    assert stats["summary_errors"] == 1
+    assert session.summarized == 0 and not session.summarizing
+    # Hata stdout'a değil yapılandırılmış loga yazılır
+    assert events == [("history.summary_error", {"error": "ollama yok"})]
+    assert capsys.readouterr().out == ""
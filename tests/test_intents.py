@@ -0,0 +1,66 @@
+import json
+
+from intents import IntentMatcher, IntentResponder
+
+INTENTS = [
+    {"name": "greeting", "patterns": ["merhaba", "iyi aksamlar"], "responses": ["Merhaba!"]},
+    {"name": "thanks", "patterns": ["tesekkur ederim", "sag ol"], "responses": ["Rica ederim!"]},
+    {"name": "goodbye", "patterns": ["gorusuruz"], "responses": ["Görüşürüz!"], "min_confidence": 0.9}
+]
+
+
+def test_simple_messages_match_with_full_confidence():
+    matcher = IntentMatcher(INTENTS, min_confidence=0.8, ignore=["hocam"])
+
+    match = matcher.match("Merhaba hocam!")
+    assert match.name == "greeting" and match.confidence == 1.0
+    assert matcher.match("Teşekkür ederim").response == "Rica ederim!"
+    assert matcher.match("iyi akşamlar").name == "greeting"
+
+
+def test_real_question_with_greeting_is_not_canned():
+    matcher = IntentMatcher(INTENTS, min_confidence=0.8)
+    assert matcher.match("merhaba bana bir python betiği yaz") is None
+    assert matcher.match("bugün hava nasıl") is None
+
+
+def test_per_intent_min_confidence_overrides_default():
+    matcher = IntentMatcher(INTENTS, min_confidence=0.5)
+    assert matcher.match("gorusuruz yarin") is None
+    assert matcher.match("görüşürüz").name == "goodbye"
+
+
+def test_only_ignored_words_do_not_match():
+    matcher = IntentMatcher(INTENTS, ignore=["hocam", "abi"])
+    assert matcher.match("hocam abi") is None
+
+
+def test_responder_reloads_when_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr("intents.INTENT_RELOAD_CHECK", 0)
+    path = tmp_path / "intents.json"
+    path.write_text(json.dumps({"intents": INTENTS[:1]}), encoding="utf-8")
+    responder = IntentResponder(str(path))
+    assert responder.respond("teşekkür ederim") is None
+
+    path.write_text(json.dumps({"intents": INTENTS}), encoding="utf-8")
+    # mtime çözünürlüğüne takılmamak için değişikliği zorla
+    responder._mtime = None
+    assert responder.respond("teşekkür ederim").name == "thanks"
+    assert responder.stats()["hits"] == 1
+
+
+def test_responder_keeps_old_matcher_on_broken_file(tmp_path):
+    path = tmp_path / "intents.json"
+    path.write_text(json.dumps({"intents": INTENTS}), encoding="utf-8")
+    responder = IntentResponder(str(path))
+
+    path.write_text("{bozuk", encoding="utf-8")
+    responder._mtime = None
+    responder._reload()
+    assert responder.respond("merhaba").name == "greeting"
+
+
+def test_empty_path_disables_responder():
+    responder = IntentResponder("")
+    assert responder.respond("merhaba") is None
+    assert not responder.stats()["enabled"]
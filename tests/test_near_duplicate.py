@@ -0,0 +1,60 @@
+import pytest
+
+from near_duplicate import NEAR_DUP_THRESHOLD, NearDuplicateIndex, normalize_text
+
+
+def test_normalize_folds_case_punctuation_and_turkish_letters():
+    assert normalize_text("Merhaba, NASILSIN?") == "merhaba nasilsin"
+    assert normalize_text("Şöyle  çağır: İĞNE") == "soyle cagir igne"
+
+
+def test_lookup_finds_near_duplicate_prompt():
+    index = NearDuplicateIndex(threshold=NEAR_DUP_THRESHOLD)
+    index.add("llama3", "Python'da liste nasıl sıralanır?", "sorted() kullanın")
+
+    value, score = index.lookup("llama3", "python da liste nasil siralanir")
+    assert value == "sorted() kullanın"
+    assert score >= NEAR_DUP_THRESHOLD
+
+
+def test_unrelated_prompt_and_other_namespace_miss():
+    index = NearDuplicateIndex(threshold=NEAR_DUP_THRESHOLD)
+    index.add("llama3", "Python'da liste nasıl sıralanır?", "sorted()")
+
+    assert index.lookup("llama3", "Yarın İstanbul'da hava nasıl olacak?") is None
+    assert index.lookup("mistral", "Python'da liste nasıl sıralanır?") is None
+    assert index.stats()["misses"] == 2
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Kahve sağlığa zararlı mı?", "Kahve sağlığa zararlı değil mi?"),
+    ("Bu kodu çalıştırmalı mıyım?", "Bu kodu çalıştırmamalı mıyım?"),
+    ("Is it safe to run this script?", "Is it not safe to run this script?"),
+    ("2023 yılında en çok satan elektrikli araba hangisiydi?",
+     "2024 yılında en çok satan elektrikli araba hangisiydi?"),
+    ("Python 3.11 ile gelen yenilikleri özetle", "Python 3.12 ile gelen yenilikleri özetle"),
+])
+def test_negation_and_number_changes_do_not_hit(stored, asked):
+    index = NearDuplicateIndex()
+    index.add("llama3", stored, "eski yanıt")
+    assert index.lookup("llama3", asked) is None
+    assert index.lookup("llama3", stored)[0] == "eski yanıt"
+
+
+def test_eviction_drops_oldest_and_its_buckets():
+    index = NearDuplicateIndex(max_entries=2)
+    for i in range(10):
+        index.add("m", f"benzersiz soru {i} kelime{i * 37}", i)
+
+    stats = index.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 8
+    assert index.lookup("m", "benzersiz soru 0 kelime0") is None
+    # Boşalan bantlar silinir: kova sayısı kalan kayıtların bant sayısını aşmaz
+    assert len(index._buckets) <= 2 * index.bands
+
+
+def test_zero_threshold_disables_index():
+    index = NearDuplicateIndex(threshold=0)
+    index.add("m", "merhaba", "selam")
+    assert not index.enabled
+    assert index.lookup("m", "merhaba") is None
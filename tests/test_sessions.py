@@ -0,0 +1,62 @@
+from sessions import SESSION_ID_MAX_LENGTH, SessionStore, valid_session_id
+
+
+def test_get_or_create_reuses_known_ids():
+    store = SessionStore()
+    session = store.get_or_create()
+    assert store.get_or_create(session.id) is session
+    assert store.get_or_create("bilinmeyen").id == "bilinmeyen"
+    assert store.stats()["created"] == 2
+
+
+def test_record_keeps_history_and_latest_context():
+    store = SessionStore()
+    session = store.get_or_create()
+    store.record(session, "merhaba", "selam", [1, 2, 3])
+    store.record(session, "nasılsın", "iyiyim", None)
+
+    assert [m["role"] for m in session.history] == ["user", "assistant", "user", "assistant"]
+    # Context'siz yanıt (ör. hata) son context'i silmez
+    assert session.context == [1, 2, 3]
+    assert store.stats()["bytes"] == session.size()
+
+
+def test_least_recently_used_sessions_are_evicted():
+    store = SessionStore(max_count=2)
+    first = store.get_or_create("a")
+    store.get_or_create("b")
+    store.get_or_create("a")
+    store.record(store.get_or_create("c"), "x", "y", None)
+
+    assert store.get("a") is first
+    assert store.get("b") is None
+    assert store.stats()["evicted"] == 1
+
+
+def test_byte_budget_and_idle_ttl():
+    store = SessionStore(max_bytes=100)
+    store.record(store.get_or_create("a"), "x" * 60, "y", None)
+    store.record(store.get_or_create("b"), "x" * 60, "y", None)
+    assert store.get("a") is None and store.get("b") is not None
+
+    store = SessionStore(idle_ttl=0)
+    store.get_or_create("a")
+    store.get_or_create("b")
+    assert store.get("a") is None
+    assert store.stats()["expired"] >= 1
+
+
+def test_delete_releases_bytes():
+    store = SessionStore()
+    session = store.get_or_create("a")
+    store.record(session, "soru", "yanıt", [1] * 10)
+    assert store.delete("a")
+    assert not store.delete("a")
+    assert store.stats()["bytes"] == 0
+
+
+def test_valid_session_id_is_bounded_token():
+    assert valid_session_id("3f2a9c_oturum-1")
+    assert valid_session_id("a" * SESSION_ID_MAX_LENGTH)
+    for bad in ("", "a" * (SESSION_ID_MAX_LENGTH + 1), "a b", "../x", 42, ["a"], {"id": "a"}, True):
+        assert not valid_session_id(bad)
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+
+import pytest
+
+from single_flight import AsyncSingleFlight, GenerationCancelled, SingleFlight, detach_once
+
+
+def test_concurrent_joins_share_one_generation():
+    flights = SingleFlight(enabled=True)
+    release = threading.Event()
+    calls = []
+
+    def work(flight):
+        calls.append(flight.key)
+        release.wait(5)
+        for token in ("a", "b", "c"):
+            flight.publish(token)
+        return "abc"
+
+    leader, is_leader = flights.join("k", work)
+    follower, is_follower_leader = flights.join("k", work)
+    release.set()
+
+    assert is_leader and not is_follower_leader
+    assert follower is leader
+    assert "".join(follower.follow()) == "abc"
+    assert leader.wait() == "abc"
+    assert calls == ["k"]
+    assert flights.stats()["followers"] == 1
+
+
+def test_late_follower_gets_tokens_from_the_start():
+    flights = SingleFlight(enabled=True)
+    published = threading.Event()
+    release = threading.Event()
+
+    def work(flight):
+        flight.publish("ilk ")
+        published.set()
+        release.wait(5)
+        flight.publish("son")
+
+    leader, _ = flights.join("k", work)
+    published.wait(5)
+    late = flights.find("k")
+    release.set()
+
+    assert late is leader
+    assert "".join(late.follow()) == "ilk son"
+
+
+def test_disabled_never_coalesces():
+    flights = SingleFlight(enabled=False)
+    first, _ = flights.join("k", lambda flight: 1)
+    second, is_leader = flights.join("k", lambda flight: 2)
+
+    assert is_leader and second is not first
+    assert flights.find("k") is None
+
+
+def test_last_detach_cancels_and_runs_hook():
+    flights = SingleFlight(enabled=True)
+    hooked = threading.Event()
+    closed = threading.Event()
+
+    def work(flight):
+        with flight.cancel_hook(closed.set):
+            hooked.set()
+            closed.wait(5)
+        raise GenerationCancelled()
+
+    flight, _ = flights.join("k", work)
+    other = flights.find("k")
+    hooked.wait(5)
+
+    flight.detach()
+    assert not flight.cancelled
+    other.detach()
+    assert flight.cancelled and closed.is_set()
+    with pytest.raises(GenerationCancelled):
+        flight.wait()
+    # İptal edilmiş üretime yeni takipçi bağlanmaz; yeni üretim başlar
+    assert flights.find("k") is None
+    assert flights.stats()["cancelled"] == 1
+
+
+def test_error_reaches_every_follower():
+    flights = SingleFlight(enabled=True)
+    release = threading.Event()
+
+    def work(flight):
+        release.wait(5)
+        raise ValueError("upstream")
+
+    leader, _ = flights.join("k", work)
+    follower = flights.find("k")
+    release.set()
+
+    for flight in (leader, follower):
+        with pytest.raises(ValueError):
+            list(flight.follow())
+
+
+def test_detach_once_releases_a_single_follower():
+    flights = SingleFlight(enabled=True)
+    release = threading.Event()
+    flight, _ = flights.join("k", lambda f: release.wait(5))
+    flights.find("k")
+
+    detach = detach_once(flight)
+    detach()
+    detach()
+    assert flight.followers == 1 and not flight.cancelled
+    release.set()
+
+
+def test_async_concurrent_joins_share_one_generation():
+    async def scenario():
+        flights = AsyncSingleFlight(enabled=True)
+        calls = []
+
+        async def work(flight):
+            calls.append(flight.key)
+            await asyncio.sleep(0.01)
+            flight.publish("a")
+            flight.publish("b")
+            return "ab"
+
+        leader, _ = flights.join("k", work)
+        follower, is_leader = flights.join("k", work)
+        tokens = [token async for token in follower.follow()]
+        return calls, is_leader, tokens, await leader.wait()
+
+    calls, is_leader, tokens, result = asyncio.run(scenario())
+    assert calls == ["k"] and not is_leader
+    assert tokens == ["a", "b"] and result == "ab"
+
+
+def test_async_last_detach_cancels_task():
+    async def scenario():
+        flights = AsyncSingleFlight(enabled=True)
+        cleaned = asyncio.Event()
+
+        async def work(flight):
+            try:
+                await asyncio.sleep(10)
+            finally:
+                cleaned.set()
+
+        flight, _ = flights.join("k", work)
+        await asyncio.sleep(0)
+        flight.detach()
+        await asyncio.wait_for(cleaned.wait(), 1)
+        with pytest.raises(GenerationCancelled):
+            await flight.wait()
+        return flights.stats()
+
+    assert asyncio.run(scenario())["cancelled"] == 1
+
+
+def test_async_detach_before_start_still_runs_cleanup():
+    async def scenario():
+        flights = AsyncSingleFlight(enabled=True)
+        cleaned = asyncio.Event()
+
+        async def work(flight):
+            try:
+                await asyncio.sleep(10)
+            finally:
+                cleaned.set()
+
+        flight, _ = flights.join("k", work)
+        # Task henüz ilk adımını atmadan son takipçi ayrılır
+        flight.detach()
+        await asyncio.wait_for(cleaned.wait(), 1)
+        return flight.cancelled
+
+    assert asyncio.run(scenario())
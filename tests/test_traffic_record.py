@@ -0,0 +1,83 @@
+import gzip
+import json
+import threading
+
+from traffic_record import TrafficRecorder, anonymize, fingerprint, load_recordings, token_schedule
+
+
+def test_anonymize_keeps_shape_but_not_content():
+    assert anonymize("Şifre: abc123!") == "xxxxx: xxx000!"
+    assert fingerprint("Merhaba 42") == fingerprint("Selamla 17")
+    assert fingerprint("Merhaba") != fingerprint("Merhaba 42")
+
+
+def test_disabled_recorder_writes_nothing():
+    recorder = TrafficRecorder(path="")
+    recording = recorder.start("llama3", "merhaba")
+    recording.token("selam")
+    recording.finish()
+    assert not recorder.enabled and recorder.recorded == 0
+
+
+def test_recording_round_trips_through_schedule(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    recorder = TrafficRecorder(path=str(path))
+    recording = recorder.start("llama3", "Gizli soru 7", {"temperature": 0}, context=[1, 2])
+    for token in ("Me", "rha", "ba"):
+        recording.token(token)
+    recording.finish(stats={"eval_count": 3, "eval_duration": 1000, "foo": "bar"})
+    recorder.close()
+
+    [entry] = load_recordings(str(path))
+    assert entry["prompt"] == "xxxxx xxxx 0"
+    assert entry["response"] == "xxxxxxx"
+    assert entry["lens"] == [2, 3, 2] and len(entry["gaps"]) == 2
+    assert entry["context"] == 2
+    assert entry["stats"] == {"eval_count": 3, "eval_duration": 1000}
+
+    first, steps = token_schedule(entry)
+    assert first == entry["ttft"] / 1000
+    assert [token for _, token in steps] == ["xx", "xxx", "xx"]
+    assert steps[0][0] == 0.0
+
+
+def test_load_skips_partial_last_line_and_reads_gzip(tmp_path):
+    lines = [json.dumps({"at": 2, "fp": "b"}), json.dumps({"at": 1, "fp": "a"}), '{"at": 3, "fp"']
+    data = "\n".join(lines)
+    plain = tmp_path / "traffic.jsonl"
+    plain.write_text(data, encoding="utf-8")
+    packed = tmp_path / "traffic.jsonl.gz"
+    packed.write_bytes(gzip.compress(data.encode("utf-8")))
+
+    for path in (plain, packed):
+        # Kayıtlar zamana göre sıralanır
+        assert [r["fp"] for r in load_recordings(str(path))] == ["a", "b"]
+
+
+def test_failed_generation_keeps_error():
+    written = []
+    recorder = TrafficRecorder(path="unused.jsonl")
+    recorder.write = written.append
+    recorder.start("llama3", "soru").finish(error=RuntimeError("kopma"))
+    assert written[0]["error"] == "kopma"
+    assert written[0]["ttft"] is None and written[0]["lens"] == []
+
+
+def test_finish_does_not_wait_for_disk(tmp_path):
+    recorder = TrafficRecorder(path=str(tmp_path / "traffic.jsonl"), queue_size=1)
+    blocked = threading.Event()
+    release = threading.Event()
+
+    def slow_write(records):
+        blocked.set()
+        release.wait(5)
+    recorder._write = slow_write
+
+    recorder.start("llama3", "bir").finish()
+    assert blocked.wait(5)
+    recorder.start("llama3", "iki").finish()
+    # Yazıcı diskte takılıyken kuyruk doldu: üretim beklemez, kayıt düşürülür
+    recorder.start("llama3", "üç").finish()
+    assert recorder.stats()["dropped"] == 1
+    release.set()
+    recorder.close()
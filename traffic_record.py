@@ -0,0 +1,212 @@
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+# Gerçek Ollama trafiğini performans testi için kaydetme.
+# Her üretim tek JSONL satırıdır: anonimleştirilmiş prompt/yanıt, token
+# uzunlukları ve token varış aralıkları (ms). fake_ollama.py --replay bu
+# dosyayı kaydedildiği hızda (ya da hızlandırılmış) yeniden oynatır.
+TRAFFIC_RECORD_PATH = os.getenv('TRAFFIC_RECORD_PATH', '')   # Boş = kayıt kapalı
+TRAFFIC_RECORD_SAMPLE = float(os.getenv('TRAFFIC_RECORD_SAMPLE', 1.0))
+# Diske yazılmayı bekleyen en fazla kayıt; doluysa kayıt üretimi bekletmeden düşürülür
+TRAFFIC_RECORD_QUEUE = int(os.getenv('TRAFFIC_RECORD_QUEUE', 1000))
+FORMAT_VERSION = 1
+_BATCH = 256
+
+_LETTERS = re.compile(r'[^\W\d_]')
+_DIGITS = re.compile(r'\d')
+# Zamanlamaları saklanan Ollama istatistikleri (nanosaniye / sayı)
+_STATS_KEYS = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+               "eval_count", "eval_duration")
+
+
+def anonymize(text):
+    """Harfler 'x', rakamlar '0' olur; uzunluk, boşluk ve noktalama korunur"""
+    return _DIGITS.sub('0', _LETTERS.sub('x', text))
+
+
+def fingerprint(text):
+    """Anonim metnin kısa özeti; replay'de gelen prompt'u kayıtla eşlemek için"""
+    return hashlib.sha1(anonymize(text).encode('utf-8')).hexdigest()[:16]
+
+
+class Recording:
+    """Tek üretimin token varış zamanlarını toplar, bitince kaydediciye yazar"""
+
+    def __init__(self, recorder, model, prompt, options, context):
+        self.recorder = recorder
+        self.entry = {
+            "v": FORMAT_VERSION,
+            "at": round(time.time(), 3),
+            "model": model,
+            "fp": fingerprint(prompt),
+            "prompt": anonymize(prompt),
+            "options": options or {},
+            "context": len(context or ())
+        }
+        self.started = time.monotonic()
+        self.arrivals = []
+        self.tokens = []
+
+    def token(self, token):
+        self.arrivals.append(time.monotonic())
+        self.tokens.append(token)
+
+    def finish(self, stats=None, error=None):
+        entry = self.entry
+        # İlk token'a kadar geçen süre + token'lar arası aralıklar (ms)
+        previous = self.started
+        gaps = []
+        for arrival in self.arrivals:
+            gaps.append(round((arrival - previous) * 1000))
+            previous = arrival
+        entry["ttft"] = gaps[0] if gaps else None
+        entry["gaps"] = gaps[1:]
+        entry["lens"] = [len(t) for t in self.tokens]
+        entry["response"] = anonymize("".join(self.tokens))
+        entry["elapsed"] = round((time.monotonic() - self.started) * 1000)
+        if stats:
+            entry["stats"] = {k: stats[k] for k in _STATS_KEYS if k in stats}
+        if error is not None:
+            entry["error"] = str(error)
+        self.recorder.write(entry)
+
+
+class _NullRecording:
+    def token(self, token):
+        pass
+
+    def finish(self, stats=None, error=None):
+        pass
+
+
+NULL_RECORDING = _NullRecording()
+
+
+class TrafficRecorder:
+    """Üretimleri satır satır ekleyen kaydedici; yol boşsa hiçbir şey yapmaz.
+    Kayıtlar kuyruğa alınır; JSON ve disk yazımı arka plan thread'inde yapılır."""
+
+    def __init__(self, path=TRAFFIC_RECORD_PATH, sample=TRAFFIC_RECORD_SAMPLE, queue_size=TRAFFIC_RECORD_QUEUE):
+        self.path = path
+        self.sample = sample
+        self.recorded = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.path) and self.sample > 0
+
+    def start(self, model, prompt, options=None, context=None):
+        """Yeni kayıt; kayıt kapalıysa ya da örneklemeye girmediyse no-op nesne"""
+        if not self.enabled or (self.sample < 1 and random.random() >= self.sample):
+            return NULL_RECORDING
+        return Recording(self, model, prompt, options, context)
+
+    def write(self, entry):
+        """Kaydı kuyruğa ekle (üretim thread'i diski beklemez)"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="traffic-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            entries = [self._queue.get()]
+            while len(entries) < _BATCH:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [e for e in entries if e is not None]
+            if records:
+                self._write(records)
+            if None in entries:
+                return
+
+    def _write(self, records):
+        data = ''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n' for r in records)
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(data)
+            self._file.flush()
+            with self._lock:
+                self.recorded += len(records)
+        except OSError as e:
+            print(f"⚠️ Trafik kaydı yazılamadı: {str(e)}")
+            with self._lock:
+                self.dropped += len(records)
+
+    def close(self, timeout=2):
+        """Kuyruktakileri yazıp thread'i durdur"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        with self._lock:
+            recorded, dropped = self.recorded, self.dropped
+        return {"enabled": self.enabled, "path": self.path or None, "sample": self.sample,
+                "recorded": recorded, "dropped": dropped, "queued": self._queue.qsize()}
+
+
+def load_recordings(path):
+    """Kayıt dosyasını oku (.gz desteklenir); yarım kalan son satır atlanır"""
+    opener = gzip.open if path.endswith('.gz') else open
+    recordings = []
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                recordings.append(json.loads(line))
+            except ValueError:
+                continue
+    recordings.sort(key=lambda r: r["at"])
+    return recordings
+
+
+def token_schedule(recording):
+    """Kaydı (ilk token gecikmesi sn, [(aralık sn, token)]) olarak geri kur"""
+    response = recording.get("response", "")
+    steps = []
+    position = 0
+    gaps = [recording.get("ttft") or 0] + list(recording.get("gaps", []))
+    for gap, length in zip(gaps, recording.get("lens", [])):
+        steps.append((gap / 1000, response[position:position + length]))
+        position += length
+    first = steps[0][0] if steps else (recording.get("elapsed") or 0) / 1000
+    if steps:
+        steps[0] = (0.0, steps[0][1])
+    return first, steps